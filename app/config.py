@@ -1,4 +1,22 @@
 import os
+import tempfile
+
+
+def _get_env(name: str, default: str) -> str:
+    # .env.example をそのまま使うと空文字が入るので、空は未設定として扱う
+    return os.getenv(name) or default
+
+
+def _get_float_env(name: str, default: float) -> float:
+    return float(_get_env(name, str(default)))
+
+
+def _get_int_env(name: str, default: int) -> int:
+    return int(_get_env(name, str(default)))
+
+
+def _get_bool_env(name: str, default: bool) -> bool:
+    return _get_env(name, "1" if default else "0") == "1"
 
 GOOGLE_PLACES_API_KEY = os.getenv("PLACES_API_KEY")
 GOOGLE_NEARBY_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
@@ -6,6 +24,53 @@ PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "")
 DATETIME_LIFF_URL = os.getenv("DATETIME_LIFF_URL", "")
 DATETIME_LIFF_ID = os.getenv("DATETIME_LIFF_ID", "2009360861-udWtvLeU")
 
+# Places API の呼び出し上限（1秒あたり。エンドポイントごと）
+PLACES_NEARBY_QPS = _get_float_env("PLACES_NEARBY_QPS", 5.0)
+PLACES_DETAILS_QPS = _get_float_env("PLACES_DETAILS_QPS", 10.0)
+PLACES_PHOTO_QPS = _get_float_env("PLACES_PHOTO_QPS", 20.0)
+# Place Details が p90 を過ぎても返らないとき、追加で1本投げる（全体の5%まで）
+PLACES_DETAILS_HEDGING = _get_bool_env("PLACES_DETAILS_HEDGING", True)
+# 検索の返信までの時間予算（秒）。各段階は残り時間に合わせて処理を省く
+SEARCH_REPLY_SLO_SEC = _get_float_env("SEARCH_REPLY_SLO_SEC", 8.0)
+# reply token の有効期限（秒）。これに間に合わない返信は push で送る
+LINE_REPLY_TOKEN_TTL_SEC = _get_float_env("LINE_REPLY_TOKEN_TTL_SEC", 30.0)
+# 1 で、Nearby の結果だけで先に返信し、付与後に並びが大きく変わったら push で送り直す
+PROGRESSIVE_RESULTS = _get_bool_env("PROGRESSIVE_RESULTS", False)
+# 1 で、Nearby Search を 3000m で1回だけ呼び（足りなければ次のページも取り）、
+# 1000 / 2000 / 3000m の絞り込みは距離で手元で行う
+NEARBY_SINGLE_WIDE_QUERY = _get_bool_env("NEARBY_SINGLE_WIDE_QUERY", False)
+
+# 検索の多いエリアを、混雑しない時間帯（JSTの時）に先回りして取得しておく
+CELL_CRAWLER_ENABLED = _get_bool_env("CELL_CRAWLER_ENABLED", False)
+CELL_CRAWLER_HOURS = {
+    int(hour)
+    for hour in _get_env("CELL_CRAWLER_HOURS", "9,10,15,16").split(",")
+    if hour.strip()
+}
+# 1回の巡回で使ってよい上流呼び出し数
+# （Nearby / Details / OpenAI / Photo の合計の見積もり）
+CELL_CRAWLER_BUDGET = _get_int_env("CELL_CRAWLER_BUDGET", 200)
+CELL_CRAWLER_TOP_CELLS = _get_int_env("CELL_CRAWLER_TOP_CELLS", 20)
+
+# よく読まれる Details / LLM 付与結果を、期限切れ前に取り直す
+REFRESH_AHEAD_ENABLED = _get_bool_env("REFRESH_AHEAD_ENABLED", True)
+
+# 好み登録ページ（/api/preferences）で保存したとき、
+# 並べ直した直近の検索結果を push で送る
+PREFERENCE_RERANK_PUSH = _get_bool_env("PREFERENCE_RERANK_PUSH", False)
+
+# 「今すぐ検索」「ラーメン」を受けた時点で、前回の検索地点で先回りして検索する
+SPECULATIVE_SEARCH_ENABLED = _get_bool_env("SPECULATIVE_SEARCH_ENABLED", True)
+
+# 写真プロキシのディスクキャッシュ（保存先・全体の上限・1枚あたりの上限）
+PHOTO_CACHE_DIR = _get_env(
+    "PHOTO_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "ramen-bot-photos"),
+)
+PHOTO_CACHE_MAX_BYTES = _get_int_env("PHOTO_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+# これを超える画像はキャッシュしない
+PHOTO_MAX_OBJECT_BYTES = _get_int_env("PHOTO_MAX_OBJECT_BYTES", 5 * 1024 * 1024)
+
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY", "")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
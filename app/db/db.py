@@ -14,7 +14,7 @@ DEFAULT_DB_STATEMENT_TIMEOUT_MS = 8000
 
 def _get_int_env(name: str, default: int) -> int:
     value = os.getenv(name)
-    if value is None:
+    if not value:
         return default
     return int(value)
 
@@ -0,0 +1,124 @@
+from psycopg.types.json import Json
+
+from app.db.db import get_conn
+
+
+def get_catalog_shops(max_age_sec: int) -> list[dict]:
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.execute(
+        """
+        SELECT
+            place_id, name, vicinity, lat, lng, types,
+            rating, rating_count, photo_reference, open_bitmap
+        FROM shop_catalog
+        WHERE last_seen_at > NOW() - make_interval(secs => %s)
+        """,
+        (max_age_sec,),
+    )
+    rows = cur.fetchall()
+
+    cur.close()
+    conn.close()
+
+    return [
+        {
+            "place_id": row[0],
+            "name": row[1],
+            "vicinity": row[2],
+            "lat": row[3],
+            "lng": row[4],
+            "types": row[5] or [],
+            "rating": row[6],
+            "rating_count": row[7],
+            "photo_reference": row[8],
+            "open_bitmap": bytes(row[9]) if row[9] is not None else None,
+        }
+        for row in rows
+    ]
+
+
+def upsert_catalog_shops(shops: list[dict]) -> None:
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.executemany(
+        """
+        INSERT INTO shop_catalog (
+            place_id, name, vicinity, lat, lng, types,
+            rating, rating_count, photo_reference, open_bitmap, last_seen_at
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+        ON CONFLICT (place_id)
+        DO UPDATE SET
+            name = EXCLUDED.name,
+            vicinity = EXCLUDED.vicinity,
+            lat = EXCLUDED.lat,
+            lng = EXCLUDED.lng,
+            types = EXCLUDED.types,
+            rating = EXCLUDED.rating,
+            rating_count = EXCLUDED.rating_count,
+            photo_reference = EXCLUDED.photo_reference,
+            open_bitmap = COALESCE(EXCLUDED.open_bitmap, shop_catalog.open_bitmap),
+            last_seen_at = EXCLUDED.last_seen_at
+        """,
+        [
+            (
+                shop["place_id"],
+                shop.get("name"),
+                shop.get("vicinity"),
+                shop["lat"],
+                shop["lng"],
+                Json(shop.get("types") or []),
+                shop.get("rating"),
+                shop.get("rating_count"),
+                shop.get("photo_reference"),
+                shop.get("open_bitmap"),
+            )
+            for shop in shops
+        ],
+    )
+
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def get_catalog_cells(max_age_sec: int) -> list[tuple[str, float]]:
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.execute(
+        """
+        SELECT cell_key, EXTRACT(EPOCH FROM fetched_at)
+        FROM shop_catalog_cells
+        WHERE fetched_at > NOW() - make_interval(secs => %s)
+        """,
+        (max_age_sec,),
+    )
+    rows = cur.fetchall()
+
+    cur.close()
+    conn.close()
+
+    return [(row[0], float(row[1])) for row in rows]
+
+
+def upsert_catalog_cells(cell_keys: list[str]) -> None:
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.executemany(
+        """
+        INSERT INTO shop_catalog_cells (cell_key, fetched_at)
+        VALUES (%s, NOW())
+        ON CONFLICT (cell_key)
+        DO UPDATE SET fetched_at = EXCLUDED.fetched_at
+        """,
+        [(cell_key,) for cell_key in cell_keys],
+    )
+
+    conn.commit()
+    cur.close()
+    conn.close()
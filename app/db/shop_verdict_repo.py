@@ -0,0 +1,40 @@
+from app.db.db import get_conn
+
+
+def get_non_ramen_place_ids(max_age_sec: int) -> list[tuple[str, float]]:
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.execute(
+        """
+        SELECT place_id, EXTRACT(EPOCH FROM decided_at)
+        FROM non_ramen_verdicts
+        WHERE decided_at > NOW() - make_interval(secs => %s)
+        """,
+        (max_age_sec,),
+    )
+    rows = cur.fetchall()
+
+    cur.close()
+    conn.close()
+
+    return [(row[0], float(row[1])) for row in rows]
+
+
+def upsert_non_ramen_place_ids(place_ids: list[str]) -> None:
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.executemany(
+        """
+        INSERT INTO non_ramen_verdicts (place_id, decided_at)
+        VALUES (%s, NOW())
+        ON CONFLICT (place_id)
+        DO UPDATE SET decided_at = EXCLUDED.decided_at
+        """,
+        [(place_id,) for place_id in place_ids],
+    )
+
+    conn.commit()
+    cur.close()
+    conn.close()
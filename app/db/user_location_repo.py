@@ -0,0 +1,46 @@
+from app.db.db import get_conn
+
+
+def get_last_location(line_user_id: str) -> tuple[float, float] | None:
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.execute(
+        """
+        SELECT lat, lng
+        FROM user_last_locations
+        WHERE line_user_id = %s
+        """,
+        (line_user_id,),
+    )
+    row = cur.fetchone()
+
+    cur.close()
+    conn.close()
+
+    if not row:
+        return None
+
+    return float(row[0]), float(row[1])
+
+
+def upsert_last_location(line_user_id: str, lat: float, lng: float) -> None:
+    conn = get_conn()
+    cur = conn.cursor()
+
+    cur.execute(
+        """
+        INSERT INTO user_last_locations (line_user_id, lat, lng, updated_at)
+        VALUES (%s, %s, %s, NOW())
+        ON CONFLICT (line_user_id)
+        DO UPDATE SET
+            lat = EXCLUDED.lat,
+            lng = EXCLUDED.lng,
+            updated_at = EXCLUDED.updated_at
+        """,
+        (line_user_id, lat, lng),
+    )
+
+    conn.commit()
+    cur.close()
+    conn.close()
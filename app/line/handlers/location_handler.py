@@ -1,28 +1,65 @@
 from datetime import datetime
 
+from app.config import PROGRESSIVE_RESULTS, SEARCH_REPLY_SLO_SEC
 from app.line.messages import (
     build_flex_carousel,
     build_okawari_message,
     build_search_radius_message,
 )
+from app.line.reply_channel import ReplyChannel
 from app.line.state import (
     clear_search_session,
     clear_user_state,
+    get_datetime_search_context,
+    get_search_session,
     get_user_datetime,
+    set_last_search_results,
     set_search_session,
 )
-from app.services.line_client import line_loading, line_reply
-from app.services.ramen_search import search_ramen_items
+from app.services.background_tasks import run_in_background
+from app.services.cell_crawler import record_search_location
+from app.services.deadline import Deadline
+from app.services.line_client import line_loading, line_push, line_reply
+from app.services.photo_prefetch import schedule_photo_warmup
+from app.services.ramen_search import (
+    collect_candidates,
+    more_candidates_stream,
+    rank_candidates,
+    rank_candidates_quickly,
+    search_ramen_items,
+)
+from app.services.speculative_search import (
+    remember_search_location,
+    take_speculative_result,
+)
+
+# 先出しした一覧を、Details/LLM の付与後に並べ直すときの時間予算
+# （push なので reply token に縛られない）
+_REFINE_BUDGET_SEC = 20.0
+# 上位この件数の並びが変わるか、1ページ目の店がこの件数以上入れ替わったら
+# 並べ直した一覧を送る
+_MATERIAL_TOP_N = 3
+_MATERIAL_REPLACED_COUNT = 3
+# 好みを変えたときにその場で並べ直せるよう、
+# 付与済みの候補はこの件数まで受け取って覚えておく
+_MAX_RETAINED_RESULTS = 100
+# 先回り検索の完了を待つのは、間に合わなかったときに通常の検索ができる時間を
+# 残すところまで。通常の検索に切り替えても、先回り検索が取得中の
+# Details / LLM 付与は待ち合わせて使う
+_SPECULATION_WAIT_RESERVE_SEC = 4.0
 
 
 async def handle_location_message(
     user_id: str,
     reply_token: str | None,
     message: dict[str, object],
+    event_timestamp_ms: int | None = None,
 ) -> None:
     if not reply_token:
         return
 
+    deadline = Deadline(SEARCH_REPLY_SLO_SEC)
+    channel = ReplyChannel(user_id, reply_token, event_timestamp_ms)
     lat_value = message.get("latitude")
     lng_value = message.get("longitude")
 
@@ -43,25 +80,70 @@ async def handle_location_message(
 
     lat = float(lat_value)
     lng = float(lng_value)
+    record_search_location(lat, lng)
+    remember_search_location(user_id, lat, lng)
     selected_datetime = get_user_datetime(user_id)
     search_datetime = selected_datetime
 
     await line_loading(user_id)
 
-    items, had_error, has_more, used_radius = await search_ramen_items(
-        lat=lat,
-        lng=lng,
-        line_user_id=user_id,
-        offset=0,
-        page_size=20,
-        search_datetime=search_datetime,
-        prioritize_open_now_status=selected_datetime is None,
-    )
+    # 日時指定は営業時間（Details）が無いと絞れないので、先出しは「今すぐ検索」のみ
+    progressive = PROGRESSIVE_RESULTS and selected_datetime is None
+    candidates: list[dict[str, object]] = []
+
+    # 検索が reply token の期限を越えそうなら先に「検索中」を返し、結果は push で送る
+    async with channel.placeholder_when_slow():
+        # 「ラーメン」と送った時点で前回の地点から始めておいた検索が、
+        # 近い地点のものなら使う
+        speculated = None
+        if selected_datetime is None:
+            speculated = await take_speculative_result(
+                user_id,
+                lat,
+                lng,
+                deadline,
+                reserve=_SPECULATION_WAIT_RESERVE_SEC,
+            )
+
+        if speculated is not None:
+            progressive = False
+            items, had_error, used_radius = speculated
+            items = items[:_MAX_RETAINED_RESULTS]
+            has_more = False
+        elif progressive:
+            candidates, had_error, used_radius = await collect_candidates(
+                lat, lng, deadline
+            )
+            items, has_more = await rank_candidates_quickly(
+                candidates,
+                line_user_id=user_id,
+                offset=0,
+                page_size=_MAX_RETAINED_RESULTS,
+                prioritize_open_now_status=True,
+                deadline=deadline,
+            )
+        else:
+            items, had_error, has_more, used_radius = await search_ramen_items(
+                lat=lat,
+                lng=lng,
+                line_user_id=user_id,
+                offset=0,
+                page_size=_MAX_RETAINED_RESULTS,
+                search_datetime=search_datetime,
+                prioritize_open_now_status=selected_datetime is None,
+                deadline=deadline,
+                # 「同じ時間の別の場所で検索」では、
+                # 前の検索で評価済みの店に上流を呼ばない
+                seen_shops=(
+                    get_datetime_search_context(user_id, selected_datetime)
+                    if selected_datetime
+                    else None
+                ),
+            )
 
     if not items:
         if had_error:
-            await line_reply(
-                reply_token,
+            await channel.send(
                 [
                     {
                         "type": "text",
@@ -70,8 +152,7 @@ async def handle_location_message(
                 ],
             )
         else:
-            await line_reply(
-                reply_token,
+            await channel.send(
                 [
                     {
                         "type": "text",
@@ -95,8 +176,15 @@ async def handle_location_message(
             "text": f"※{timestamp_label}時点の営業情報です。実際の状況と異なる場合があります。",
         }
 
+    set_last_search_results(
+        user_id,
+        items,
+        search_datetime=search_datetime,
+        prioritize_open_now_status=selected_datetime is None,
+    )
     first_page_items = items[:10]
     prefetched_items = items[10:20]
+    has_more = has_more or len(items) > 20
 
     flex = build_flex_carousel(
         first_page_items,
@@ -128,20 +216,118 @@ async def handle_location_message(
             }
         )
         clear_search_session(user_id)
-    elif prefetched_items or has_more:
+    else:
+        # Nearby Search の続きのページは、おかわりで元の候補を出し切ったときに初めて取る
+        more_candidates = more_candidates_stream(
+            lat,
+            lng,
+            used_radius,
+            [str(item.get("place_id")) for item in items],
+        )
+        if prefetched_items or has_more or more_candidates is not None:
+            set_search_session(
+                user_id,
+                lat=lat,
+                lng=lng,
+                next_offset=10,
+                search_datetime=search_datetime,
+                prefetched_items=prefetched_items,
+                has_more_after_prefetch=has_more,
+                more_candidates=more_candidates,
+                results_exhausted=not has_more,
+            )
+            messages.append(build_okawari_message(next_offset=10))
+        else:
+            clear_search_session(user_id)
+
+    schedule_photo_warmup(first_page_items)
+    await channel.send(messages)
+
+    clear_user_state(user_id)
+
+    if progressive:
+        run_in_background(
+            _push_refined_results(
+                user_id,
+                candidates,
+                shown_items=first_page_items,
+                session=get_search_session(user_id),
+            ),
+            name="push_refined_results",
+        )
+
+
+async def _push_refined_results(
+    user_id: str,
+    candidates: list[dict[str, object]],
+    shown_items: list[dict[str, object]],
+    session: dict | None,
+) -> None:
+    """
+    先出しした一覧のあとで Details/LLM を付与して並べ直し、
+    順位が大きく変わったときだけ push する。
+    """
+    items, has_more = await rank_candidates(
+        candidates,
+        line_user_id=user_id,
+        offset=0,
+        page_size=_MAX_RETAINED_RESULTS,
+        prioritize_open_now_status=True,
+        deadline=Deadline(_REFINE_BUDGET_SEC),
+    )
+    if not items:
+        return
+
+    has_more = has_more or len(items) > 20
+    first_page_items = items[:10]
+    if _order_changed_materially(shown_items, first_page_items):
+        schedule_photo_warmup(first_page_items)
+        await line_push(
+            user_id,
+            [
+                {"type": "text", "text": "口コミと好みを反映して並べ直したよ🍜"},
+                build_flex_carousel(first_page_items, show_business_hours=False),
+            ],
+        )
+    else:
+        # 送り直さないときは先出しした1ページ目が残るので、
+        # それに続く形（見せた店を除いた並べ直し後の順）にする
+        refined_by_place_id = {item.get("place_id"): item for item in items}
+        shown_ids = {item.get("place_id") for item in shown_items}
+        items = [
+            refined_by_place_id.get(item.get("place_id"), item) for item in shown_items
+        ] + [item for item in items if item.get("place_id") not in shown_ids]
+
+    set_last_search_results(
+        user_id,
+        items,
+        search_datetime=None,
+        prioritize_open_now_status=True,
+    )
+
+    # まだおかわりされていなければ、2ページ目も見せている1ページ目に続く順に差し替える
+    if session is not None and get_search_session(user_id) is session:
         set_search_session(
             user_id,
-            lat=lat,
-            lng=lng,
+            lat=session["lat"],
+            lng=session["lng"],
             next_offset=10,
-            search_datetime=search_datetime,
-            prefetched_items=prefetched_items,
+            prefetched_items=items[10:20],
             has_more_after_prefetch=has_more,
+            more_candidates=session.get("more_candidates"),
+            results_exhausted=not has_more,
         )
-        messages.append(build_okawari_message(next_offset=10))
-    else:
-        clear_search_session(user_id)
 
-    await line_reply(reply_token, messages)
 
-    clear_user_state(user_id)
+def _order_changed_materially(
+    before: list[dict[str, object]],
+    after: list[dict[str, object]],
+) -> bool:
+    before_ids = [item.get("place_id") for item in before]
+    after_ids = [item.get("place_id") for item in after]
+
+    if before_ids[:_MATERIAL_TOP_N] != after_ids[:_MATERIAL_TOP_N]:
+        return True
+
+    replaced = len(set(after_ids) - set(before_ids))
+    return replaced >= _MATERIAL_REPLACED_COUNT
@@ -1,24 +1,34 @@
+from app.config import SEARCH_REPLY_SLO_SEC
 from app.line.messages import (
     build_flex_carousel,
     build_okawari_message,
     build_preference_choice_flex,
     build_preference_menu_flex,
 )
+from app.line.reply_channel import ReplyChannel
+from app.line.rerank import commit_reranked_results, rerank_last_results
 from app.line.state import clear_search_session, get_search_session, set_search_session
+from app.services.deadline import Deadline
 from app.services.line_client import line_loading, line_reply
+from app.services.photo_prefetch import schedule_photo_warmup
 from app.services.preference_service import (
     PREFERENCE_CATEGORIES,
     get_preference_choice_label,
     get_preference_weights,
     set_preference,
 )
-from app.services.ramen_search import search_ramen_items
+from app.services.ramen_search import (
+    MoreCandidates,
+    rank_more_candidates,
+    search_ramen_items,
+)
 
 
 async def handle_postback(
     user_id: str,
     reply_token: str | None,
     postback: dict[str, object],
+    event_timestamp_ms: int | None = None,
 ) -> None:
     if not reply_token:
         return
@@ -26,6 +36,8 @@ async def handle_postback(
     data = str(postback.get("data", ""))
 
     if data.startswith("ramen:more:"):
+        deadline = Deadline(SEARCH_REPLY_SLO_SEC)
+        channel = ReplyChannel(user_id, reply_token, event_timestamp_ms)
         parts = data.split(":")
         if len(parts) != 3:
             await line_reply(
@@ -48,6 +60,8 @@ async def handle_postback(
         search_datetime = session.get("search_datetime")
         prefetched_items = session.get("prefetched_items")
         has_more_after_prefetch = session.get("has_more_after_prefetch")
+        more_candidates = session.get("more_candidates")
+        results_exhausted = bool(session.get("results_exhausted"))
         if not isinstance(lat, float) or not isinstance(lng, float) or not isinstance(offset, int):
             clear_search_session(user_id)
             await line_reply(
@@ -55,37 +69,103 @@ async def handle_postback(
                 [{"type": "text", "text": "検索状態が切れたので、もう一度現在地を送ってね🙏"}],
             )
             return
-        
+
+        # 前のおかわりが続きのページを取り出している最中なら、重ねて読まない
+        if isinstance(more_candidates, MoreCandidates) and more_candidates.busy:
+            await line_reply(
+                reply_token,
+                [{"type": "text", "text": "続きを探しているところだよ🍜 少し待ってね"}],
+            )
+            return
+
         await line_loading(user_id)
 
         use_prefetched = (
-            offset == 10
-            and isinstance(prefetched_items, list)
-            and len(prefetched_items) > 0
+            isinstance(prefetched_items, list) and len(prefetched_items) > 0
         )
+        leftover_items: list[dict] = []
         if use_prefetched:
-            items = prefetched_items
+            items = prefetched_items[:10]
+            leftover_items = prefetched_items[10:]
             had_error = False
             has_more = bool(has_more_after_prefetch)
+        elif results_exhausted:
+            items = []
+            had_error = False
+            has_more = False
         else:
-            items, had_error, has_more, _used_radius = await search_ramen_items(
+            async with channel.placeholder_when_slow():
+                items, had_error, has_more, _used_radius = await search_ramen_items(
+                    lat=lat,
+                    lng=lng,
+                    line_user_id=user_id,
+                    offset=offset,
+                    page_size=10,
+                    search_datetime=(
+                        search_datetime if isinstance(search_datetime, str) else None
+                    ),
+                    prioritize_open_now_status=not isinstance(search_datetime, str),
+                    deadline=deadline,
+                )
+        results_exhausted = results_exhausted or not has_more
+
+        # 元の候補を出し切ったら、Nearby Search の続きのページを
+        # 足りない分だけ取って並べる
+        needed = 10 - len(items)
+        if (
+            needed > 0
+            and not leftover_items
+            and results_exhausted
+            and more_candidates is not None
+        ):
+            async with channel.placeholder_when_slow():
+                deeper_items, stream_finished = await rank_more_candidates(
+                    more_candidates,
+                    needed=needed,
+                    line_user_id=user_id,
+                    prioritize_open_now_status=True,
+                    deadline=deadline,
+                )
+            if stream_finished:
+                more_candidates = None
+            items = items + deeper_items[:needed]
+            leftover_items = deeper_items[needed:]
+            has_more = False
+
+        if not items and more_candidates is not None:
+            # 締め切りで続きのページを見きれなかっただけなので、
+            # 検索状態は残して再試行してもらう
+            set_search_session(
+                user_id,
                 lat=lat,
                 lng=lng,
-                line_user_id=user_id,
-                offset=offset,
-                page_size=10,
-                search_datetime=search_datetime if isinstance(search_datetime, str) else None,
-                prioritize_open_now_status=not isinstance(search_datetime, str),
+                next_offset=offset,
+                search_datetime=(
+                    search_datetime if isinstance(search_datetime, str) else None
+                ),
+                prefetched_items=[],
+                has_more_after_prefetch=False,
+                more_candidates=more_candidates,
+                results_exhausted=results_exhausted,
             )
+            await channel.send(
+                [
+                    {
+                        "type": "text",
+                        "text": "ちょっと混んでるみたい🙏 もう一度おかわりしてね",
+                    },
+                    build_okawari_message(next_offset=offset),
+                ],
+            )
+            return
+
         if not items:
             if had_error:
-                await line_reply(
-                    reply_token,
+                await channel.send(
                     [{"type": "text", "text": "今ちょっと検索できないみたい🙏"}],
                 )
             else:
-                await line_reply(
-                    reply_token,
+                await channel.send(
                     [{"type": "text", "text": "これ以上の候補は見つからなかったよ🍜"}],
                 )
             clear_search_session(user_id)
@@ -99,19 +179,24 @@ async def handle_postback(
             )
         ]
         next_offset = offset + 10
-        if has_more:
+        if has_more or leftover_items or more_candidates is not None:
             set_search_session(
                 user_id,
                 lat=lat,
                 lng=lng,
                 next_offset=next_offset,
                 search_datetime=search_datetime if isinstance(search_datetime, str) else None,
+                prefetched_items=leftover_items,
+                has_more_after_prefetch=has_more,
+                more_candidates=more_candidates,
+                results_exhausted=results_exhausted,
             )
             messages.append(build_okawari_message(next_offset=next_offset))
         else:
             clear_search_session(user_id)
 
-        await line_reply(reply_token, messages)
+        schedule_photo_warmup(items)
+        await channel.send(messages)
         return
 
     if data == "pref:menu":
@@ -158,17 +243,23 @@ async def handle_postback(
             return
 
         choice_label = get_preference_choice_label(choice)
+        messages: list[dict] = [
+            {
+                "type": "text",
+                "text": f"「{category}」を「{choice_label}」で登録したよ🍜",
+            },
+            build_preference_menu_flex(weights),
+        ]
 
-        await line_reply(
-            reply_token,
-            [
-                {
-                    "type": "text",
-                    "text": f"「{category}」を「{choice_label}」で登録したよ🍜",
-                },
-                build_preference_menu_flex(weights),
-            ],
-        )
+        # 直近の検索結果があれば、上流を呼ばずにその場で並べ直して一緒に返す
+        reranked = rerank_last_results(user_id, weights)
+        if reranked is not None and reranked["carousel"] is not None:
+            messages.append({"type": "text", "text": "新しい好みで並べ直したよ🍜"})
+            messages.append(reranked["carousel"])
+
+        await line_reply(reply_token, messages)
+        if reranked is not None:
+            commit_reranked_results(user_id, reranked)
         return
 
     await line_reply(
@@ -6,7 +6,9 @@ from app.line.state import (
     set_user_datetime,
     set_user_state,
 )
+from app.services.background_tasks import run_in_background
 from app.services.line_client import line_reply
+from app.services.speculative_search import start_speculative_search
 
 
 async def handle_text_message(
@@ -22,6 +24,10 @@ async def handle_text_message(
     if "今すぐ検索" in text:
         clear_user_datetime(user_id)
         set_user_state(user_id, WAITING_LOCATION)
+        # 地点を選んでいる間に、前回の検索地点で検索を始めておく
+        run_in_background(
+            start_speculative_search(user_id), name="start_speculative_search"
+        )
         await line_reply(
             reply_token,
             [
@@ -208,6 +214,9 @@ async def handle_text_message(
     if "ラーメン" in text:
         clear_user_datetime(user_id)
         set_user_state(user_id, WAITING_LOCATION)
+        run_in_background(
+            start_speculative_search(user_id), name="start_speculative_search"
+        )
         await line_reply(
             reply_token,
             [
@@ -2,6 +2,7 @@ import os
 import re
 
 from app.services.preference_service import PREFERENCE_CATEGORIES
+from app.services.static_assets import static_url
 
 
 def _open_label(
@@ -52,8 +53,9 @@ def _photo_url(photo_reference: str | None, maxwidth: int = 600) -> str:
     if photo_reference and base:
         return f"{base}/shops/photo?ref={photo_reference}&maxwidth={maxwidth}"
 
-    if base:
-        return f"{base}/static/no-image.jpg"
+    no_image_url = static_url("no-image.jpg")
+    if no_image_url:
+        return no_image_url
 
     # base が無い = LINEが見に行けるURLが作れないのでプレースホルダー
     return "https://via.placeholder.com/600x338?text=No+Image"
@@ -76,20 +78,17 @@ def _build_rank_badge(rank: int | None) -> dict | None:
     if rank not in (1, 2, 3):
         return None
 
-    base = (os.getenv("PUBLIC_BASE_URL") or "").rstrip("/")
     medal_candidates = {
         1: "gold.png",
         2: "silver.png",
         3: "bronze.png",
     }
 
-    static_dir = os.path.join(os.path.dirname(__file__), "..", "static")
-    static_dir = os.path.abspath(static_dir)
-    selected_file = medal_candidates[rank]
-    if base and os.path.exists(os.path.join(static_dir, selected_file)):
+    medal_url = static_url(medal_candidates[rank])
+    if medal_url:
         return {
             "type": "image",
-            "url": f"{base}/static/{selected_file}",
+            "url": medal_url,
             "size": "30px",
             "aspectRatio": "35:42",
             "aspectMode": "fit",
@@ -575,7 +574,7 @@ def shop_to_bubble(
                     "contents": [
                         {
                             "type": "image",
-                            "url": f"{(os.getenv('PUBLIC_BASE_URL') or '').rstrip('/')}/static/pin.png",
+                            "url": static_url("pin.png") or "/static/pin.png",
                             "size": "16px",
                             "flex": 0,
                         },
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from app.config import LINE_REPLY_TOKEN_TTL_SEC
+from app.services.line_client import LinePushError, line_push, line_reply
+
+logger = logging.getLogger("uvicorn.error")
+
+# 期限ぎりぎりの reply は失敗しやすいので、この秒数を残して push に切り替える
+_REPLY_TOKEN_MARGIN_SEC = 5.0
+
+SEARCHING_PLACEHOLDER_MESSAGES = [
+    {"type": "text", "text": "検索に時間がかかっています…結果はこのあと送るね🍜"}
+]
+
+
+class ReplyChannel:
+    """
+    1イベント分の返信先。
+    reply token の期限（イベント受信からの経過時間）を見て、
+    間に合わなければ push で送る。
+    """
+
+    def __init__(
+        self,
+        user_id: str,
+        reply_token: str | None,
+        event_timestamp_ms: int | None = None,
+    ):
+        self.user_id = user_id
+        self.reply_token = reply_token
+        now = time.time()
+        received_at = (
+            event_timestamp_ms / 1000 if isinstance(event_timestamp_ms, int) else now
+        )
+        # 端末とサーバーの時計ずれで未来の時刻になっていても、受信時刻より後にはしない
+        self._token_expires_at = (
+            time.monotonic() - max(0.0, now - received_at) + LINE_REPLY_TOKEN_TTL_SEC
+        )
+        self._token_used = False
+        self._placeholder_started = False
+
+    def token_remaining(self) -> float:
+        return max(0.0, self._token_expires_at - time.monotonic())
+
+    def can_reply(self) -> bool:
+        return (
+            bool(self.reply_token)
+            and not self._token_used
+            and self.token_remaining() > _REPLY_TOKEN_MARGIN_SEC
+        )
+
+    async def send(self, messages: list[dict]) -> None:
+        if self.can_reply():
+            self._token_used = True
+            try:
+                await line_reply(self.reply_token, messages)
+                return
+            except LinePushError as e:
+                # 期限切れなどで reply が弾かれたときは push で届ける
+                logger.warning(
+                    "line_reply failed, falling back to push user_id=%s: %s",
+                    self.user_id,
+                    e,
+                )
+
+        await line_push(self.user_id, messages)
+
+    @asynccontextmanager
+    async def placeholder_when_slow(
+        self,
+        messages: list[dict] = SEARCHING_PLACEHOLDER_MESSAGES,
+    ) -> AsyncIterator[None]:
+        """
+        ブロック内の処理が reply token の期限に間に合わなさそうなら、
+        期限前に messages を reply しておく（本来の結果は send で push される）。
+        """
+        timer = asyncio.ensure_future(self._reply_placeholder_before_expiry(messages))
+        try:
+            yield
+        finally:
+            if self._placeholder_started:
+                # 送信中に切ると届いたか分からなくなるので、最後まで待つ
+                await asyncio.gather(timer, return_exceptions=True)
+            else:
+                timer.cancel()
+
+    async def _reply_placeholder_before_expiry(self, messages: list[dict]) -> None:
+        await asyncio.sleep(max(0.0, self.token_remaining() - _REPLY_TOKEN_MARGIN_SEC))
+        if not self.reply_token or self._token_used or self.token_remaining() <= 0:
+            return
+
+        self._placeholder_started = True
+        self._token_used = True
+        try:
+            await line_reply(self.reply_token, messages)
+        except Exception as e:
+            logger.warning("placeholder reply failed user_id=%s: %s", self.user_id, e)
@@ -0,0 +1,77 @@
+from app.line.messages import build_flex_carousel
+from app.line.state import (
+    get_last_search_results,
+    get_search_session,
+    set_last_search_results,
+    set_search_session,
+)
+from app.services.ranking import sort_items
+
+
+def rerank_last_results(
+    user_id: str,
+    weights: dict[str, float],
+) -> dict[str, object] | None:
+    """
+    直近の検索で付与済みの候補を、新しい好みで並べ直す（上流は呼ばない）。
+    結果は {"items", "carousel"}。carousel は1ページ目の並びが変わったときだけ入り、
+    変わらなければ None。直近の結果が無ければ None を返す。
+    まだ保存はしないので、届けたら（または並びが変わらなければ）
+    commit_reranked_results を呼ぶ。
+    """
+    results = get_last_search_results(user_id)
+    if results is None:
+        return None
+
+    items = list(results["items"])
+    if not items:
+        return None
+
+    search_datetime = results["search_datetime"]
+    ranked_items = sort_items(
+        items,
+        weights=weights,
+        prioritize_open_now_status=bool(results["prioritize_open_now_status"]),
+    )
+
+    before_ids = [item.get("place_id") for item in items[:10]]
+    after_ids = [item.get("place_id") for item in ranked_items[:10]]
+    carousel = None
+    if before_ids != after_ids:
+        carousel = build_flex_carousel(
+            ranked_items[:10],
+            show_business_hours=search_datetime is not None,
+        )
+    return {"items": ranked_items, "carousel": carousel}
+
+
+def commit_reranked_results(user_id: str, reranked: dict[str, object]) -> None:
+    """
+    並べ直した結果を直近の結果として保存し、まだおかわりしていなければ2ページ目も差し替える。
+    1ページ目を並べ直したまま届けていないときに呼ぶと、おかわりで店が重複・欠落する。
+    """
+    results = get_last_search_results(user_id)
+    if results is None:
+        return
+
+    ranked_items = reranked["items"]
+    set_last_search_results(
+        user_id,
+        ranked_items,
+        results["search_datetime"],
+        bool(results["prioritize_open_now_status"]),
+    )
+
+    session = get_search_session(user_id)
+    if session is not None and session.get("next_offset") == 10:
+        set_search_session(
+            user_id,
+            lat=session["lat"],
+            lng=session["lng"],
+            next_offset=10,
+            search_datetime=session.get("search_datetime"),
+            prefetched_items=ranked_items[10:20],
+            has_more_after_prefetch=bool(session.get("has_more_after_prefetch")),
+            more_candidates=session.get("more_candidates"),
+            results_exhausted=session.get("results_exhausted"),
+        )
@@ -1,9 +1,26 @@
+import time
+from collections import OrderedDict
+
+from app.services.ramen_search import MoreCandidates
+
 WAITING_NONE = "none"
 WAITING_LOCATION = "waiting_location"
 
 _user_states: dict[str, str] = {}
-_user_search_sessions: dict[str, dict[str, float | int | str | bool | list[dict]]] = {}
+SearchSession = dict[str, float | int | str | bool | list[dict] | MoreCandidates]
+
+_user_search_sessions: dict[str, SearchSession] = {}
 _user_datetime_sessions: dict[str, str] = {}
+# 古く使ったユーザーほど先頭（書き込むたびに期限切れと上限超えを先頭から捨てる）
+_user_last_results: OrderedDict[str, dict[str, object]] = OrderedDict()
+_user_datetime_contexts: OrderedDict[str, dict[str, object]] = OrderedDict()
+
+# 直近の検索結果（付与済みの候補）を、好み変更時の並べ直し用に持っておく時間
+LAST_RESULTS_TTL_SEC = 30 * 60
+# 日時指定検索で評価済みの店（Details/LLM 結果）を、同じ日時の別地点検索で使い回す時間
+DATETIME_CONTEXT_TTL_SEC = 30 * 60
+# 上の2つを持っておくユーザー数の上限（戻ってこないユーザーの分を溜め込まない）
+MAX_USERS_WITH_RESULTS = 1000
 
 
 def get_user_state(user_id: str) -> str:
@@ -26,7 +43,14 @@ def set_search_session(
     search_datetime: str | None = None,
     prefetched_items: list[dict] | None = None,
     has_more_after_prefetch: bool | None = None,
+    more_candidates: MoreCandidates | None = None,
+    results_exhausted: bool | None = None,
 ) -> None:
+    """
+    more_candidates は Nearby Search の続きのページ（取り出したときに取得する）。
+    results_exhausted は、元の検索結果をすべて見せ終えたか
+    （以降は続きのページだけを使う）。
+    """
     _user_search_sessions[user_id] = {
         "lat": lat,
         "lng": lng,
@@ -38,9 +62,13 @@ def set_search_session(
         _user_search_sessions[user_id]["prefetched_items"] = prefetched_items
     if has_more_after_prefetch is not None:
         _user_search_sessions[user_id]["has_more_after_prefetch"] = has_more_after_prefetch
+    if more_candidates is not None:
+        _user_search_sessions[user_id]["more_candidates"] = more_candidates
+    if results_exhausted is not None:
+        _user_search_sessions[user_id]["results_exhausted"] = results_exhausted
 
 
-def get_search_session(user_id: str) -> dict[str, float | int | str | bool | list[dict]] | None:
+def get_search_session(user_id: str) -> SearchSession | None:
     return _user_search_sessions.get(user_id)
 
 
@@ -57,4 +85,70 @@ def get_user_datetime(user_id: str) -> str | None:
 
 
 def clear_user_datetime(user_id: str) -> None:
-    _user_datetime_sessions.pop(user_id, None)
\ No newline at end of file
+    _user_datetime_sessions.pop(user_id, None)
+    _user_datetime_contexts.pop(user_id, None)
+
+
+def _touch_user_entry(
+    entries: OrderedDict[str, dict[str, object]],
+    user_id: str,
+    stamp_key: str,
+    ttl_sec: float,
+) -> None:
+    entries.move_to_end(user_id)
+    now = time.time()
+    while entries:
+        _, oldest = next(iter(entries.items()))
+        if (
+            len(entries) <= MAX_USERS_WITH_RESULTS
+            and now - float(oldest[stamp_key]) <= ttl_sec
+        ):
+            break
+        entries.popitem(last=False)
+
+
+def get_datetime_search_context(user_id: str, search_datetime: str) -> dict[str, dict]:
+    """
+    日時指定検索の評価済みの店（place_id -> {"detail", "enrichment"}）を返す。
+    日時が変わったか期限を過ぎたら空から作り直す。返した dict に検索側が書き足す。
+    """
+    now = time.time()
+    context = _user_datetime_contexts.get(user_id)
+    if (
+        context is None
+        or context["search_datetime"] != search_datetime
+        or now - float(context["updated_at"]) > DATETIME_CONTEXT_TTL_SEC
+    ):
+        context = {"search_datetime": search_datetime, "shops": {}}
+        _user_datetime_contexts[user_id] = context
+
+    context["updated_at"] = now
+    _touch_user_entry(
+        _user_datetime_contexts, user_id, "updated_at", DATETIME_CONTEXT_TTL_SEC
+    )
+    return context["shops"]
+
+
+def set_last_search_results(
+    user_id: str,
+    items: list[dict],
+    search_datetime: str | None,
+    prioritize_open_now_status: bool,
+) -> None:
+    _user_last_results[user_id] = {
+        "items": items,
+        "search_datetime": search_datetime,
+        "prioritize_open_now_status": prioritize_open_now_status,
+        "saved_at": time.time(),
+    }
+    _touch_user_entry(_user_last_results, user_id, "saved_at", LAST_RESULTS_TTL_SEC)
+
+
+def get_last_search_results(user_id: str) -> dict[str, object] | None:
+    results = _user_last_results.get(user_id)
+    if results is None:
+        return None
+    if time.time() - float(results["saved_at"]) > LAST_RESULTS_TTL_SEC:
+        _user_last_results.pop(user_id, None)
+        return None
+    return results
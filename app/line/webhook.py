@@ -47,6 +47,7 @@ async def line_webhook(request: Request) -> dict[str, bool]:
                     user_id=user_id,
                     reply_token=reply_token,
                     message=message,
+                    event_timestamp_ms=event.get("timestamp"),
                 )
                 continue
 
@@ -56,6 +57,7 @@ async def line_webhook(request: Request) -> dict[str, bool]:
                 user_id=user_id,
                 reply_token=reply_token,
                 postback=postback,
+                event_timestamp_ms=event.get("timestamp"),
             )
             continue
 
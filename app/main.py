@@ -3,16 +3,44 @@ import math
 import httpx
 import os
 import asyncio
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.concurrency import run_in_threadpool
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 
-from app.config import GOOGLE_PLACES_API_KEY
+from app.config import PREFERENCE_RERANK_PUSH
 from app.db.db import get_conn, get_db_connection_source
 from app.db.user_pref_repo import get_user_weights, upsert_user_weights
+from app.services.adaptive_concurrency import concurrency_limiter_metrics
+from app.services.cell_crawler import cell_crawler_metrics, start_cell_crawler
+from app.services.hedging import hedging_metrics
 from app.services.line_client import line_push
+from app.services.non_ramen_verdicts import load_non_ramen_verdicts
+from app.services.photo_cache import (
+    PHOTO_MAX_OBJECT_BYTES,
+    PhotoCacheWriter,
+    get_cached_photo,
+    load_photo_cache_index,
+)
+from app.services.photo_prefetch import wait_for_photo_warmup
+from app.services.places import (
+    PlacesUpstreamError,
+    close_http_client,
+    open_photo_stream,
+    search_nearby,
+)
+from app.services.rate_limiter import rate_limiter_metrics
+from app.services.refresh_ahead import refresh_ahead_metrics, start_refresh_ahead
+from app.services.shop_catalog import load_shop_catalog
+from app.services.speculative_search import speculative_search_metrics
+from app.services.static_assets import (
+    IMMUTABLE_CACHE_CONTROL,
+    get_static_asset,
+    resolve_fingerprinted_asset,
+)
+from app.line.rerank import commit_reranked_results, rerank_last_results
 from app.line.webhook import router as line_router
 from app.schemas import PreferencesRequest
 
@@ -22,13 +50,100 @@ from dotenv import load_dotenv
 env = os.getenv("ENV", "development")
 load_dotenv(f".env.{env}")
 
-app = FastAPI()
 logger = logging.getLogger("uvicorn.error")
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    try:
+        count = await run_in_threadpool(load_non_ramen_verdicts)
+        logger.info("non-ramen verdicts loaded count=%d", count)
+    except Exception:
+        logger.exception("non-ramen verdicts load failed")
+
+    try:
+        count = await run_in_threadpool(load_shop_catalog)
+        logger.info("shop catalog loaded count=%d", count)
+    except Exception:
+        logger.exception("shop catalog load failed")
+
+    try:
+        count = await run_in_threadpool(load_photo_cache_index)
+        logger.info("photo cache loaded count=%d", count)
+    except Exception:
+        logger.exception("photo cache load failed")
+
+    start_cell_crawler()
+    start_refresh_ahead()
+
+    yield
+
+    await close_http_client()
+
+
+app = FastAPI(lifespan=lifespan)
+
 # =========================
 # Static files
 # =========================
 
+# LIFF ページは URL が固定なので、ETag で再検証させつつ事前 gzip 版を返す
+@app.get("/static/datetime.html")
+async def datetime_page(
+    accept_encoding: str = Header(""),
+    if_none_match: str | None = Header(None),
+):
+    return _static_page_response("datetime.html", accept_encoding, if_none_match)
+
+
+# Flex から参照する画像などは内容ハッシュ付き URL で配信し、永続キャッシュさせる
+@app.get("/assets/{fingerprinted_name}")
+async def fingerprinted_asset(fingerprinted_name: str):
+    asset = resolve_fingerprinted_asset(fingerprinted_name)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    return FileResponse(
+        str(asset["path"]),
+        headers={
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            "ETag": str(asset["etag"]),
+        },
+    )
+
+
+def _static_page_response(
+    filename: str,
+    accept_encoding: str,
+    if_none_match: str | None,
+) -> Response:
+    asset = get_static_asset(filename)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    headers = {
+        "Cache-Control": "no-cache",
+        "ETag": str(asset["etag"]),
+        "Vary": "Accept-Encoding",
+    }
+    if if_none_match and _etag_matches(str(asset["etag"]), if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    gzipped = asset["gzip"]
+    if isinstance(gzipped, bytes) and "gzip" in accept_encoding.lower():
+        return Response(
+            content=gzipped,
+            media_type="text/html; charset=utf-8",
+            headers={**headers, "Content-Encoding": "gzip"},
+        )
+
+    return FileResponse(
+        str(asset["path"]),
+        media_type="text/html; charset=utf-8",
+        headers=headers,
+    )
+
+
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 # =========================
@@ -148,44 +263,118 @@ async def shops_search(
 async def shops_photo(
     ref: str = Query(...),
     maxwidth: int = Query(600, ge=64, le=1600),
+    if_none_match: str | None = Header(None),
 ):
 
-    if not GOOGLE_PLACES_API_KEY:
-        raise HTTPException(
-            status_code=500,
-            detail="GOOGLE_PLACES_API_KEY is empty",
-        )
+    cached = await _lookup_cached_photo(ref, maxwidth)
+
+    if cached is None:
+        # カルーセル返信時に先読み中なら、上流へ二重に取りにいかず完了を待つ
+        await wait_for_photo_warmup(ref, maxwidth)
+        cached = await _lookup_cached_photo(ref, maxwidth)
 
-    url = "https://maps.googleapis.com/maps/api/place/photo"
+    if cached is None:
+        return await _stream_photo_from_upstream(ref, maxwidth)
 
-    params = {
-        "photo_reference": ref,
-        "maxwidth": maxwidth,
-        "key": GOOGLE_PLACES_API_KEY,
+    headers = {
+        "Cache-Control": "public, max-age=86400",
+        "ETag": cached["etag"],
     }
 
-    async with httpx.AsyncClient(
-        follow_redirects=True,
-        timeout=10,
-    ) as client:
+    if if_none_match and _etag_matches(cached["etag"], if_none_match):
+        return Response(status_code=304, headers=headers)
 
-        r = await client.get(url, params=params)
+    # FileResponse はディスクからチャンク単位で送るので、本体をメモリに載せない
+    return FileResponse(
+        cached["path"],
+        media_type=cached["content_type"],
+        headers=headers,
+    )
 
-    if r.status_code != 200 or not r.content:
+
+async def _lookup_cached_photo(ref: str, maxwidth: int) -> dict[str, str] | None:
+    # ディスクキャッシュは高速化のためだけなので、読めなければ上流から配信する
+    try:
+        return await run_in_threadpool(get_cached_photo, ref, maxwidth)
+    except OSError as e:
+        logger.warning("photo cache lookup failed: %s", e)
+        return None
+
+
+async def _stream_photo_from_upstream(ref: str, maxwidth: int) -> StreamingResponse:
+    """
+    キャッシュミス時は上流のチャンクをそのままクライアントへ流しつつ、
+    同じチャンクをディスクキャッシュにも書き込む。
+    """
+    try:
+        upstream = await open_photo_stream(ref, maxwidth)
+    except PlacesUpstreamError as e:
+        logger.error("places config/upstream error: %s", e)
+        raise HTTPException(status_code=500, detail="GOOGLE_PLACES_API_KEY is empty")
+    except httpx.HTTPError as e:
+        logger.warning("photo upstream request failed: %s", e)
         raise HTTPException(status_code=404, detail="Photo not found")
 
-    headers = {"Cache-Control": "public, max-age=86400"}
+    content_length = int(upstream.headers.get("content-length") or 0)
+    if upstream.status_code != 200 or content_length > PHOTO_MAX_OBJECT_BYTES:
+        await upstream.aclose()
+        raise HTTPException(status_code=404, detail="Photo not found")
 
-    return Response(
-        content=r.content,
-        media_type=r.headers.get("content-type", "image/jpeg"),
-        headers=headers,
+    content_type = upstream.headers.get("content-type", "image/jpeg")
+
+    # キャッシュに書けない（保存先が無い・ディスクが一杯など）ときも、写真は返す
+    writer: PhotoCacheWriter | None = None
+    try:
+        writer = await run_in_threadpool(PhotoCacheWriter, ref, maxwidth, content_type)
+    except Exception as e:
+        logger.warning("photo cache writer unavailable: %s", e)
+
+    async def body():
+        nonlocal writer
+        completed = False
+        try:
+            async for chunk in upstream.aiter_bytes():
+                if writer is not None:
+                    try:
+                        await run_in_threadpool(writer.write, chunk)
+                    except Exception as e:
+                        logger.warning("photo cache write failed: %s", e)
+                        await run_in_threadpool(writer.abort)
+                        writer = None
+                yield chunk
+            completed = True
+        finally:
+            await upstream.aclose()
+            if writer is not None:
+                if completed:
+                    await run_in_threadpool(writer.commit)
+                else:
+                    await run_in_threadpool(writer.abort)
+
+    return StreamingResponse(
+        body(),
+        media_type=content_type,
+        headers={"Cache-Control": "public, max-age=86400"},
     )
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return etag in {
+        tag.strip().removeprefix("W/")
+        for tag in if_none_match.split(",")
+    }
+
+
 ##LIFF
 
 @app.get("/preferences")
-async def preferences_page():
-    return FileResponse("app/static/preferences.html")
+async def preferences_page(
+    accept_encoding: str = Header(""),
+    if_none_match: str | None = Header(None),
+):
+    return _static_page_response("preferences.html", accept_encoding, if_none_match)
 
 ##好み登録API
 
@@ -223,6 +412,25 @@ async def save_preferences(req: PreferencesRequest):
             detail=f"DB save failed (source={source}). Check DB env vars.",
         ) from last_error
     logger.info("save_preferences succeeded user_id=%s", req.user_id[:8])
+
+    # 直近の検索結果を新しい好みで並べ直す（上流は呼ばない）。
+    # 並びが変わったときだけ push。
+    # 1ページ目を届けられないときは、おかわりとずれないよう元の並びのままにする
+    reranked = rerank_last_results(req.user_id, req.weights)
+    if reranked is not None and reranked["carousel"] is None:
+        commit_reranked_results(req.user_id, reranked)
+    elif reranked is not None and PREFERENCE_RERANK_PUSH:
+        try:
+            await line_push(
+                req.user_id,
+                [
+                    {"type": "text", "text": "新しい好みで並べ直したよ🍜"},
+                    reranked["carousel"],
+                ],
+            )
+            commit_reranked_results(req.user_id, reranked)
+        except Exception as e:
+            logger.warning("rerank push failed user_id=%s: %s", req.user_id[:8], e)
     return {
         "ok": True,
         "saved_count": len(req.weights),
@@ -287,6 +495,25 @@ async def debug_push(lat: float, lng: float):
 
         raise HTTPException(status_code=500, detail=str(e))
 
+# =========================
+# Metrics
+# =========================
+
+@app.get("/metrics/upstream")
+async def upstream_metrics() -> JSONResponse:
+    return JSONResponse(
+        content={
+            "rate_limiters": rate_limiter_metrics(),
+            "concurrency_limiters": concurrency_limiter_metrics(),
+            "hedging": hedging_metrics(),
+            "cell_crawler": cell_crawler_metrics(),
+            "refresh_ahead": refresh_ahead_metrics(),
+            "speculative_search": speculative_search_metrics(),
+        },
+        headers={"Cache-Control": "no-store"},
+    )
+
+
 # =========================
 # Render スリープ & ヘルスチェック対策
 # =========================
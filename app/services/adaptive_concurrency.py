@@ -0,0 +1,169 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+
+_limiters: list["AdaptiveConcurrencyLimiter"] = []
+
+# 直近の遅延（約10往復）と平常時の遅延（約100往復）の指数移動平均の重み
+_SHORT_EWMA_ALPHA = 0.2
+_LONG_EWMA_ALPHA = 0.02
+# 平常時の遅延が落ち着くまでは、遅延では絞らない
+_WARMUP_SAMPLES = 10
+
+
+def _is_overload_error(exc: BaseException) -> bool:
+    # キャンセル（締め切り・ヘッジの後始末・裏の処理の打ち切り）は上流の混雑ではない
+    if isinstance(exc, (TimeoutError, httpx.TimeoutException)):
+        return True
+
+    status_code = getattr(exc, "status_code", None)
+    if status_code is None and isinstance(exc, httpx.HTTPStatusError):
+        status_code = exc.response.status_code
+    return isinstance(status_code, int) and (status_code == 429 or status_code >= 500)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    上流ごとにプロセス全体で共有する同時実行数の上限（AIMD）。
+    - 成功して遅延も平常なら、1往復ごとに上限を +1 する
+    - 429/5xx/タイムアウト、または直近の遅延が平常時の latency_tolerance 倍を
+      超えたら上限を backoff 倍にする
+    直近・平常時の遅延はどちらも指数移動平均で、1回ごとの揺れでは絞らない
+    （遅延が続けて伸びたときだけ絞る）。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.7,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._short_latency: float | None = None
+        self._long_latency: float | None = None
+        self._latency_samples = 0
+        self._last_decrease_at = 0.0
+        self._successes = 0
+        self._overloads = 0
+        _limiters.append(self)
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self._acquire()
+        started_at = time.monotonic()
+        try:
+            yield
+        except asyncio.CancelledError:
+            # 途中で打ち切られた呼び出しは、成功にも混雑にも数えない
+            raise
+        except BaseException as e:
+            self._on_sample(
+                time.monotonic() - started_at, overloaded=_is_overload_error(e)
+            )
+            raise
+        else:
+            self._on_sample(time.monotonic() - started_at, overloaded=False)
+        finally:
+            self._release()
+
+    async def _acquire(self) -> None:
+        if not self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 枠を受け取った直後にキャンセルされたら次の人に回す
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _on_sample(self, latency_sec: float, overloaded: bool) -> None:
+        if not overloaded:
+            self._record_latency(latency_sec)
+
+        baseline = self._long_latency
+        too_slow = (
+            baseline is not None
+            and self._short_latency is not None
+            and self._latency_samples >= _WARMUP_SAMPLES
+            and self._short_latency > baseline * self.latency_tolerance
+        )
+        if overloaded or too_slow:
+            self._overloads += 1
+            now = time.monotonic()
+            # 同じ混雑で何度も絞らないよう、減らすのは1往復に1回まで
+            if now - self._last_decrease_at >= (baseline or latency_sec):
+                self._limit = max(self.min_limit, self._limit * self.backoff)
+                self._last_decrease_at = now
+            return
+
+        self._successes += 1
+        self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+        self._wake_waiters()
+
+    def _record_latency(self, latency_sec: float) -> None:
+        self._latency_samples += 1
+        if self._short_latency is None or self._long_latency is None:
+            self._short_latency = latency_sec
+            self._long_latency = latency_sec
+            return
+
+        self._short_latency += _SHORT_EWMA_ALPHA * (latency_sec - self._short_latency)
+        self._long_latency += _LONG_EWMA_ALPHA * (latency_sec - self._long_latency)
+
+    def metrics(self) -> dict[str, object]:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queued": sum(1 for future in self._waiters if not future.done()),
+            "baseline_latency_ms": (
+                round(self._long_latency * 1000, 1)
+                if self._long_latency is not None
+                else None
+            ),
+            "recent_latency_ms": (
+                round(self._short_latency * 1000, 1)
+                if self._short_latency is not None
+                else None
+            ),
+            "successes": self._successes,
+            "overloads": self._overloads,
+        }
+
+
+def concurrency_limiter_metrics() -> dict[str, dict[str, object]]:
+    return {limiter.name: limiter.metrics() for limiter in _limiters}
@@ -2,7 +2,12 @@ from typing import TypedDict
 
 from openai import AsyncOpenAI
 
+from app.services.adaptive_concurrency import AdaptiveConcurrencyLimiter
+
 client = AsyncOpenAI()
+_openai_concurrency = AdaptiveConcurrencyLimiter(
+    "openai", initial_limit=8, max_limit=64
+)
 
 
 ALLOWED_CATEGORIES = {
@@ -39,6 +44,14 @@ def _canonicalize_category(raw: str) -> str:
     return CATEGORY_ALIASES.get(raw.strip(), raw.strip())
 
 
+async def _create_response(prompt: str):
+    async with _openai_concurrency.slot():
+        return await client.responses.create(
+            model="gpt-4o-mini",
+            input=prompt,
+        )
+
+
 async def summarize_reviews_30(reviews: list[ReviewItem]) -> str | None:
     texts = [
         r["text"].strip()
@@ -57,10 +70,7 @@ async def summarize_reviews_30(reviews: list[ReviewItem]) -> str | None:
         + "\n".join(f"- {t}" for t in texts)
     )
 
-    resp = await client.responses.create(
-        model="gpt-4o-mini",
-        input=prompt,
-    )
+    resp = await _create_response(prompt)
 
     summary = (resp.output_text or "").strip()
     return summary or None
@@ -91,10 +101,7 @@ async def extract_ramen_categories(
         f"{source_text}"
     )
 
-    resp = await client.responses.create(
-        model="gpt-4o-mini",
-        input=prompt,
-    )
+    resp = await _create_response(prompt)
 
     result = (resp.output_text or "").strip()
     if not result:
@@ -136,10 +143,7 @@ async def extract_ramen_category_mentions(
     prompt_lines.extend(f"{source_id}: {text}" for source_id, text in sources)
     prompt = "\n".join(prompt_lines)
 
-    resp = await client.responses.create(
-        model="gpt-4o-mini",
-        input=prompt,
-    )
+    resp = await _create_response(prompt)
 
     output = (resp.output_text or "").strip()
     if not output:
@@ -0,0 +1,25 @@
+import asyncio
+import logging
+from typing import Coroutine
+
+logger = logging.getLogger("uvicorn.error")
+
+# 実行中のタスクへの参照を保持しておかないと、GCで途中破棄されることがある
+_background_tasks: set[asyncio.Task] = set()
+
+
+def run_in_background(coro: Coroutine, name: str | None = None) -> asyncio.Task:
+    task = asyncio.create_task(coro, name=name)
+    _background_tasks.add(task)
+    task.add_done_callback(_on_done)
+    return task
+
+
+def _on_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if task.cancelled():
+        return
+
+    exc = task.exception()
+    if exc is not None:
+        logger.warning("background task failed name=%s: %s", task.get_name(), exc)
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from app.config import (
+    CELL_CRAWLER_BUDGET,
+    CELL_CRAWLER_ENABLED,
+    CELL_CRAWLER_HOURS,
+    CELL_CRAWLER_TOP_CELLS,
+)
+from app.services.background_tasks import run_in_background
+from app.services.deadline import Deadline
+from app.services.photo_cache import has_cached_photo
+from app.services.photo_prefetch import schedule_photo_warmup
+from app.services.places_cache import get_cached_details, get_cached_enrichment
+from app.services.ramen_search import collect_candidates, rank_candidates
+from app.services.rate_limiter import PRIORITY_BACKGROUND, upstream_priority
+
+logger = logging.getLogger("uvicorn.error")
+
+# 検索密度を数えるセル（約1.1km四方。最初の検索半径 1000m と同じくらい）
+_CELL_DEG = 0.01
+# 古い検索ほど軽く数える（半減期）
+_DENSITY_HALF_LIFE_SEC = 3 * 24 * 60 * 60
+_RUN_INTERVAL_SEC = 30 * 60
+# 1セルあたりの付与処理の時間予算（先回りなので返信の締め切りとは別）
+_CELL_BUDGET_SEC = 60.0
+_WARM_PAGE_SIZE = 20
+_PHOTO_WARM_COUNT = 10
+_PHOTO_MAXWIDTH = 600
+_JST = ZoneInfo("Asia/Tokyo")
+
+# セル -> (減衰込みの検索回数, 最後に更新した時刻)
+_search_density: dict[tuple[int, int], tuple[float, float]] = {}
+_last_run: dict[str, object] = {}
+
+
+def _cell_of(lat: float, lng: float) -> tuple[int, int]:
+    return math.floor(lat / _CELL_DEG), math.floor(lng / _CELL_DEG)
+
+
+def _cell_center(cell: tuple[int, int]) -> tuple[float, float]:
+    return (cell[0] + 0.5) * _CELL_DEG, (cell[1] + 0.5) * _CELL_DEG
+
+
+def _decayed(score: float, updated_at: float, now: float) -> float:
+    return score * 0.5 ** ((now - updated_at) / _DENSITY_HALF_LIFE_SEC)
+
+
+def record_search_location(lat: float, lng: float) -> None:
+    now = time.time()
+    cell = _cell_of(lat, lng)
+    score, updated_at = _search_density.get(cell, (0.0, now))
+    _search_density[cell] = (_decayed(score, updated_at, now) + 1.0, now)
+
+
+def hottest_cells(limit: int) -> list[tuple[tuple[int, int], float]]:
+    now = time.time()
+    scored = [
+        (cell, _decayed(score, updated_at, now))
+        for cell, (score, updated_at) in _search_density.items()
+    ]
+    scored.sort(key=lambda kv: kv[1], reverse=True)
+    return scored[:limit]
+
+
+def start_cell_crawler() -> None:
+    if not CELL_CRAWLER_ENABLED:
+        return
+    run_in_background(_crawl_loop(), name="cell_crawler")
+
+
+async def _crawl_loop() -> None:
+    while True:
+        await asyncio.sleep(_RUN_INTERVAL_SEC)
+        if datetime.now(_JST).hour not in CELL_CRAWLER_HOURS:
+            continue
+
+        try:
+            await crawl_hot_cells()
+        except Exception:
+            logger.exception("cell crawler run failed")
+
+
+def _estimate_upstream_calls(candidates: list[dict[str, object]]) -> int:
+    """このセルを温めるのに必要な上流呼び出し数（キャッシュ済みの分は数えない）。"""
+    calls = 0
+    for item in candidates:
+        place_id = item.get("place_id")
+        if not isinstance(place_id, str) or not place_id:
+            continue
+        if get_cached_details(place_id) is None:
+            calls += 1
+        if get_cached_enrichment(place_id) is None:
+            calls += 2
+
+    for item in candidates[:_PHOTO_WARM_COUNT]:
+        photo_reference = item.get("photo_reference")
+        if isinstance(photo_reference, str) and photo_reference:
+            if not has_cached_photo(photo_reference, _PHOTO_MAXWIDTH):
+                calls += 1
+    return calls
+
+
+async def crawl_hot_cells(
+    budget: int = CELL_CRAWLER_BUDGET,
+    top_cells: int = CELL_CRAWLER_TOP_CELLS,
+) -> dict[str, object]:
+    """
+    検索の多いセルから順に、Nearby / Details / OpenAI / 写真をキャッシュへ入れておく。
+    上流呼び出しの見積もりが budget を超えるセルの手前で止める。
+    """
+    spent = 0
+    warmed = 0
+    started_at = time.time()
+
+    with upstream_priority(PRIORITY_BACKGROUND):
+        for cell, score in hottest_cells(top_cells):
+            lat, lng = _cell_center(cell)
+            deadline = Deadline(_CELL_BUDGET_SEC)
+
+            # Nearby Search はカタログ/キャッシュで済むことが多いので、
+            # 1セル1回として見積もる
+            spent += 1
+            candidates, _had_error, _used_radius = await collect_candidates(
+                lat, lng, deadline
+            )
+            if not candidates:
+                continue
+
+            cost = _estimate_upstream_calls(candidates)
+            if spent + cost > budget:
+                logger.info(
+                    "cell crawler budget reached cell=%s score=%.1f cost=%d spent=%d",
+                    cell,
+                    score,
+                    cost,
+                    spent,
+                )
+                break
+
+            items, _has_more = await rank_candidates(
+                candidates,
+                page_size=_WARM_PAGE_SIZE,
+                deadline=deadline,
+            )
+            schedule_photo_warmup(items[:_PHOTO_WARM_COUNT], maxwidth=_PHOTO_MAXWIDTH)
+            spent += cost
+            warmed += 1
+
+    _last_run.update(
+        {
+            "started_at": started_at,
+            "warmed_cells": warmed,
+            "upstream_calls": spent,
+            "budget": budget,
+        }
+    )
+    logger.info("cell crawler warmed cells=%d upstream_calls=%d", warmed, spent)
+    return dict(_last_run)
+
+
+def cell_crawler_metrics() -> dict[str, object]:
+    return {
+        "enabled": CELL_CRAWLER_ENABLED,
+        "tracked_cells": len(_search_density),
+        "hottest": [
+            {"cell": f"{cell[0]}:{cell[1]}", "score": round(score, 2)}
+            for cell, score in hottest_cells(5)
+        ],
+        "last_run": dict(_last_run),
+    }
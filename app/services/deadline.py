@@ -0,0 +1,27 @@
+import time
+
+
+class Deadline:
+    """
+    1回の検索リクエストの締め切り（返信までの時間予算）。
+    各段階は残り時間から自分の待ち時間を決め、足りなければ処理を省いて先へ進む。
+    """
+
+    def __init__(self, budget_sec: float, started_at: float | None = None):
+        self.budget_sec = budget_sec
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self._expires_at = self.started_at + budget_sec
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def remaining(self, reserve_sec: float = 0.0) -> float:
+        """後段のために reserve_sec を残したうえで、今の段階が使える秒数。"""
+        return max(0.0, self._expires_at - time.monotonic() - reserve_sec)
+
+    def timeout(self, cap_sec: float, reserve_sec: float = 0.0) -> float:
+        """段階ごとの上限 cap_sec と残り時間の小さい方。"""
+        return min(cap_sec, self.remaining(reserve_sec))
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
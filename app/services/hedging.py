@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+_policies: list["HedgePolicy"] = []
+
+
+class HedgePolicy:
+    """
+    ヘッジリクエスト。呼び出しが直近の p90 遅延を過ぎても返らなければ、
+    同じ呼び出しをもう1本投げて先に成功した方を使う。
+    追加の呼び出しは全体の budget_ratio 以内に抑える。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        enabled: bool = True,
+        budget_ratio: float = 0.05,
+        percentile: float = 0.9,
+        min_samples: int = 20,
+    ):
+        self.name = name
+        self.enabled = enabled
+        self.budget_ratio = budget_ratio
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=200)
+        self._requests = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        _policies.append(self)
+
+    def hedge_delay(self) -> float | None:
+        if not self.enabled or len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+
+    def _budget_allows(self) -> bool:
+        return self._hedges + 1 <= self._requests * self.budget_ratio
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        self._requests += 1
+        started_at = time.monotonic()
+        primary = asyncio.ensure_future(call())
+        tasks = [primary]
+
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                await asyncio.wait(tasks, timeout=delay)
+
+            if not primary.done() and delay is not None and self._budget_allows():
+                self._hedges += 1
+                tasks.append(asyncio.ensure_future(call()))
+
+            winner = await self._first_success(tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        # 負けた方はキャンセルせずに完了させる
+        # （呼び出し済みで、途中で切ると過負荷扱いになるため）
+        for task in tasks:
+            if task is not winner:
+                task.add_done_callback(_consume_result)
+
+        if winner.cancelled() or winner.exception() is not None:
+            return winner.result()
+
+        if winner is not primary:
+            self._hedge_wins += 1
+        self._latencies.append(time.monotonic() - started_at)
+        return winner.result()
+
+    @staticmethod
+    async def _first_success(tasks: list[asyncio.Future]) -> asyncio.Future:
+        pending = set(tasks)
+        while True:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    return task
+            if not pending:
+                # 全部失敗したら先頭の例外をそのまま返す
+                return tasks[0]
+
+    def metrics(self) -> dict[str, object]:
+        delay = self.hedge_delay()
+        return {
+            "enabled": self.enabled,
+            "requests": self._requests,
+            "hedges": self._hedges,
+            "hedge_wins": self._hedge_wins,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+        }
+
+
+def _consume_result(task: asyncio.Future) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+def hedging_metrics() -> dict[str, dict[str, object]]:
+    return {policy.name: policy.metrics() for policy in _policies}
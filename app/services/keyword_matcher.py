@@ -0,0 +1,70 @@
+import re
+import unicodedata
+from typing import Iterable
+
+_KANA_TRANSLATION = str.maketrans(
+    "ァィゥェォャュョッヮー",
+    "ぁぃぅぇぉゃゅょっゎー",
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_keyword_text(text: str) -> str:
+    # 全角英数・半角カナを揃える（「ＰＩＺＺＡ」「ﾗｰﾒﾝ」など）
+    normalized = unicodedata.normalize("NFKC", text).lower()
+    normalized = normalized.translate(_KANA_TRANSLATION)
+    normalized = normalized.replace("メン", "めん")
+    normalized = normalized.replace("ソバ", "そば")
+    normalized = _WHITESPACE_RE.sub("", normalized)
+    return normalized
+
+
+class KeywordMatcher:
+    """
+    キーワード群を import 時に一度だけ正規化し、1本の正規表現にまとめたマッチャー。
+    判定対象のテキストは1回だけ正規化・走査すればよい。
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        originals: dict[str, list[str]] = {}
+        for keyword in keywords:
+            normalized = normalize_keyword_text(keyword)
+            if normalized:
+                originals.setdefault(normalized, []).append(keyword)
+
+        # 長いキーワードを先に並べ、同じ位置では最長一致させる
+        ordered = sorted(originals, key=len, reverse=True)
+        alternation = "|".join(re.escape(keyword) for keyword in ordered)
+
+        self._pattern = re.compile(alternation) if ordered else None
+        self._overlapping_pattern = (
+            re.compile(f"(?=({alternation}))") if ordered else None
+        )
+        # 最長一致で拾ったキーワードに内包される短いキーワードも一致扱いにする
+        self._implied: dict[str, frozenset[str]] = {
+            keyword: frozenset(
+                original
+                for other in ordered
+                if other in keyword
+                for original in originals[other]
+            )
+            for keyword in ordered
+        }
+
+    def contains_any(self, text: str) -> bool:
+        return self.contains_any_normalized(normalize_keyword_text(text))
+
+    def contains_any_normalized(self, normalized_text: str) -> bool:
+        if self._pattern is None:
+            return False
+        return self._pattern.search(normalized_text) is not None
+
+    def find_all(self, text: str) -> set[str]:
+        """text に含まれる元のキーワードをすべて返す。"""
+        if self._overlapping_pattern is None:
+            return set()
+
+        found: set[str] = set()
+        for match in self._overlapping_pattern.finditer(normalize_keyword_text(text)):
+            found.update(self._implied[match.group(1)])
+        return found
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import time
+
+from app.db.shop_verdict_repo import get_non_ramen_place_ids, upsert_non_ramen_place_ids
+from app.services.background_tasks import run_in_background
+
+logger = logging.getLogger("uvicorn.error")
+
+# 店の業態はめったに変わらないので長めに覚えておく
+NON_RAMEN_VERDICT_TTL_SEC = 30 * 24 * 60 * 60
+
+# place_id -> 判定の有効期限（epoch秒）
+_non_ramen_expires_at: dict[str, float] = {}
+
+
+def load_non_ramen_verdicts() -> int:
+    """DBに保存済みの非ラーメン判定をメモリに読み込む（起動時に1回）。"""
+    rows = get_non_ramen_place_ids(NON_RAMEN_VERDICT_TTL_SEC)
+    for place_id, decided_at in rows:
+        _non_ramen_expires_at[place_id] = decided_at + NON_RAMEN_VERDICT_TTL_SEC
+    return len(rows)
+
+
+def is_known_non_ramen(place_id: object) -> bool:
+    if not isinstance(place_id, str) or not place_id:
+        return False
+
+    expires_at = _non_ramen_expires_at.get(place_id)
+    if expires_at is None:
+        return False
+
+    if expires_at < time.time():
+        _non_ramen_expires_at.pop(place_id, None)
+        return False
+
+    return True
+
+
+def record_non_ramen_verdicts(place_ids: list[str]) -> None:
+    """
+    非ラーメン判定をメモリに反映し、DBへの保存はバックグラウンドで行う。
+    保存に失敗してもメモリ上の判定は有効なので、検索は止めない。
+    """
+    new_place_ids = [
+        place_id for place_id in place_ids if not is_known_non_ramen(place_id)
+    ]
+    if not new_place_ids:
+        return
+
+    expires_at = time.time() + NON_RAMEN_VERDICT_TTL_SEC
+    for place_id in new_place_ids:
+        _non_ramen_expires_at[place_id] = expires_at
+
+    run_in_background(
+        _persist_non_ramen_verdicts(new_place_ids),
+        name="persist_non_ramen_verdicts",
+    )
+
+
+async def _persist_non_ramen_verdicts(place_ids: list[str]) -> None:
+    try:
+        await asyncio.to_thread(upsert_non_ramen_place_ids, place_ids)
+    except Exception as e:
+        logger.warning(
+            "persist non-ramen verdicts failed count=%d: %s", len(place_ids), e
+        )
@@ -0,0 +1,156 @@
+import re
+from datetime import datetime
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+_BITMAP_BYTES = MINUTES_PER_WEEK // 8
+
+
+def compile_opening_hours(opening_hours: dict[str, object]) -> dict[str, object]:
+    """
+    Place Details の opening_hours を検索向けに一度だけ前処理する。
+    - open_bitmap: 月曜0:00起点の1週間を1分1bitで表した営業ビットマップ
+    - weekday_hours_text: 曜日ごと（月=0..日=6）の正規化済み営業時間テキスト
+    """
+    return {
+        "open_bitmap": _compile_open_bitmap(opening_hours.get("periods")),
+        "weekday_hours_text": _compile_weekday_hours_text(
+            opening_hours.get("weekday_text")
+        ),
+    }
+
+
+def is_open_at(compiled_hours: dict[str, object], target_dt: datetime) -> bool | None:
+    bitmap = compiled_hours.get("open_bitmap")
+    if not isinstance(bitmap, bytes):
+        return None
+
+    minute = _week_minute(target_dt.weekday(), target_dt.hour * 60 + target_dt.minute)
+    return bool(bitmap[minute >> 3] >> (minute & 7) & 1)
+
+
+def hours_text_for(
+    compiled_hours: dict[str, object],
+    target_dt: datetime,
+) -> str | None:
+    weekday_hours_text = compiled_hours.get("weekday_hours_text")
+    if not isinstance(weekday_hours_text, list):
+        return None
+    return weekday_hours_text[target_dt.weekday()]
+
+
+def _week_minute(python_weekday: int, minute_of_day: int) -> int:
+    return python_weekday * MINUTES_PER_DAY + minute_of_day
+
+
+def _parse_hhmm(value: object) -> int | None:
+    if not isinstance(value, str) or len(value) != 4:
+        return None
+    try:
+        return int(value[:2]) * 60 + int(value[2:])
+    except ValueError:
+        return None
+
+
+def _compile_open_bitmap(periods: object) -> bytes | None:
+    if not isinstance(periods, list) or not periods:
+        return None
+
+    mask = 0
+    for period in periods:
+        if not isinstance(period, dict):
+            continue
+
+        open_info = period.get("open")
+        if not isinstance(open_info, dict):
+            continue
+
+        open_day = open_info.get("day")
+        open_minutes = _parse_hhmm(open_info.get("time"))
+        if not isinstance(open_day, int) or open_minutes is None:
+            continue
+
+        close_info = period.get("close")
+        if isinstance(close_info, dict):
+            close_day = close_info.get("day")
+            close_minutes = _parse_hhmm(close_info.get("time"))
+            if not isinstance(close_day, int) or close_minutes is None:
+                continue
+        else:
+            # closeが無い場合は24時間営業（Googleでは常時営業をこの形で返す）
+            mask = (1 << MINUTES_PER_WEEK) - 1
+            break
+
+        # Google opening_hours.periods day: Sun=0..Sat=6 -> Python weekday: Mon=0..Sun=6
+        start = _week_minute((open_day + 6) % 7, open_minutes)
+        end = _week_minute((close_day + 6) % 7, close_minutes)
+
+        if open_day == close_day and open_minutes < close_minutes:
+            length = end - start
+        else:
+            # 日跨ぎ営業。開店と閉店が同じ時刻なら1週間まるごと営業扱い
+            length = (end - start) % MINUTES_PER_WEEK or MINUTES_PER_WEEK
+
+        span = (1 << length) - 1
+        mask |= span << start
+        # 週末（日曜→月曜）を跨ぐ分は先頭に折り返す
+        mask |= span >> (MINUTES_PER_WEEK - start)
+
+    mask &= (1 << MINUTES_PER_WEEK) - 1
+    return mask.to_bytes(_BITMAP_BYTES, "little")
+
+
+def _compile_weekday_hours_text(weekday_text: object) -> list[str | None] | None:
+    if not isinstance(weekday_text, list) or len(weekday_text) != 7:
+        return None
+    return [_hours_text_from_entry(entry) for entry in weekday_text]
+
+
+def _hours_text_from_entry(entry: object) -> str | None:
+    if not isinstance(entry, str):
+        return None
+
+    if "：" in entry:
+        hours = entry.split("：", 1)[1].strip()
+    elif ":" in entry:
+        hours = entry.split(":", 1)[1].strip()
+    else:
+        hours = entry.strip()
+
+    if not hours:
+        return None
+
+    normalized = normalize_business_hours_text(hours)
+    normalized = re.sub(r"\s*[、,，]\s*", " / ", normalized)
+    normalized = re.sub(r"\s*/\s*", " / ", normalized)
+    return normalized.strip()
+
+
+def normalize_business_hours_text(hours: str) -> str:
+    normalized = hours.replace("～", "〜").replace("~", "〜")
+    normalized = normalized.translate(
+        str.maketrans("０１２３４５６７８９：", "0123456789:")
+    )
+
+    def replace_japanese_time(match: re.Match[str]) -> str:
+        am_pm = match.group(1)
+        hour = int(match.group(2))
+        minute = int(match.group(3) or "0")
+
+        if am_pm == "午前":
+            hour = 0 if hour == 12 else hour
+        elif am_pm == "午後":
+            hour = 12 if hour == 12 else hour + 12
+
+        if hour >= 24 or minute >= 60:
+            return match.group(0)
+
+        return f"{hour:02d}:{minute:02d}"
+
+    normalized = re.sub(
+        r"(午前|午後)?\s*(\d{1,2})\s*(?:[:時]\s*(\d{1,2}))?\s*分?",
+        replace_japanese_time,
+        normalized,
+    )
+    normalized = re.sub(r"\b([01]\d|2[0-3])([0-5]\d)\b", r"\1:\2", normalized)
+    return normalized
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import PHOTO_CACHE_DIR, PHOTO_CACHE_MAX_BYTES, PHOTO_MAX_OBJECT_BYTES
+
+logger = logging.getLogger("uvicorn.error")
+
+# キャッシュ用ディレクトリが使えなかったとき、次に読み直すまでの間隔
+_INDEX_RETRY_SEC = 60.0
+
+_IMAGE_SUFFIX = ".img"
+_META_SUFFIX = ".json"
+
+# key -> ファイルサイズ。末尾ほど最近使われたもの（LRU）
+_index: OrderedDict[str, int] = OrderedDict()
+_index_loaded = False
+_index_failed_at: float | None = None
+_total_bytes = 0
+_lock = threading.Lock()
+
+
+def photo_cache_key(photo_reference: str, maxwidth: int) -> str:
+    return hashlib.sha256(f"{photo_reference}:{maxwidth}".encode()).hexdigest()
+
+
+def _image_path(key: str) -> str:
+    return os.path.join(PHOTO_CACHE_DIR, f"{key}{_IMAGE_SUFFIX}")
+
+
+def _meta_path(key: str) -> str:
+    return os.path.join(PHOTO_CACHE_DIR, f"{key}{_META_SUFFIX}")
+
+
+def load_photo_cache_index() -> int:
+    """
+    ディスク上のキャッシュを走査してLRUインデックスを作る（起動時に1回）。
+    更新時刻が古いものほど先に追い出される。
+    ディレクトリが使えないときは空のまま返し（写真は上流から配信する）、しばらくして読み直す。
+    """
+    global _index_loaded, _index_failed_at, _total_bytes
+
+    with _lock:
+        if _index_loaded:
+            return len(_index)
+        if (
+            _index_failed_at is not None
+            and time.monotonic() - _index_failed_at < _INDEX_RETRY_SEC
+        ):
+            return 0
+
+        try:
+            os.makedirs(PHOTO_CACHE_DIR, exist_ok=True)
+            entries: list[tuple[float, str, int]] = []
+            for entry in os.scandir(PHOTO_CACHE_DIR):
+                if not entry.name.endswith(_IMAGE_SUFFIX):
+                    continue
+                key = entry.name[: -len(_IMAGE_SUFFIX)]
+                if not os.path.exists(_meta_path(key)):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, key, stat.st_size))
+        except OSError as e:
+            _index_failed_at = time.monotonic()
+            logger.warning("photo cache unavailable dir=%s: %s", PHOTO_CACHE_DIR, e)
+            return 0
+
+        for _, key, size in sorted(entries):
+            _index[key] = size
+            _total_bytes += size
+
+        _index_loaded = True
+        _evict_if_oversized()
+        return len(_index)
+
+
+def has_cached_photo(photo_reference: str, maxwidth: int) -> bool:
+    load_photo_cache_index()
+    with _lock:
+        return photo_cache_key(photo_reference, maxwidth) in _index
+
+
+def get_cached_photo(photo_reference: str, maxwidth: int) -> dict[str, str] | None:
+    load_photo_cache_index()
+    key = photo_cache_key(photo_reference, maxwidth)
+
+    with _lock:
+        if key not in _index:
+            return None
+        _index.move_to_end(key)
+
+    try:
+        with open(_meta_path(key), encoding="utf-8") as f:
+            meta = json.load(f)
+        # 再起動後もLRU順を保てるよう、更新時刻を使用時刻として扱う
+        os.utime(_image_path(key))
+    except (OSError, ValueError):
+        _forget(key)
+        return None
+
+    return {
+        "path": _image_path(key),
+        "content_type": meta.get("content_type") or "image/jpeg",
+        "etag": meta.get("etag") or f'"{key}"',
+    }
+
+
+class PhotoCacheWriter:
+    """
+    上流から受け取ったチャンクを一時ファイルに書き込み、完了時にキャッシュへ登録する。
+    max_bytes を超えたらキャッシュへの保存だけを諦める（呼び出し側の転送は続けてよい）。
+    """
+
+    def __init__(self, photo_reference: str, maxwidth: int, content_type: str):
+        load_photo_cache_index()
+        self.key = photo_cache_key(photo_reference, maxwidth)
+        self.content_type = content_type
+        self.size = 0
+        self._hash = hashlib.sha256()
+        fd, self._tmp_path = tempfile.mkstemp(dir=PHOTO_CACHE_DIR, suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+        self._aborted = False
+
+    def write(self, chunk: bytes) -> None:
+        if self._aborted:
+            return
+
+        self.size += len(chunk)
+        if self.size > PHOTO_MAX_OBJECT_BYTES:
+            logger.warning("photo too large to cache key=%s", self.key)
+            self.abort()
+            return
+
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+    def commit(self) -> dict[str, str] | None:
+        if self._aborted:
+            return None
+
+        self._file.close()
+        if self.size == 0:
+            self.abort()
+            return None
+
+        etag = f'"{self._hash.hexdigest()[:32]}"'
+        try:
+            os.replace(self._tmp_path, _image_path(self.key))
+            _atomic_write(
+                _meta_path(self.key),
+                json.dumps({"content_type": self.content_type, "etag": etag}).encode(),
+            )
+        except OSError:
+            self.abort()
+            raise
+        _remember(self.key, self.size)
+
+        return {
+            "path": _image_path(self.key),
+            "content_type": self.content_type,
+            "etag": etag,
+        }
+
+    def abort(self) -> None:
+        if self._aborted:
+            return
+
+        self._aborted = True
+        self._file.close()
+        try:
+            os.unlink(self._tmp_path)
+        except OSError:
+            pass
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=PHOTO_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _remember(key: str, size: int) -> None:
+    global _total_bytes
+
+    with _lock:
+        _total_bytes -= _index.pop(key, 0)
+        _index[key] = size
+        _total_bytes += size
+        _evict_if_oversized()
+
+
+def _forget(key: str) -> None:
+    global _total_bytes
+
+    with _lock:
+        _total_bytes -= _index.pop(key, 0)
+    _remove_files(key)
+
+
+def _evict_if_oversized() -> None:
+    # _lock を保持した状態で呼ぶこと
+    global _total_bytes
+
+    while _total_bytes > PHOTO_CACHE_MAX_BYTES and _index:
+        key, size = _index.popitem(last=False)
+        _total_bytes -= size
+        _remove_files(key)
+
+
+def _remove_files(key: str) -> None:
+    for path in (_image_path(key), _meta_path(key)):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("photo cache remove failed path=%s: %s", path, e)
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+
+from app.services.background_tasks import run_in_background
+from app.services.photo_cache import PhotoCacheWriter, has_cached_photo, photo_cache_key
+from app.services.places import open_photo_stream
+from app.services.rate_limiter import PRIORITY_BACKGROUND, upstream_priority
+
+logger = logging.getLogger("uvicorn.error")
+
+_PHOTO_WARMUP_CONCURRENCY = 3
+_PHOTO_WARMUP_WAIT_SEC = 5.0
+
+_semaphore = asyncio.Semaphore(_PHOTO_WARMUP_CONCURRENCY)
+# キャッシュキー -> 取得中のタスク（同じ写真を二重に取りにいかない）
+_in_flight: dict[str, asyncio.Task] = {}
+
+
+def schedule_photo_warmup(items: list[dict], maxwidth: int = 600) -> None:
+    """
+    これから返信するカルーセルの写真を、LINEが取りに来る前にキャッシュへ入れておく。
+    """
+    for item in items:
+        photo_reference = item.get("photo_reference")
+        if not isinstance(photo_reference, str) or not photo_reference:
+            continue
+
+        key = photo_cache_key(photo_reference, maxwidth)
+        if key in _in_flight or has_cached_photo(photo_reference, maxwidth):
+            continue
+
+        task = run_in_background(
+            _warm_photo(photo_reference, maxwidth),
+            name="photo_warmup",
+        )
+        _in_flight[key] = task
+        task.add_done_callback(lambda _task, key=key: _in_flight.pop(key, None))
+
+
+async def wait_for_photo_warmup(photo_reference: str, maxwidth: int) -> None:
+    """取得中のウォームアップがあれば、完了まで（最大数秒）待つ。"""
+    task = _in_flight.get(photo_cache_key(photo_reference, maxwidth))
+    if task is None:
+        return
+
+    try:
+        await asyncio.wait_for(asyncio.shield(task), timeout=_PHOTO_WARMUP_WAIT_SEC)
+    except Exception:
+        pass
+
+
+async def _warm_photo(photo_reference: str, maxwidth: int) -> None:
+    with upstream_priority(PRIORITY_BACKGROUND):
+        await _fetch_photo_into_cache(photo_reference, maxwidth)
+
+
+async def _fetch_photo_into_cache(photo_reference: str, maxwidth: int) -> None:
+    async with _semaphore:
+        if has_cached_photo(photo_reference, maxwidth):
+            return
+
+        upstream = await open_photo_stream(photo_reference, maxwidth)
+        try:
+            if upstream.status_code != 200:
+                logger.warning(
+                    "photo warmup skipped status=%s ref=%s",
+                    upstream.status_code,
+                    photo_reference[:16],
+                )
+                return
+
+            writer = await asyncio.to_thread(
+                PhotoCacheWriter,
+                photo_reference,
+                maxwidth,
+                upstream.headers.get("content-type", "image/jpeg"),
+            )
+            try:
+                async for chunk in upstream.aiter_bytes():
+                    await asyncio.to_thread(writer.write, chunk)
+            except BaseException:
+                await asyncio.to_thread(writer.abort)
+                raise
+            await asyncio.to_thread(writer.commit)
+        finally:
+            await upstream.aclose()
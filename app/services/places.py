@@ -1,9 +1,22 @@
+import asyncio
 import math
+import time
+from typing import AsyncIterator
 
 import httpx
-from app.config import GOOGLE_PLACES_API_KEY, GOOGLE_NEARBY_URL
+from app.config import (
+    GOOGLE_NEARBY_URL,
+    GOOGLE_PLACES_API_KEY,
+    PLACES_DETAILS_QPS,
+    PLACES_NEARBY_QPS,
+    PLACES_PHOTO_QPS,
+)
+from app.services.adaptive_concurrency import AdaptiveConcurrencyLimiter
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.rate_limiter import TokenBucketLimiter
 
 GOOGLE_DETAILS_URL = "https://maps.googleapis.com/maps/api/place/details/json"
+GOOGLE_PHOTO_URL = "https://maps.googleapis.com/maps/api/place/photo"
 NON_STORE_KEYWORDS = (
     # 飲食店（ラーメン以外のジャンル）
     "寿司", "すし", "鮨",
@@ -21,6 +34,8 @@ NON_STORE_KEYWORDS = (
     "ピザ", "pizza", "PIZZA",
 )
 
+_NON_STORE_MATCHER = KeywordMatcher(NON_STORE_KEYWORDS)
+
 FOOD_PLACE_TYPES = {
     "restaurant",
     "meal_takeaway",
@@ -42,6 +57,56 @@ class PlacesUpstreamError(Exception):
         super().__init__(f"{status}: {message}")
 
 
+# エンドポイントごとに別の予算を持つ（バーストは1秒あたり上限の2倍まで）
+_nearby_limiter = TokenBucketLimiter(
+    "places_nearby", PLACES_NEARBY_QPS, burst=max(1, int(PLACES_NEARBY_QPS * 2))
+)
+_details_limiter = TokenBucketLimiter(
+    "places_details", PLACES_DETAILS_QPS, burst=max(1, int(PLACES_DETAILS_QPS * 2))
+)
+_photo_limiter = TokenBucketLimiter(
+    "places_photo", PLACES_PHOTO_QPS, burst=max(1, int(PLACES_PHOTO_QPS * 2))
+)
+
+_details_concurrency = AdaptiveConcurrencyLimiter("places_details")
+
+
+# Places API への接続はプロセス内で使い回す（TLSハンドシェイクを毎回しない）
+_http_client: httpx.AsyncClient | None = None
+# 写真は遅い端末へ流し終えるまで接続を持つので、検索用とは別の接続プールにする
+_photo_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _http_client
+
+
+def _get_photo_http_client() -> httpx.AsyncClient:
+    global _photo_http_client
+    if _photo_http_client is None or _photo_http_client.is_closed:
+        _photo_http_client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=30, max_keepalive_connections=10),
+        )
+    return _photo_http_client
+
+
+async def close_http_client() -> None:
+    global _http_client, _photo_http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    if _photo_http_client is not None:
+        await _photo_http_client.aclose()
+        _photo_http_client = None
+
+
 # ==================================================
 # ① 周辺検索（Nearby Search）
 # ==================================================
@@ -58,30 +123,93 @@ async def search_nearby(lat: float, lng: float, q: str, radius: int) -> dict:
         "region": "jp",
     }
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        r = await client.get(GOOGLE_NEARBY_URL, params=params)
+    await _nearby_limiter.acquire()
+    r = await get_http_client().get(GOOGLE_NEARBY_URL, params=params)
+    r.raise_for_status()
+    return r.json()
+
+
+# next_page_token は発行から使えるようになるまで数秒かかる（早すぎると INVALID_REQUEST）
+NEXT_PAGE_TOKEN_DELAY_SEC = 2.0
+_NEXT_PAGE_RETRY_DELAY_SEC = 0.5
+_NEXT_PAGE_MAX_RETRIES = 2
+
+
+async def search_nearby_next_page(page_token: str, wait: bool = True) -> dict:
+    """
+    Nearby Search の次のページ（最大で3ページ目まで）を取得する。
+    wait=True なら、トークンが使えるようになるまで待ってから呼ぶ。
+    """
+    if not GOOGLE_PLACES_API_KEY:
+        raise PlacesUpstreamError("CONFIG_ERROR", "PLACES_API_KEY is missing")
+
+    params = {
+        "pagetoken": page_token,
+        "key": GOOGLE_PLACES_API_KEY,
+        "language": "ja",
+    }
+
+    if wait:
+        await asyncio.sleep(NEXT_PAGE_TOKEN_DELAY_SEC)
+
+    for attempt in range(_NEXT_PAGE_MAX_RETRIES + 1):
+        await _nearby_limiter.acquire()
+        r = await get_http_client().get(GOOGLE_NEARBY_URL, params=params)
         r.raise_for_status()
-        return r.json()
+        result = r.json()
+        if (
+            result.get("status") != "INVALID_REQUEST"
+            or attempt == _NEXT_PAGE_MAX_RETRIES
+        ):
+            return result
+        await asyncio.sleep(_NEXT_PAGE_RETRY_DELAY_SEC)
+
+
+async def iter_nearby_pages(page_token: str, issued_at: float) -> AsyncIterator[dict]:
+    """
+    next_page_token から続きのページを順に返す。
+    各ページは取り出されたときに初めて取得する。
+    issued_at はトークンを受け取った時刻（time.monotonic()）。
+    使えるようになるまでの残りだけ待つ。
+    """
+    while page_token:
+        wait = NEXT_PAGE_TOKEN_DELAY_SEC - (time.monotonic() - issued_at)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        page = await search_nearby_next_page(page_token, wait=False)
+        if page.get("status") != "OK":
+            return
+
+        page_token = page.get("next_page_token")
+        issued_at = time.monotonic()
+        yield page
 
 
 # ==================================================
 # ② 写真取得（Photo API）
 # ==================================================
-async def fetch_photo(photo_reference: str, maxwidth: int = 600) -> httpx.Response:
+async def open_photo_stream(
+    photo_reference: str,
+    maxwidth: int = 600,
+) -> httpx.Response:
+    """
+    Photo API のレスポンスをストリームのまま返す。
+    本体は読み込んでいないので、呼び出し側で aiter_bytes() と aclose() を行うこと。
+    """
     if not GOOGLE_PLACES_API_KEY:
         raise PlacesUpstreamError("CONFIG_ERROR", "PLACES_API_KEY is missing")
 
-    url = "https://maps.googleapis.com/maps/api/place/photo"
     params = {
         "photo_reference": photo_reference,
         "maxwidth": maxwidth,
         "key": GOOGLE_PLACES_API_KEY,
     }
 
-    async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
-        r = await client.get(url, params=params)
-        r.raise_for_status()
-        return r
+    await _photo_limiter.acquire()
+    client = _get_photo_http_client()
+    request = client.build_request("GET", GOOGLE_PHOTO_URL, params=params)
+    return await client.send(request, stream=True, follow_redirects=True)
 
 
 # ==================================================
@@ -98,8 +226,9 @@ async def get_place_reviews(place_id: str) -> dict:
         "key": GOOGLE_PLACES_API_KEY,
     }
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        r = await client.get(GOOGLE_DETAILS_URL, params=params)
+    await _details_limiter.acquire()
+    async with _details_concurrency.slot():
+        r = await get_http_client().get(GOOGLE_DETAILS_URL, params=params)
         r.raise_for_status()
         data = r.json()
 
@@ -133,7 +262,7 @@ def _flat_distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> int:
 
 def _is_ramen_shop_candidate(place: dict) -> bool:
     name = (place.get("name") or "").strip()
-    if any(keyword in name for keyword in NON_STORE_KEYWORDS):
+    if _NON_STORE_MATCHER.contains_any(name):
         return False
 
     types = set(place.get("types") or [])
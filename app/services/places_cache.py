@@ -1,3 +1,4 @@
+import random
 import time
 from typing import Any
 
@@ -5,7 +6,34 @@ from typing import Any
 CACHE_TTL_SEC = 180
 MAX_CACHE_ENTRIES = 200
 
+# Place Details（口コミ・営業時間）は変化がゆるやかなので長めに持つ
+DETAILS_CACHE_TTL_SEC = 6 * 60 * 60
+MAX_DETAILS_CACHE_ENTRIES = 2000
+
+# LLM の付与結果（カテゴリ mention 数・口コミ要約）は Details と同じ寿命で持つ
+ENRICHMENT_CACHE_TTL_SEC = DETAILS_CACHE_TTL_SEC
+MAX_ENRICHMENT_CACHE_ENTRIES = MAX_DETAILS_CACHE_ENTRIES
+
+# 並べ終えた検索結果は、営業中の判定や好みの変化に追従できるよう短めに持つ
+RANKED_CACHE_TTL_SEC = 180
+MAX_RANKED_CACHE_ENTRIES = 500
+
+# 同時に入ったエントリが一斉に切れないよう、寿命を TTL の 90〜100% にばらつかせる
+TTL_JITTER_RATIO = 0.1
+
+# 期限切れの全件掃除は書き込み時にこの間隔でだけ行う（読み出しは該当キーだけ見る）
+PRUNE_INTERVAL_SEC = 60
+
 _places_cache: dict[str, dict[str, Any]] = {}
+_details_cache: dict[str, dict[str, Any]] = {}
+_enrichment_cache: dict[str, dict[str, Any]] = {}
+_ranked_cache: dict[str, dict[str, Any]] = {}
+# 並べ終えた一覧に含まれる店の索引
+# （1店舗を取り直したとき、その店を含む一覧だけ捨てる用）
+_ranked_place_ids: dict[str, set[str]] = {}
+_ranked_keys_by_place: dict[str, set[str]] = {}
+# キャッシュごとの最終掃除時刻（id(cache) -> time.time()）
+_last_pruned_at: dict[int, float] = {}
 
 
 def _cache_key(lat: float, lng: float, q: str, radius: int) -> str:
@@ -13,50 +41,177 @@ def _cache_key(lat: float, lng: float, q: str, radius: int) -> str:
     return f"{round(lat,3)}:{round(lng,3)}:{q}:{radius}"
 
 
-def _prune_expired(now: float) -> None:
+def _prune_expired(cache: dict[str, dict[str, Any]], now: float) -> None:
     expired_keys = [
         key
-        for key, value in _places_cache.items()
-        if now - value["ts"] > CACHE_TTL_SEC
+        for key, value in cache.items()
+        if now > value["expires_at"]
     ]
     for key in expired_keys:
-        _places_cache.pop(key, None)
+        cache.pop(key, None)
 
 
-def _prune_if_oversized() -> None:
-    over = len(_places_cache) - MAX_CACHE_ENTRIES
+def _prune_expired_periodically(
+    cache: dict[str, dict[str, Any]], now: float
+) -> None:
+    if now - _last_pruned_at.get(id(cache), 0.0) < PRUNE_INTERVAL_SEC:
+        return
+    _last_pruned_at[id(cache)] = now
+    _prune_expired(cache, now)
+
+
+def _prune_if_oversized(cache: dict[str, dict[str, Any]], max_entries: int) -> None:
+    over = len(cache) - max_entries
     if over <= 0:
         return
 
     # もっとも古いものから削除
     oldest = sorted(
-        _places_cache.items(),
+        cache.items(),
         key=lambda kv: kv[1]["ts"],
     )[:over]
     for key, _ in oldest:
-        _places_cache.pop(key, None)
+        cache.pop(key, None)
 
 
-def get_cached(lat: float, lng: float, q: str, radius: int) -> dict | None:
+def _get(cache: dict[str, dict[str, Any]], key: str) -> Any | None:
     now = time.time()
-    _prune_expired(now)
-
-    key = _cache_key(lat, lng, q, radius)
-    hit = _places_cache.get(key)
+    hit = cache.get(key)
     if not hit:
         return None
 
-    if now - hit["ts"] > CACHE_TTL_SEC:
-        _places_cache.pop(key, None)
+    if now > hit["expires_at"]:
+        cache.pop(key, None)
         return None
 
+    hit["hits"] += 1
     return hit["data"]
 
 
-def set_cached(lat: float, lng: float, q: str, radius: int, data: dict) -> None:
+def _set(
+    cache: dict[str, dict[str, Any]],
+    ttl_sec: int,
+    max_entries: int,
+    key: str,
+    data: Any,
+) -> None:
     now = time.time()
-    _prune_expired(now)
+    _prune_expired_periodically(cache, now)
+
+    cache[key] = {
+        "ts": now,
+        "expires_at": now + ttl_sec * (1 - random.random() * TTL_JITTER_RATIO),
+        "hits": 0,
+        "data": data,
+    }
+    _prune_if_oversized(cache, max_entries)
 
-    key = _cache_key(lat, lng, q, radius)
-    _places_cache[key] = {"ts": now, "data": data}
-    _prune_if_oversized()
+
+def get_cached(lat: float, lng: float, q: str, radius: int) -> dict | None:
+    return _get(_places_cache, _cache_key(lat, lng, q, radius))
+
+
+def set_cached(lat: float, lng: float, q: str, radius: int, data: dict) -> None:
+    _set(
+        _places_cache,
+        CACHE_TTL_SEC,
+        MAX_CACHE_ENTRIES,
+        _cache_key(lat, lng, q, radius),
+        data,
+    )
+
+
+def get_cached_details(place_id: str) -> dict | None:
+    return _get(_details_cache, place_id)
+
+
+def set_cached_details(place_id: str, data: dict) -> None:
+    _set(
+        _details_cache,
+        DETAILS_CACHE_TTL_SEC,
+        MAX_DETAILS_CACHE_ENTRIES,
+        place_id,
+        data,
+    )
+
+
+def get_cached_enrichment(place_id: str) -> dict | None:
+    return _get(_enrichment_cache, place_id)
+
+
+def set_cached_enrichment(place_id: str, data: dict) -> None:
+    _set(
+        _enrichment_cache,
+        ENRICHMENT_CACHE_TTL_SEC,
+        MAX_ENRICHMENT_CACHE_ENTRIES,
+        place_id,
+        data,
+    )
+
+
+def get_cached_ranked(key: str) -> dict | None:
+    return _get(_ranked_cache, key)
+
+
+def _unindex_ranked(key: str) -> None:
+    for place_id in _ranked_place_ids.pop(key, set()):
+        keys = _ranked_keys_by_place.get(place_id)
+        if keys is None:
+            continue
+        keys.discard(key)
+        if not keys:
+            _ranked_keys_by_place.pop(place_id, None)
+
+
+def set_cached_ranked(key: str, data: dict) -> None:
+    _unindex_ranked(key)
+    _set(
+        _ranked_cache,
+        RANKED_CACHE_TTL_SEC,
+        MAX_RANKED_CACHE_ENTRIES,
+        key,
+        data,
+    )
+
+    place_ids = {
+        str(item["place_id"]) for item in data.get("items", []) if item.get("place_id")
+    }
+    _ranked_place_ids[key] = place_ids
+    for place_id in place_ids:
+        _ranked_keys_by_place.setdefault(place_id, set()).add(key)
+
+    # 期限切れ・溢れで消えた一覧は索引からも外す
+    for stale_key in [k for k in _ranked_place_ids if k not in _ranked_cache]:
+        _unindex_ranked(stale_key)
+
+
+def clear_cached_ranked_for(place_id: str) -> None:
+    """その店を含む並べ終えた一覧だけを捨てる。"""
+    for key in _ranked_keys_by_place.pop(place_id, set()):
+        _ranked_cache.pop(key, None)
+        _unindex_ranked(key)
+
+
+def place_ids_due_for_refresh(
+    min_hits: int,
+    window_sec: float,
+) -> list[tuple[str, bool]]:
+    """
+    期限まで window_sec を切っていて、min_hits 回以上読まれた
+    Details / LLM 付与結果の place_id。
+    (place_id, LLM 付与結果もあるか) を、よく読まれている順に返す。
+    """
+    now = time.time()
+    hits_by_place_id: dict[str, int] = {}
+    for cache in (_details_cache, _enrichment_cache):
+        for place_id, entry in cache.items():
+            if entry["hits"] < min_hits:
+                continue
+            if not now < entry["expires_at"] <= now + window_sec:
+                continue
+            hits_by_place_id[place_id] = max(
+                hits_by_place_id.get(place_id, 0), entry["hits"]
+            )
+
+    ordered = sorted(hits_by_place_id, key=lambda place_id: -hits_by_place_id[place_id])
+    return [(place_id, place_id in _enrichment_cache) for place_id in ordered]
@@ -1,25 +1,100 @@
 import asyncio
+import hashlib
+import json
 import logging
-import re
+import time
 from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable
 
+from app.config import (
+    NEARBY_SINGLE_WIDE_QUERY,
+    PLACES_DETAILS_HEDGING,
+    SEARCH_REPLY_SLO_SEC,
+)
 from app.db.user_pref_repo import get_user_weights
-from app.services.ai_summary import extract_ramen_category_mentions, summarize_reviews_30
+from app.services.ai_summary import (
+    extract_ramen_category_mentions,
+    summarize_reviews_30,
+)
+from app.services.background_tasks import run_in_background
+from app.services.deadline import Deadline
+from app.services.hedging import HedgePolicy
+from app.services.keyword_matcher import KeywordMatcher, normalize_keyword_text
+from app.services.non_ramen_verdicts import (
+    is_known_non_ramen,
+    record_non_ramen_verdicts,
+)
+from app.services.opening_hours import compile_opening_hours, hours_text_for, is_open_at
 from app.services.places import (
+    NEXT_PAGE_TOKEN_DELAY_SEC,
+    _flat_distance_m,
     get_place_reviews,
+    iter_nearby_pages,
     nearby_result_to_items,
     search_nearby,
+    search_nearby_next_page,
+)
+from app.services.places_cache import (
+    clear_cached_ranked_for,
+    get_cached,
+    get_cached_details,
+    get_cached_enrichment,
+    get_cached_ranked,
+    set_cached,
+    set_cached_details,
+    set_cached_enrichment,
+    set_cached_ranked,
 )
-from app.services.places_cache import get_cached, set_cached
 from app.services.ranking import sort_items
+from app.services.rate_limiter import current_upstream_priority
+from app.services.shop_catalog import (
+    query_catalog,
+    record_nearby_items,
+    record_shop_hours,
+)
 
 logger = logging.getLogger("uvicorn.error")
 
-_ENRICH_CONCURRENCY = 4
+_details_hedge = HedgePolicy("places_details", enabled=PLACES_DETAILS_HEDGING)
+_lingering_enrich_tasks = 0
+# place_id -> 取得中の Details / LLM 付与
+# （先回り検索と通常の検索で、同じ店を二重に取りに行かない）
+_details_in_flight: dict[str, "_SharedCall"] = {}
+_enrichment_in_flight: dict[str, "_SharedCall"] = {}
+
+_NEARBY_TIMEOUT_SEC = 10.0
 _PER_ITEM_TIMEOUT_SEC = 8.0
+_LLM_TIMEOUT_SEC = 10.0
 _ENRICH_TOTAL_TIMEOUT_SEC = 12.0
+_WEIGHTS_TIMEOUT_SEC = 1.0
+# 締め切りのうち、ランキング・Flex組み立て・返信のために残しておく時間
+_REPLY_RESERVE_SEC = 1.5
+_AFTER_ENRICH_RESERVE_SEC = _REPLY_RESERVE_SEC + _WEIGHTS_TIMEOUT_SEC
+# 残り時間がこれ未満になったら省く処理
+# （キャッシュに無い半径への拡大 / Details取得 / 要約 / カテゴリ抽出）
+_MIN_BUDGET_TO_WIDEN_SEC = 5.0
+_MIN_BUDGET_FOR_DETAILS_SEC = 1.0
+_MIN_BUDGET_FOR_SUMMARY_SEC = 3.0
+_MIN_BUDGET_FOR_CATEGORIES_SEC = 2.0
+# 締め切り後も裏で完了させる付与処理の上限（件数・追加の待ち時間）
+_MAX_LINGERING_ENRICH_TASKS = 32
+_LINGERING_ENRICH_TIMEOUT_SEC = 30.0
+# 日時指定検索で、営業中の店舗がこの件数（1ページ分）に満たなければ
+# 不足分だけ時間外の店舗もLLM付与する
+_MIN_OPEN_ITEMS_BEFORE_CLOSED_ENRICH = 10
+_NEARBY_KEYWORD = "ラーメン"
 _SEARCH_RADII_M = (1000, 2000, 3000)
+_RANKED_TIME_BUCKET_SEC = 5 * 60
 _MIN_RESULTS_FOR_STOP = 3
+# 3000m の1回の検索から候補にする件数（Nearby Search は最大3ページ・60件）
+_WIDE_QUERY_MAX_ITEMS = 60
+# 返信の締め切りまでに次のページを取るときの、1ページあたりの待ち時間の上限
+_NEXT_PAGE_TIMEOUT_SEC = 1.5
+# 次のページ（トークンの待ち + 取得）のあとに Details を取る時間が残るときだけ取る。
+# 既定の SEARCH_REPLY_SLO_SEC=8 なら、1ページ目が 1 秒以内に返れば2ページ目まで取れる
+_MIN_BUDGET_FOR_NEXT_PAGE_SEC = (
+    NEXT_PAGE_TOKEN_DELAY_SEC + _NEXT_PAGE_TIMEOUT_SEC + _MIN_BUDGET_FOR_DETAILS_SEC
+)
 
 RAMEN_KEYWORDS = (
     "ラーメン",
@@ -59,6 +134,14 @@ NON_RAMEN_TYPES = {
     "bakery",
 }
 
+# Nearby の店名/type だけでこの値以上なら Details を取らずに除外、
+# 以下なら本文チェック不要
+_PRE_DETAILS_EXCLUDE_CONFIDENCE = 0.9
+_PRE_DETAILS_KEEP_CONFIDENCE = 0.1
+
+_RAMEN_MATCHER = KeywordMatcher(RAMEN_KEYWORDS)
+_NON_RAMEN_MATCHER = KeywordMatcher(NON_RAMEN_KEYWORDS)
+
 
 async def search_ramen_items(
     lat: float,
@@ -68,22 +151,164 @@ async def search_ramen_items(
     page_size: int = 10,
     search_datetime: str | None = None,
     prioritize_open_now_status: bool = False,
+    deadline: Deadline | None = None,
+    seen_shops: dict[str, dict] | None = None,
 ) -> tuple[list[dict[str, object]], bool, bool, int | None]:
-    q = "ラーメン"
+    """
+    seen_shops を渡すと、そこにある店の Details/LLM 結果を上流・キャッシュより先に使い、
+    新しく評価した店を書き足す（同じ日時で場所を変えて検索するときのユーザーごとの文脈）。
+    """
+    deadline = deadline or Deadline(SEARCH_REPLY_SLO_SEC)
+    weights = await _load_user_weights(line_user_id, deadline) if line_user_id else {}
+
+    # 同じ場所・同じ好み・同じ時間帯の検索結果は、並べ終えた一覧をそのまま使う
+    result_key = _ranked_result_key(
+        lat, lng, weights, search_datetime, prioritize_open_now_status
+    )
+    cached = get_cached_ranked(result_key)
+    if cached is not None:
+        # キーは約100m四方で丸めているので、距離は今回の地点から測り直す
+        # （並び順は距離を使わないので変わらない）
+        ranked_items = with_distances_from(cached["items"], lat, lng)
+        return (
+            ranked_items[offset:offset + page_size],
+            False,
+            offset + page_size < len(ranked_items),
+            cached["used_radius"],
+        )
+
+    items, had_error, used_radius = await collect_candidates(lat, lng, deadline)
+    if not items:
+        return [], had_error, False, used_radius
+
+    items, complete = await _enrich_and_filter(
+        items, search_datetime, deadline, seen_shops
+    )
+    if not items:
+        return [], had_error, False, used_radius
+
+    ranked_items = sort_items(
+        items,
+        weights=weights,
+        prioritize_open_now_status=prioritize_open_now_status,
+    )
+    # 上流エラーや締め切りで欠けた結果は残さない
+    if complete and not had_error:
+        set_cached_ranked(
+            result_key,
+            {
+                "items": [dict(item) for item in ranked_items],
+                "used_radius": used_radius,
+            },
+        )
+
+    page_items = ranked_items[offset:offset + page_size]
+    has_more = offset + page_size < len(ranked_items)
+    return page_items, had_error, has_more, used_radius
+
+
+def with_distances_from(
+    items: list[dict[str, object]],
+    lat: float,
+    lng: float,
+) -> list[dict[str, object]]:
+    """items をコピーし、distance_m を (lat, lng) からの距離に置き換える。"""
+    moved = [dict(item) for item in items]
+    for item in moved:
+        if item.get("lat") is not None and item.get("lng") is not None:
+            item["distance_m"] = _flat_distance_m(lat, lng, item["lat"], item["lng"])
+    return moved
+
+
+def _ranked_result_key(
+    lat: float,
+    lng: float,
+    weights: dict,
+    search_datetime: str | None,
+    prioritize_open_now_status: bool,
+) -> str:
+    # 好みなし（いちばん多い）は共通のキーにする
+    weights_hash = "-"
+    if weights:
+        weights_json = json.dumps(weights, sort_keys=True, ensure_ascii=False)
+        weights_hash = hashlib.sha1(weights_json.encode("utf-8")).hexdigest()[:16]
+
+    # 今すぐ検索は営業中かどうかが変わるので、時間帯ごとに分ける
+    time_bucket = (
+        search_datetime or f"now:{int(time.time() // _RANKED_TIME_BUCKET_SEC)}"
+    )
+    return (
+        f"{round(lat, 3)}:{round(lng, 3)}:{weights_hash}:{time_bucket}"
+        f":{int(prioritize_open_now_status)}"
+    )
+
+
+async def collect_candidates(
+    lat: float,
+    lng: float,
+    deadline: Deadline,
+) -> tuple[list[dict[str, object]], bool, int | None]:
+    """
+    Nearby Search で候補を集め、Details/LLM を使わずに落とせる店を除いて返す。
+    戻り値は (候補, 上流エラーがあったか, 使った半径)。
+    """
+    q = _NEARBY_KEYWORD
     had_error = False
     items_by_place_id: dict[str, dict[str, object]] = {}
     used_radius: int | None = None
 
     for radius in _SEARCH_RADII_M:
-        used_radius = radius
+        # 店舗カタログで鮮度の保てている範囲なら、Nearby Search を呼ばずに答える
+        catalog_items = query_catalog(lat, lng, radius)
+        if catalog_items is not None:
+            used_radius = radius
+            _merge_candidates(items_by_place_id, catalog_items)
+            if len(items_by_place_id) >= _MIN_RESULTS_FOR_STOP:
+                break
+            continue
+
+        if NEARBY_SINGLE_WIDE_QUERY:
+            # 残りの半径は、3000m の1回の検索を距離で絞って補う
+            wide_had_error, wide_radius = await _collect_from_wide_query(
+                lat,
+                lng,
+                q,
+                deadline,
+                items_by_place_id,
+                from_radius=radius,
+            )
+            had_error = had_error or wide_had_error
+            used_radius = wide_radius or used_radius
+            break
+
         cached = get_cached(lat, lng, q, radius)
 
+        # 締め切りが近いときは、キャッシュに無い半径へは広げずに手元の候補で返す
+        if (
+            not cached
+            and used_radius is not None
+            and deadline.remaining() < _MIN_BUDGET_TO_WIDEN_SEC
+        ):
+            logger.info(
+                "collect_candidates: skip widening to radius=%d remaining=%.2fs",
+                radius,
+                deadline.remaining(),
+            )
+            break
+
+        used_radius = radius
+
+        fetched = False
         try:
             if cached:
                 result = cached
             else:
-                result = await search_nearby(lat=lat, lng=lng, q=q, radius=radius)
+                result = await asyncio.wait_for(
+                    search_nearby(lat=lat, lng=lng, q=q, radius=radius),
+                    timeout=deadline.timeout(_NEARBY_TIMEOUT_SEC, _REPLY_RESERVE_SEC),
+                )
                 set_cached(lat, lng, q, radius, result)
+                fetched = True
         except Exception:
             had_error = True
             if cached:
@@ -97,37 +322,395 @@ async def search_ramen_items(
             user_lng=lng,
             limit=30,
         )
+        if fetched:
+            # 続きのページがある（取り切れていない）範囲は、カタログ上は取得済みにしない
+            record_nearby_items(
+                lat,
+                lng,
+                radius,
+                radius_items,
+                mark_cells=not result.get("next_page_token"),
+            )
 
-        for item in radius_items:
-            place_id_value = item.get("place_id")
-            if isinstance(place_id_value, str) and place_id_value:
-                dedupe_key = place_id_value
-            else:
-                dedupe_key = f"{item.get('name')}:{item.get('lat')}:{item.get('lng')}"
-            items_by_place_id[dedupe_key] = item
+        _merge_candidates(items_by_place_id, radius_items)
 
         if len(items_by_place_id) >= _MIN_RESULTS_FOR_STOP:
             break
 
-    items = list(items_by_place_id.values())
+    # 過去に非ラーメンと判定済みの店や、店名/typeだけで明らかに非ラーメンな店は
+    # Details/LLMを呼ぶ前に落とす
+    items = [
+        item
+        for item in items_by_place_id.values()
+        if not is_known_non_ramen(item.get("place_id"))
+        and not _is_clearly_non_ramen(item)
+    ]
+    return items, had_error, used_radius
+
+
+async def _collect_from_wide_query(
+    lat: float,
+    lng: float,
+    q: str,
+    deadline: Deadline,
+    items_by_place_id: dict[str, dict[str, object]],
+    from_radius: int,
+) -> tuple[bool, int | None]:
+    """
+    Nearby Search を 3000m で1回だけ呼び、from_radius から順に距離で絞った候補を足す。
+    内側の半径に候補が足りず時間に余裕があるときだけ、次のページも取る。
+    戻り値は (上流エラーがあったか, 使った半径)。
+    """
+    wide_radius = _SEARCH_RADII_M[-1]
+    inner_radius = _SEARCH_RADII_M[0]
+    had_error = False
+    fetched = False
+
+    result = get_cached(lat, lng, q, wide_radius)
+    if not result:
+        try:
+            result = await asyncio.wait_for(
+                search_nearby(lat=lat, lng=lng, q=q, radius=wide_radius),
+                timeout=deadline.timeout(_NEARBY_TIMEOUT_SEC, _REPLY_RESERVE_SEC),
+            )
+            fetched = True
+        except Exception:
+            return True, None
+
+    wide_items = nearby_result_to_items(
+        result,
+        user_lat=lat,
+        user_lng=lng,
+        limit=_WIDE_QUERY_MAX_ITEMS,
+    )
+    while (
+        result.get("next_page_token")
+        and _count_within(wide_items, inner_radius) < _MIN_RESULTS_FOR_STOP
+        and deadline.remaining(_AFTER_ENRICH_RESERVE_SEC)
+        >= _MIN_BUDGET_FOR_NEXT_PAGE_SEC
+    ):
+        try:
+            page = await asyncio.wait_for(
+                search_nearby_next_page(result["next_page_token"]),
+                timeout=deadline.timeout(
+                    NEXT_PAGE_TOKEN_DELAY_SEC + _NEXT_PAGE_TIMEOUT_SEC,
+                    _AFTER_ENRICH_RESERVE_SEC + _MIN_BUDGET_FOR_DETAILS_SEC,
+                ),
+            )
+        except Exception:
+            had_error = True
+            break
+
+        result = {
+            "status": page.get("status"),
+            "results": (result.get("results") or []) + (page.get("results") or []),
+            "next_page_token": page.get("next_page_token"),
+        }
+        fetched = True
+        wide_items = nearby_result_to_items(
+            result,
+            user_lat=lat,
+            user_lng=lng,
+            limit=_WIDE_QUERY_MAX_ITEMS,
+        )
+
+    if fetched:
+        set_cached(lat, lng, q, wide_radius, result)
+        # 続きのページが残っている（取り切れていない）範囲は、
+        # カタログ上は取得済みにしない
+        record_nearby_items(
+            lat,
+            lng,
+            wide_radius,
+            wide_items,
+            mark_cells=not result.get("next_page_token"),
+        )
 
+    used_radius: int | None = None
+    merged = dict(items_by_place_id)
+    for radius in _SEARCH_RADII_M:
+        if radius < from_radius:
+            continue
+        used_radius = radius
+        merged = dict(items_by_place_id)
+        _merge_candidates(
+            merged, [item for item in wide_items if item["distance_m"] <= radius]
+        )
+        if len(merged) >= _MIN_RESULTS_FOR_STOP:
+            break
+
+    items_by_place_id.update(merged)
+    return had_error, used_radius
+
+
+def more_candidates_stream(
+    lat: float,
+    lng: float,
+    used_radius: int | None,
+    exclude_place_ids: list[str],
+) -> "MoreCandidates | None":
+    """
+    直前の collect_candidates で使った Nearby Search の続きのページを、
+    候補の束として順に返す。
+    ページは取り出されたときに初めて取得する（おかわりで元の候補を出し切るまで呼ばない）。
+    続きのページが無ければ None。トークンはキャッシュが切れる前のいま取り出しておく。
+    """
+    if used_radius is None:
+        return None
+
+    query_radius = _SEARCH_RADII_M[-1] if NEARBY_SINGLE_WIDE_QUERY else used_radius
+    cached = get_cached(lat, lng, _NEARBY_KEYWORD, query_radius)
+    page_token = (cached or {}).get("next_page_token")
+    if not page_token:
+        return None
+
+    return MoreCandidates(
+        _stream_more_candidates(
+            page_token,
+            time.monotonic(),
+            lat,
+            lng,
+            used_radius,
+            set(exclude_place_ids),
+        )
+    )
+
+
+class MoreCandidates:
+    """
+    Nearby Search の続きのページ（候補の束）を、おかわりのたびに1つずつ取り出す。
+    締め切りで待つのをやめたページも取得は続け、次のおかわりで受け取る。
+    取り出している間は busy で、同じ検索の別のおかわりは受け付けない。
+    """
+
+    def __init__(self, pages: AsyncIterator[list[dict[str, object]]]) -> None:
+        self._pages = pages
+        self._next_page: asyncio.Task | None = None
+        self.busy = False
+
+    async def next_batch(self, timeout: float) -> list[dict[str, object]] | None:
+        """次の束。読み切ったら None、timeout 秒で届かなければ TimeoutError。"""
+        if self._next_page is None:
+            self._next_page = asyncio.ensure_future(_next_page(self._pages))
+            # セッションごと捨てられても、取得の失敗が未回収のまま残らないようにする
+            self._next_page.add_done_callback(
+                lambda task: task.cancelled() or task.exception()
+            )
+
+        done, _ = await asyncio.wait({self._next_page}, timeout=timeout)
+        if not done:
+            raise asyncio.TimeoutError
+
+        task, self._next_page = self._next_page, None
+        return task.result()
+
+
+async def _next_page(
+    pages: AsyncIterator[list[dict[str, object]]],
+) -> list[dict[str, object]] | None:
+    try:
+        return await anext(pages)
+    except StopAsyncIteration:
+        return None
+
+
+async def _stream_more_candidates(
+    page_token: str,
+    issued_at: float,
+    lat: float,
+    lng: float,
+    radius: int,
+    seen_place_ids: set[str],
+) -> AsyncIterator[list[dict[str, object]]]:
+    async for page in iter_nearby_pages(page_token, issued_at):
+        page_items = nearby_result_to_items(page, user_lat=lat, user_lng=lng, limit=30)
+        record_nearby_items(lat, lng, radius, page_items, mark_cells=False)
+
+        candidates = [
+            item
+            for item in page_items
+            if item["distance_m"] <= radius
+            and item.get("place_id") not in seen_place_ids
+            and not is_known_non_ramen(item.get("place_id"))
+            and not _is_clearly_non_ramen(item)
+        ]
+        seen_place_ids.update(str(item.get("place_id")) for item in candidates)
+        yield candidates
+
+
+async def rank_more_candidates(
+    stream: MoreCandidates,
+    needed: int,
+    line_user_id: str | None = None,
+    prioritize_open_now_status: bool = False,
+    deadline: Deadline | None = None,
+) -> tuple[list[dict[str, object]], bool]:
+    """
+    needed 件そろうまで stream から候補の束を取り出し、付与して並べる。
+    戻り値は (並べた候補, stream を最後まで読んだか)。
+    束ごとに並べるので、深いページの店は前のページの店より後ろに並ぶ。
+    """
+    deadline = deadline or Deadline(SEARCH_REPLY_SLO_SEC)
+    ranked_items: list[dict[str, object]] = []
+    if stream.busy:
+        return ranked_items, False
+
+    stream.busy = True
+    try:
+        while len(ranked_items) < needed:
+            # 次のページの取得と付与が締め切りに間に合わないなら、
+            # 続きは次のおかわりで取る
+            if deadline.remaining(_REPLY_RESERVE_SEC) < _MIN_BUDGET_TO_WIDEN_SEC:
+                return ranked_items, False
+
+            try:
+                batch = await stream.next_batch(
+                    timeout=deadline.timeout(
+                        NEXT_PAGE_TOKEN_DELAY_SEC + _NEXT_PAGE_TIMEOUT_SEC,
+                        _AFTER_ENRICH_RESERVE_SEC + _MIN_BUDGET_FOR_DETAILS_SEC,
+                    )
+                )
+            except asyncio.TimeoutError:
+                return ranked_items, False
+            except Exception as e:
+                logger.warning("rank_more_candidates: next page failed: %s", e)
+                return ranked_items, True
+
+            if batch is None:
+                return ranked_items, True
+            if not batch:
+                continue
+
+            page_items, _has_more = await rank_candidates(
+                batch,
+                line_user_id=line_user_id,
+                page_size=len(batch),
+                prioritize_open_now_status=prioritize_open_now_status,
+                deadline=deadline,
+            )
+            ranked_items.extend(page_items)
+    finally:
+        stream.busy = False
+
+    return ranked_items, False
+
+
+def _count_within(items: list[dict[str, object]], radius: int) -> int:
+    return sum(1 for item in items if item["distance_m"] <= radius)
+
+
+def _merge_candidates(
+    items_by_place_id: dict[str, dict[str, object]],
+    radius_items: list[dict[str, object]],
+) -> None:
+    for item in radius_items:
+        place_id_value = item.get("place_id")
+        if isinstance(place_id_value, str) and place_id_value:
+            dedupe_key = place_id_value
+        else:
+            dedupe_key = f"{item.get('name')}:{item.get('lat')}:{item.get('lng')}"
+        items_by_place_id[dedupe_key] = item
+
+
+async def rank_candidates(
+    items: list[dict[str, object]],
+    line_user_id: str | None = None,
+    offset: int = 0,
+    page_size: int = 10,
+    search_datetime: str | None = None,
+    prioritize_open_now_status: bool = False,
+    deadline: Deadline | None = None,
+) -> tuple[list[dict[str, object]], bool]:
+    """
+    候補に Details/LLM の結果を付与し、好みを反映して並べる。
+    戻り値は (ページ分, 続きがあるか)。
+    """
+    deadline = deadline or Deadline(SEARCH_REPLY_SLO_SEC)
+
+    items, _complete = await _enrich_and_filter(items, search_datetime, deadline)
     if not items:
-        return [], had_error, False, used_radius
+        return [], False
+
+    weights = await _load_user_weights(line_user_id, deadline) if line_user_id else {}
+    return _sort_page(items, weights, offset, page_size, prioritize_open_now_status)
+
 
+async def _enrich_and_filter(
+    items: list[dict[str, object]],
+    search_datetime: str | None,
+    deadline: Deadline,
+    seen_shops: dict[str, dict] | None = None,
+) -> tuple[list[dict[str, object]], bool]:
     # NOTE:
     # Preference ranking depends on extracted ramen category mentions.
     # Enrich all candidates before sorting so preference weights are reflected.
-    await enrich_items(items, search_datetime=search_datetime)
+    complete = await enrich_items(
+        items,
+        search_datetime=search_datetime,
+        deadline=deadline,
+        seen_shops=seen_shops,
+    )
+
+    _record_verdicts(items)
 
     items = [item for item in items if not item.get("_exclude_as_non_ramen")]
 
     for item in items:
         item.pop("_exclude_as_non_ramen", None)
+        item.pop("_non_ramen_by_evidence", None)
 
-    if not items:
-        return [], had_error, False, used_radius
+    return items, complete
+
+
+def _record_verdicts(items: list[dict[str, object]]) -> None:
+    # 本文が無いだけで除外した店は覚えない（口コミが付けば判定が変わりうる）
+    record_non_ramen_verdicts([
+        item["place_id"]
+        for item in items
+        if item.get("_exclude_as_non_ramen")
+        and item.get("_non_ramen_by_evidence")
+        and isinstance(item.get("place_id"), str)
+    ])
 
-    weights = get_user_weights(line_user_id) if line_user_id else {}
+
+async def rank_candidates_quickly(
+    items: list[dict[str, object]],
+    line_user_id: str | None = None,
+    offset: int = 0,
+    page_size: int = 10,
+    prioritize_open_now_status: bool = False,
+    deadline: Deadline | None = None,
+) -> tuple[list[dict[str, object]], bool]:
+    """
+    上流を待たずに、Nearby の項目とキャッシュ済みの Details/LLM 結果だけで並べる
+    （先出し用）。
+    渡した items は変更しない。
+    """
+    deadline = deadline or Deadline(SEARCH_REPLY_SLO_SEC)
+
+    quick_items = [dict(item) for item in items]
+    _apply_cached_enrichment(quick_items, None)
+    for item in quick_items:
+        item.pop("_non_ramen_by_evidence", None)
+    quick_items = [
+        item for item in quick_items if not item.pop("_exclude_as_non_ramen", False)
+    ]
+    if not quick_items:
+        return [], False
+
+    weights = await _load_user_weights(line_user_id, deadline) if line_user_id else {}
+    return _sort_page(
+        quick_items, weights, offset, page_size, prioritize_open_now_status
+    )
+
+
+def _sort_page(
+    items: list[dict[str, object]],
+    weights: dict,
+    offset: int,
+    page_size: int,
+    prioritize_open_now_status: bool,
+) -> tuple[list[dict[str, object]], bool]:
     ranked_items = sort_items(
         items,
         weights=weights,
@@ -135,319 +718,642 @@ async def search_ramen_items(
     )
     page_items = ranked_items[offset:offset + page_size]
     has_more = offset + page_size < len(ranked_items)
+    return page_items, has_more
 
-    return page_items, had_error, has_more, used_radius
 
+async def _load_user_weights(line_user_id: str, deadline: Deadline) -> dict:
+    # DB が遅い・落ちているときは好みなしの並びで返す
+    try:
+        return await asyncio.wait_for(
+            asyncio.to_thread(get_user_weights, line_user_id),
+            timeout=deadline.timeout(_WEIGHTS_TIMEOUT_SEC, _REPLY_RESERVE_SEC),
+        )
+    except Exception as e:
+        logger.warning(
+            "get_user_weights skipped line_user_id=%s: %s",
+            line_user_id,
+            e,
+        )
+        return {}
 
-async def _enrich_item(
-    item: dict[str, object],
-    semaphore: asyncio.Semaphore,
-    search_datetime: str | None = None,
-) -> None:
-    place_id_value = item.get("place_id")
-    if not isinstance(place_id_value, str) or not place_id_value:
-        return
 
-    async with semaphore:
-        try:
-            detail = await asyncio.wait_for(
-                get_place_reviews(place_id_value),
-                timeout=_PER_ITEM_TIMEOUT_SEC,
-            )
-        except Exception as e:
-            logger.warning(
-                "get_place_reviews skipped place_id=%s: %s",
-                place_id_value,
-                e,
-            )
-            return
-
-    reviews = detail.get("reviews") or []
-    editorial_summary = detail.get("editorial_summary")
-    opening_hours = detail.get("opening_hours") or {}
+async def refresh_place(place_id: str, refresh_enrichment: bool = True) -> bool:
+    """
+    キャッシュを使わずに Details（と LLM の付与結果）を取り直す。
+    期限切れ前の先回り更新用。
+    取り直しに失敗したときは False を返し、今のキャッシュを期限まで使い続ける。
+    """
+    detail = await _fetch_place_detail(place_id, use_cache=False)
+    if detail is None:
+        return False
 
-    item["_exclude_as_non_ramen"] = _should_exclude_non_ramen_shop(
-        item=item,
-        reviews=reviews,
-        editorial_summary=editorial_summary,
-    )
+    if refresh_enrichment:
+        await _enrich_item_with_llm({"place_id": place_id}, detail, use_cache=False)
 
-    category_task = extract_ramen_category_mentions(editorial_summary, reviews)
-    summary_task = summarize_reviews_30(reviews)
+    # 取り直した内容で並べ直せるよう、この店を含む並べ終えた一覧のキャッシュは捨てる
+    clear_cached_ranked_for(place_id)
+    return True
 
-    categories_result, summary_result = await asyncio.gather(
-        category_task,
-        summary_task,
-        return_exceptions=True,
-    )
 
-    if not isinstance(categories_result, Exception) and categories_result:
-        item["category_mentions"] = categories_result
-    elif isinstance(categories_result, Exception):
-        logger.warning(
-            "extract_ramen_category_mentions skipped place_id=%s: %s",
-            place_id_value,
-            categories_result,
+async def _fetch_place_detail(
+    place_id: str,
+    use_cache: bool = True,
+    seen_shops: dict[str, dict] | None = None,
+) -> dict[str, object] | None:
+    seen = seen_shops.get(place_id) if seen_shops is not None else None
+    if seen is not None and seen.get("detail"):
+        return seen["detail"]
+
+    cached = get_cached_details(place_id) if use_cache else None
+    if cached:
+        _remember_seen(seen_shops, place_id, detail=cached)
+        return cached
+
+    if use_cache:
+        detail = await _join_in_flight(
+            _details_in_flight,
+            place_id,
+            lambda: _fetch_uncached_detail(place_id),
+        )
+    else:
+        detail = await _fetch_uncached_detail(place_id)
+
+    if detail is not None:
+        _remember_seen(seen_shops, place_id, detail=detail)
+    return detail
+
+
+class _SharedCall:
+    """
+    同じ店への取得を複数の検索で待ち合わせる。
+    待ち手が途中で止められても取得は他の待ち手のために続け、最後の待ち手が離れたら止める。
+    """
+
+    def __init__(
+        self,
+        in_flight: dict[str, "_SharedCall"],
+        key: str,
+        call: Awaitable,
+        priority: int,
+        want_summary: bool,
+    ) -> None:
+        self._in_flight = in_flight
+        self._key = key
+        self.priority = priority
+        self.want_summary = want_summary
+        self.waiters = 0
+        # 上流の優先度は、始めたタスクのものを引き継ぐ
+        self.task = asyncio.ensure_future(call)
+        in_flight[key] = self
+        self.task.add_done_callback(lambda _task: self._forget())
+
+    def serves(self, priority: int, want_summary: bool) -> bool:
+        # 同じか高い優先度で、要約も省いていない取得にだけ相乗りする
+        return (
+            not self.task.done()
+            and self.priority <= priority
+            and (self.want_summary or not want_summary)
         )
 
-    if not isinstance(summary_result, Exception) and summary_result:
-        item["review_summary"] = summary_result
-    elif isinstance(summary_result, Exception):
+    async def wait(self) -> Any:
+        self.waiters += 1
+        try:
+            return await asyncio.shield(self.task)
+        finally:
+            self.waiters -= 1
+            if self.waiters == 0 and not self.task.done():
+                self._forget()
+                self.task.cancel()
+
+    def _forget(self) -> None:
+        if self._in_flight.get(self._key) is self:
+            self._in_flight.pop(self._key, None)
+
+
+async def _join_in_flight(
+    in_flight: dict[str, _SharedCall],
+    key: str,
+    start: Callable[[], Awaitable],
+    want_summary: bool = False,
+) -> Any:
+    """
+    同じ key の取得が進行中で条件が合えばそれを待ち、無ければ start() を始めて待つ。
+    """
+    priority = current_upstream_priority()
+    shared = in_flight.get(key)
+    if shared is None or not shared.serves(priority, want_summary):
+        shared = _SharedCall(in_flight, key, start(), priority, want_summary)
+    return await shared.wait()
+
+
+async def _fetch_uncached_detail(place_id: str) -> dict[str, object] | None:
+    # 同時実行数は places 側の適応リミッターがプロセス全体で制御する
+    try:
+        detail = await asyncio.wait_for(
+            _details_hedge.run(lambda: get_place_reviews(place_id)),
+            timeout=_PER_ITEM_TIMEOUT_SEC,
+        )
+    except Exception as e:
         logger.warning(
-            "summarize_reviews_30 skipped place_id=%s: %s",
-            place_id_value,
-            summary_result,
+            "get_place_reviews skipped place_id=%s: %s",
+            place_id,
+            e,
         )
+        return None
 
-    hours_text = _hours_for_date(opening_hours, search_datetime)
-    if hours_text:
-        item["business_hours_text"] = hours_text
+    # 営業時間は取得時に一度だけコンパイルし、以降の判定はビットマップ参照のみにする
+    detail["compiled_hours"] = compile_opening_hours(detail.get("opening_hours") or {})
+    set_cached_details(place_id, detail)
+    record_shop_hours(place_id, detail["compiled_hours"])
+    return detail
 
-    open_at_target = _is_open_at_datetime(opening_hours, search_datetime)
-    if open_at_target is not None:
-        item["open_at_search_time"] = open_at_target
 
+def _remember_seen(
+    seen_shops: dict[str, dict] | None,
+    place_id: str,
+    **values: dict[str, object],
+) -> None:
+    if seen_shops is None:
+        return
+    seen_shops.setdefault(place_id, {}).update(values)
 
-def _hours_for_date(opening_hours: dict[str, object], search_datetime: str | None) -> str | None:
-    if not search_datetime:
-        return None
 
-    weekday_text = opening_hours.get("weekday_text")
-    if not isinstance(weekday_text, list) or len(weekday_text) != 7:
-        return None
+async def _enrich_item(
+    item: dict[str, object],
+    target_dt: datetime | None = None,
+    deadline: Deadline | None = None,
+    seen_shops: dict[str, dict] | None = None,
+) -> bool:
+    detail = await _prepare_item(item, target_dt=target_dt, seen_shops=seen_shops)
+    if detail is None:
+        return False
 
-    try:
-        target_dt = datetime.fromisoformat(search_datetime)
-    except ValueError:
-        return None
+    return await _enrich_item_with_llm(
+        item, detail, deadline=deadline, seen_shops=seen_shops
+    )
 
-    entry = weekday_text[target_dt.weekday()]
-    if not isinstance(entry, str):
-        return None
 
-    if "：" in entry:
-        hours = entry.split("：", 1)[1].strip()
-    elif ":" in entry:
-        hours = entry.split(":", 1)[1].strip()
-    else:
-        hours = entry.strip()
+async def _prepare_item(
+    item: dict[str, object],
+    target_dt: datetime | None = None,
+    seen_shops: dict[str, dict] | None = None,
+) -> dict[str, object] | None:
+    """
+    Place Details を取得し、
+    LLMを使わずに決まる情報（除外判定・営業時間）だけを付与する。
+    """
+    place_id_value = item.get("place_id")
+    if not isinstance(place_id_value, str) or not place_id_value:
+        return None
 
-    if not hours:
+    detail = await _fetch_place_detail(place_id_value, seen_shops=seen_shops)
+    if detail is None:
         return None
 
-    normalized = _normalize_business_hours_text(hours)
-    normalized = re.sub(r"\s*[、,，]\s*", " / ", normalized)
-    normalized = re.sub(r"\s*/\s*", " / ", normalized)
-    return normalized.strip()
+    _apply_detail(item, detail, target_dt)
+    return detail
 
 
-def _normalize_business_hours_text(hours: str) -> str:
-    normalized = hours.replace("～", "〜").replace("~", "〜")
-    normalized = normalized.translate(str.maketrans("０１２３４５６７８９：", "0123456789:"))
+def _apply_detail(
+    item: dict[str, object],
+    detail: dict[str, object],
+    target_dt: datetime | None,
+) -> None:
+    exclude, by_evidence = _should_exclude_non_ramen_shop(
+        item=item,
+        reviews=detail.get("reviews") or [],
+        editorial_summary=detail.get("editorial_summary"),
+    )
+    item["_exclude_as_non_ramen"] = exclude
+    item["_non_ramen_by_evidence"] = by_evidence
 
-    def replace_japanese_time(match: re.Match[str]) -> str:
-        am_pm = match.group(1)
-        hour = int(match.group(2))
-        minute = int(match.group(3) or "0")
+    if target_dt is None:
+        return
 
-        if am_pm == "午前":
-            hour = 0 if hour == 12 else hour
-        elif am_pm == "午後":
-            hour = 12 if hour == 12 else hour + 12
+    compiled_hours = detail.get("compiled_hours") or {}
 
-        if hour >= 24 or minute >= 60:
-            return match.group(0)
+    hours_text = hours_text_for(compiled_hours, target_dt)
+    if hours_text:
+        item["business_hours_text"] = hours_text
 
-        return f"{hour:02d}:{minute:02d}"
+    open_at_target = is_open_at(compiled_hours, target_dt)
+    if open_at_target is not None:
+        item["open_at_search_time"] = open_at_target
 
-    normalized = re.sub(
-        r"(午前|午後)?\s*(\d{1,2})\s*(?:[:時]\s*(\d{1,2}))?\s*分?",
-        replace_japanese_time,
-        normalized,
+
+def _llm_budget(deadline: Deadline | None) -> tuple[bool, bool]:
+    """
+    残り時間から、カテゴリ抽出・口コミ要約をそれぞれ呼ぶかを決める。
+    要約は表示にしか使わないので、ランキングに効くカテゴリ抽出より先に省く。
+    """
+    if deadline is None:
+        return True, True
+
+    remaining = deadline.remaining(_AFTER_ENRICH_RESERVE_SEC)
+    if remaining <= 0:
+        # 検索側はもう待っていない（裏で完了させてキャッシュを埋める処理）ので省かない
+        return True, True
+    return (
+        remaining >= _MIN_BUDGET_FOR_CATEGORIES_SEC,
+        remaining >= _MIN_BUDGET_FOR_SUMMARY_SEC,
     )
-    normalized = re.sub(r"\b([01]\d|2[0-3])([0-5]\d)\b", r"\1:\2", normalized)
-    return normalized
 
 
-def _is_open_at_datetime(opening_hours: dict[str, object], search_datetime: str | None) -> bool | None:
-    if not search_datetime:
-        return None
+async def _skipped() -> None:
+    return None
 
-    periods = opening_hours.get("periods")
-    if not isinstance(periods, list) or not periods:
-        return None
 
-    try:
-        target_dt = datetime.fromisoformat(search_datetime)
-    except ValueError:
-        return None
+async def _enrich_item_with_llm(
+    item: dict[str, object],
+    detail: dict[str, object],
+    deadline: Deadline | None = None,
+    use_cache: bool = True,
+    seen_shops: dict[str, dict] | None = None,
+) -> bool:
+    """付与した結果が完全（LLM を省略・失敗していない）なら True。"""
+    place_id_value = item.get("place_id")
+    if not isinstance(place_id_value, str) or not place_id_value:
+        return False
 
-    # Python weekday: Mon=0..Sun=6
-    # Google opening_hours.periods day: Sun=0..Sat=6
-    target_day = (target_dt.weekday() + 1) % 7
-    target_minutes = target_dt.hour * 60 + target_dt.minute
+    # このユーザーにすでに見せた店は、要約を省いた結果でも取り直さない
+    seen = seen_shops.get(place_id_value) if seen_shops is not None else None
+    if seen is not None and seen.get("enrichment") is not None:
+        _apply_enrichment(item, seen["enrichment"])
+        return True
 
-    for period in periods:
-        if not isinstance(period, dict):
-            continue
+    cached = get_cached_enrichment(place_id_value) if use_cache else None
+    if cached is not None:
+        _apply_enrichment(item, cached)
+        _remember_seen(seen_shops, place_id_value, enrichment=cached)
+        return True
 
-        open_info = period.get("open")
-        if not isinstance(open_info, dict):
-            continue
+    want_categories, want_summary = _llm_budget(deadline)
+    if not want_categories and not want_summary:
+        return False
 
-        open_day = open_info.get("day")
-        open_time = open_info.get("time")
-        if not isinstance(open_day, int) or not isinstance(open_time, str) or len(open_time) != 4:
-            continue
+    def start() -> Awaitable:
+        return _run_llm_enrichment(
+            place_id_value, detail, want_categories, want_summary
+        )
 
-        try:
-            open_minutes = int(open_time[:2]) * 60 + int(open_time[2:])
-        except ValueError:
-            continue
+    if use_cache:
+        enrichment, categories_ok, complete = await _join_in_flight(
+            _enrichment_in_flight,
+            place_id_value,
+            start,
+            want_summary=want_summary,
+        )
+    else:
+        enrichment, categories_ok, complete = await start()
+    _apply_enrichment(item, enrichment)
+    if categories_ok:
+        _remember_seen(seen_shops, place_id_value, enrichment=enrichment)
+    return complete
+
+
+async def _run_llm_enrichment(
+    place_id_value: str,
+    detail: dict[str, object],
+    want_categories: bool,
+    want_summary: bool,
+) -> tuple[dict[str, object], bool, bool]:
+    """(付与結果, カテゴリ抽出ができたか, 完全か) を返し、完全ならキャッシュする。"""
+    reviews = detail.get("reviews") or []
+    editorial_summary = detail.get("editorial_summary")
 
-        close_info = period.get("close")
-        if isinstance(close_info, dict):
-            close_day = close_info.get("day")
-            close_time = close_info.get("time")
-            if not isinstance(close_day, int) or not isinstance(close_time, str) or len(close_time) != 4:
-                continue
-            try:
-                close_minutes = int(close_time[:2]) * 60 + int(close_time[2:])
-            except ValueError:
-                continue
-        else:
-            # closeが無い場合は24時間営業扱い
-            close_day = (open_day + 1) % 7
-            close_minutes = open_minutes
-
-        # 同日内の営業
-        if open_day == close_day and open_minutes < close_minutes:
-            if target_day == open_day and open_minutes <= target_minutes < close_minutes:
-                return True
-            continue
+    category_task = (
+        extract_ramen_category_mentions(editorial_summary, reviews)
+        if want_categories
+        else _skipped()
+    )
+    summary_task = summarize_reviews_30(reviews) if want_summary else _skipped()
 
-        # 日跨ぎ営業（または24時間営業）
-        if target_day == open_day and target_minutes >= open_minutes:
-            return True
-        if target_day == close_day and target_minutes < close_minutes:
-            return True
+    try:
+        categories_result, summary_result = await asyncio.wait_for(
+            asyncio.gather(category_task, summary_task, return_exceptions=True),
+            timeout=_LLM_TIMEOUT_SEC,
+        )
+    except asyncio.TimeoutError as e:
+        categories_result = summary_result = e
 
-        span_day = (open_day + 1) % 7
-        while span_day != close_day:
-            if target_day == span_day:
-                return True
-            span_day = (span_day + 1) % 7
+    if isinstance(categories_result, Exception):
+        logger.warning(
+            "extract_ramen_category_mentions skipped place_id=%s: %s",
+            place_id_value,
+            categories_result,
+        )
 
-    return False
+    if isinstance(summary_result, Exception):
+        logger.warning(
+            "summarize_reviews_30 skipped place_id=%s: %s",
+            place_id_value,
+            summary_result,
+        )
 
+    enrichment = {
+        "category_mentions": (
+            None if isinstance(categories_result, Exception) else categories_result
+        ),
+        "review_summary": (
+            None if isinstance(summary_result, Exception) else summary_result
+        ),
+    }
+    categories_ok = want_categories and not isinstance(categories_result, Exception)
 
-def _contains_any_keyword(text: str, keywords: tuple[str, ...]) -> bool:
-    lowered = _normalize_keyword_text(text)
-    return any(_normalize_keyword_text(keyword) in lowered for keyword in keywords)
+    # 片方でも失敗・省略していたら、次の検索で取り直せるようキャッシュしない
+    complete = (
+        categories_ok
+        and want_summary
+        and not isinstance(summary_result, Exception)
+    )
+    if complete:
+        set_cached_enrichment(place_id_value, enrichment)
+    return enrichment, categories_ok, complete
 
 
-def _normalize_keyword_text(text: str) -> str:
-    normalized = text.lower()
-    normalized = normalized.translate(str.maketrans(
-        "ァィゥェォャュョッヮー",
-        "ぁぃぅぇぉゃゅょっゎー",
-    ))
-    normalized = normalized.replace("メン", "めん")
-    normalized = normalized.replace("ソバ", "そば")
-    normalized = normalized.replace("ｰ", "ー")
-    normalized = re.sub(r"\s+", "", normalized)
-    return normalized
+def _apply_enrichment(item: dict[str, object], enrichment: dict[str, object]) -> None:
+    if enrichment.get("category_mentions"):
+        item["category_mentions"] = enrichment["category_mentions"]
+    if enrichment.get("review_summary"):
+        item["review_summary"] = enrichment["review_summary"]
 
 
-def _has_ramen_signal(text: str) -> bool:
-    return _contains_any_keyword(text, RAMEN_KEYWORDS)
+def _parse_search_datetime(search_datetime: str | None) -> datetime | None:
+    if not search_datetime:
+        return None
+    try:
+        return datetime.fromisoformat(search_datetime)
+    except ValueError:
+        return None
 
 
-def _has_non_ramen_signal(text: str) -> bool:
-    return _contains_any_keyword(text, NON_RAMEN_KEYWORDS)
+def _has_ramen_signal(text: str) -> bool:
+    return _RAMEN_MATCHER.contains_any(text)
 
 
-def _should_exclude_non_ramen_shop(
-    item: dict[str, object],
-    reviews: list[dict[str, object]],
-    editorial_summary: str | None,
-) -> bool:
+def _nearby_non_ramen_confidence(item: dict[str, object]) -> float:
+    """
+    Nearby Search の項目（店名・type）だけで見た「非ラーメン店らしさ」。
+    1.0 に近いほど非ラーメン、0.0 に近いほどラーメン店と判断できる。
+    """
     name = (item.get("name") or "") if isinstance(item.get("name"), str) else ""
     types = {
         t.lower()
         for t in (item.get("types") or [])
         if isinstance(t, str)
     }
-    summary = editorial_summary or ""
-
-    review_texts = [
-        text
-        for review in reviews
-        for text in [review.get("text")]
-        if isinstance(text, str) and text.strip()
-    ]
-    menu_texts = [
-        t
-        for t in [item.get("menu_text"), item.get("menu_summary")]
-        if isinstance(t, str) and t.strip()
-    ]
-    photo_texts = [
-        t
-        for t in [item.get("photo_caption"), item.get("photo_description")]
-        if isinstance(t, str) and t.strip()
-    ]
-    has_ramen_in_name = _has_ramen_signal(name)
-    has_non_ramen_in_name = _has_non_ramen_signal(name)
+    normalized_name = normalize_keyword_text(name)
+    has_ramen_in_name = _RAMEN_MATCHER.contains_any_normalized(normalized_name)
+    has_non_ramen_in_name = _NON_RAMEN_MATCHER.contains_any_normalized(normalized_name)
     has_ramen_type = any("ramen" in t for t in types)
     has_non_ramen_type = bool(types.intersection(NON_RAMEN_TYPES))
 
     # 店名/業態が明確に非ラーメンのときは、口コミノイズに引っ張られないよう先に除外
     if has_non_ramen_in_name and not has_ramen_in_name:
-        return True
+        return 1.0
     if has_non_ramen_type and not has_ramen_type and not has_ramen_in_name:
-        return True
+        return 0.9
+    if has_ramen_in_name:
+        return 0.0
+    if has_ramen_type:
+        return 0.1
+    return 0.5
+
+
+def _is_clearly_non_ramen(item: dict[str, object]) -> bool:
+    return _nearby_non_ramen_confidence(item) >= _PRE_DETAILS_EXCLUDE_CONFIDENCE
+
 
-    ramen_signals = [
-        has_ramen_in_name,
-        has_ramen_type,
-        _has_ramen_signal(summary),
-        any(_has_ramen_signal(text) for text in review_texts),
-        any(_has_ramen_signal(text) for text in menu_texts),
-        any(_has_ramen_signal(text) for text in photo_texts),
+def _should_exclude_non_ramen_shop(
+    item: dict[str, object],
+    reviews: list[dict[str, object]],
+    editorial_summary: str | None,
+) -> tuple[bool, bool]:
+    """
+    (除外するか, その判定が店名/type か本文に基づくか) を返す。
+    判断材料の本文が無くて除外するときは、後者を False にする（判定を保存しない用）。
+    """
+    confidence = _nearby_non_ramen_confidence(item)
+    if confidence >= _PRE_DETAILS_EXCLUDE_CONFIDENCE:
+        return True, True
+    if confidence <= _PRE_DETAILS_KEEP_CONFIDENCE:
+        return False, True
+
+    # 店名/type で判断できない店だけ、概要・口コミなどの本文で判定する
+    review_texts = (review.get("text") for review in reviews)
+    texts = [
+        editorial_summary,
+        *review_texts,
+        item.get("menu_text"),
+        item.get("menu_summary"),
+        item.get("photo_caption"),
+        item.get("photo_description"),
     ]
-    if any(ramen_signals):
+    texts = [text for text in texts if isinstance(text, str) and text.strip()]
+    return not any(_has_ramen_signal(text) for text in texts), bool(texts)
+
+
+async def enrich_items(
+    items: list[dict[str, object]],
+    search_datetime: str | None = None,
+    deadline: Deadline | None = None,
+    seen_shops: dict[str, dict] | None = None,
+) -> bool:
+    """
+    候補に Details/LLM の結果を付与する。
+    すべての候補を省略なしで付与できたら True
+    （締め切りで打ち切った・省いたときは False）。
+    """
+    target_dt = _parse_search_datetime(search_datetime)
+
+    if (
+        deadline is not None
+        and deadline.remaining(_AFTER_ENRICH_RESERVE_SEC) < _MIN_BUDGET_FOR_DETAILS_SEC
+    ):
+        # 上流を待つ時間が無いので、キャッシュ済みの Details / LLM 結果だけで返す
+        logger.info(
+            "enrich_items: cache only remaining=%.2fs items=%d",
+            deadline.remaining(),
+            len(items),
+        )
+        _apply_cached_enrichment(items, target_dt, seen_shops)
         return False
 
-    review_ramen_hits = sum(
-        1 for text in review_texts if _has_ramen_signal(text)
-    )
+    # 付与はコピーに対して行い、間に合った分だけ元の項目へ写す。
+    # 締め切り後も裏で続く処理が、返した項目（セッションなどに残る）を
+    # 書き換えないようにする
+    task_items: dict[asyncio.Future, list[tuple[dict, dict]]] = {}
+    if target_dt is None:
+        for item in items:
+            work_item = dict(item)
+            task = asyncio.ensure_future(
+                _enrich_item(work_item, deadline=deadline, seen_shops=seen_shops)
+            )
+            task_items[task] = [(item, work_item)]
+    else:
+        pairs = [(item, dict(item)) for item in items]
+        task = asyncio.ensure_future(
+            _enrich_items_hours_first(
+                [work_item for _, work_item in pairs],
+                target_dt,
+                deadline=deadline,
+                seen_shops=seen_shops,
+            )
+        )
+        task_items[task] = pairs
 
-    if review_ramen_hits == 0:
+    tasks = list(task_items)
+    if not tasks:
         return True
 
-    non_ramen_signals = [
-        has_non_ramen_in_name,
-        has_non_ramen_type,
-        _has_non_ramen_signal(summary),
-    ]
+    timeout = _ENRICH_TOTAL_TIMEOUT_SEC
+    if deadline is not None:
+        timeout = deadline.timeout(_ENRICH_TOTAL_TIMEOUT_SEC, _AFTER_ENRICH_RESERVE_SEC)
+
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    complete = not pending
+    for task in done:
+        for item, work_item in task_items[task]:
+            item.update(work_item)
+        if task.exception() is not None:
+            logger.warning("enrich_items task failed: %s", task.exception())
+            complete = False
+        elif task.result() is not True:
+            complete = False
+
+    if pending:
+        logger.warning(
+            "enrich_items timeout: returned without full enrichment pending=%d",
+            len(pending),
+        )
+        pending_pairs = [pair for task in pending for pair in task_items[task]]
+        # 間に合わなかった項目には、その時点でキャッシュに入っている分だけ付ける
+        _apply_cached_enrichment(
+            [item for item, _ in pending_pairs], target_dt, seen_shops
+        )
+        _finish_enrichment_in_background(
+            pending,
+            [work_item for _, work_item in pending_pairs],
+        )
 
-    if not any(non_ramen_signals):
-        return False
+    return complete
 
-    if not review_texts and not summary:
-        return False
 
-    return True
+def _apply_cached_enrichment(
+    items: list[dict[str, object]],
+    target_dt: datetime | None,
+    seen_shops: dict[str, dict] | None = None,
+) -> None:
+    for item in items:
+        place_id_value = item.get("place_id")
+        if not isinstance(place_id_value, str) or not place_id_value:
+            continue
+
+        seen = (seen_shops or {}).get(place_id_value) or {}
+        detail = seen.get("detail") or get_cached_details(place_id_value)
+        if detail is not None:
+            _apply_detail(item, detail, target_dt)
 
+        enrichment = seen.get("enrichment") or get_cached_enrichment(place_id_value)
+        if enrichment is not None:
+            _apply_enrichment(item, enrichment)
 
-async def enrich_items(items: list[dict[str, object]], search_datetime: str | None = None) -> None:
-    semaphore = asyncio.Semaphore(_ENRICH_CONCURRENCY)
-    tasks = [_enrich_item(item, semaphore, search_datetime=search_datetime) for item in items]
+
+def _finish_enrichment_in_background(
+    pending: set[asyncio.Task],
+    work_items: list[dict[str, object]],
+) -> None:
+    """
+    締め切りを過ぎた付与処理は捨てずに裏で完了させ、
+    結果を Details/LLM キャッシュに残す。
+    work_items は付与処理が書き込むコピーで、非ラーメンの判定を保存するのに使う。
+    裏で走らせる数と時間には上限を設ける。
+    """
+    global _lingering_enrich_tasks
+
+    capacity = max(0, _MAX_LINGERING_ENRICH_TASKS - _lingering_enrich_tasks)
+    lingering = list(pending)[:capacity]
+    for task in list(pending)[capacity:]:
+        task.cancel()
+
+    if not lingering:
+        return
+
+    _lingering_enrich_tasks += len(lingering)
+    run_in_background(
+        _await_lingering(lingering, work_items),
+        name="enrich_items_lingering",
+    )
+
+
+async def _await_lingering(
+    tasks: list[asyncio.Task],
+    work_items: list[dict[str, object]],
+) -> None:
+    global _lingering_enrich_tasks
 
     try:
-        await asyncio.wait_for(
-            asyncio.gather(*tasks, return_exceptions=False),
-            timeout=_ENRICH_TOTAL_TIMEOUT_SEC,
+        _, still_pending = await asyncio.wait(
+            tasks,
+            timeout=_LINGERING_ENRICH_TIMEOUT_SEC,
         )
-    except TimeoutError:
-        logger.warning("enrich_items timeout: returned without full enrichment")
+        for task in still_pending:
+            task.cancel()
+    finally:
+        _lingering_enrich_tasks -= len(tasks)
+
+    _record_verdicts(work_items)
+
+
+async def _enrich_items_hours_first(
+    items: list[dict[str, object]],
+    target_dt: datetime,
+    deadline: Deadline | None = None,
+    seen_shops: dict[str, dict] | None = None,
+) -> bool:
+    """
+    日時指定検索用。先に営業時間だけで営業中かを判定し、
+    LLMによる付与は指定時刻に営業している店舗に絞る。
+    営業中の店舗が1ページ分に満たない場合だけ、足りない件数ぶん
+    営業時間不明・時間外の店舗（この順）も付与対象にする。
+    """
+    details = await asyncio.gather(
+        *(
+            _prepare_item(item, target_dt=target_dt, seen_shops=seen_shops)
+            for item in items
+        ),
+        return_exceptions=False,
+    )
+
+    prepared = [
+        (item, detail)
+        for item, detail in zip(items, details)
+        if detail is not None and not item.get("_exclude_as_non_ramen")
+    ]
+    open_targets = [
+        (item, detail)
+        for item, detail in prepared
+        if item.get("open_at_search_time") is True
+    ]
+    other_targets = [
+        (item, detail)
+        for item, detail in prepared
+        if item.get("open_at_search_time") is None
+    ] + [
+        (item, detail)
+        for item, detail in prepared
+        if item.get("open_at_search_time") is False
+    ]
+    shortfall = max(0, _MIN_OPEN_ITEMS_BEFORE_CLOSED_ENRICH - len(open_targets))
+    targets = open_targets + other_targets[:shortfall]
+
+    enriched = await asyncio.gather(
+        *(
+            _enrich_item_with_llm(
+                item, detail, deadline=deadline, seen_shops=seen_shops
+            )
+            for item, detail in targets
+        ),
+        return_exceptions=False,
+    )
+    return all(detail is not None for detail in details) and all(enriched)
@@ -1,3 +1,6 @@
+from app.services.keyword_matcher import KeywordMatcher
+
+
 def _review_penalty(count: int) -> float:
     if count >= 100:
         return 0
@@ -48,6 +51,18 @@ CATEGORY_NAME_KEYWORDS: dict[str, tuple[str, ...]] = {
 }
 
 
+def _build_categories_by_name_keyword() -> dict[str, set[str]]:
+    categories_by_keyword: dict[str, set[str]] = {}
+    for category, keywords in CATEGORY_NAME_KEYWORDS.items():
+        for keyword in keywords:
+            categories_by_keyword.setdefault(keyword, set()).add(category)
+    return categories_by_keyword
+
+
+_CATEGORIES_BY_NAME_KEYWORD = _build_categories_by_name_keyword()
+_CATEGORY_NAME_MATCHER = KeywordMatcher(_CATEGORIES_BY_NAME_KEYWORD)
+
+
 def _canonical_preference_category(category: str) -> str:
     if category == "二郎":
         return "二郎系"
@@ -63,19 +78,23 @@ def _name_match_bonus(
     if not isinstance(name, str) or not signaled_categories:
         return 0.0
 
+    name_categories = {
+        category
+        for keyword in _CATEGORY_NAME_MATCHER.find_all(name)
+        for category in _CATEGORIES_BY_NAME_KEYWORD[keyword]
+    }
+
     bonus = 0.0
     for category in signaled_categories:
         canonical = _canonical_preference_category(category)
-        keywords = CATEGORY_NAME_KEYWORDS.get(canonical)
-        if not keywords:
+        if canonical not in name_categories:
             continue
 
         weight = _normalized_preference_weight(canonical, weights)
         if weight <= 0:
             continue
 
-        if any(keyword in name for keyword in keywords):
-            bonus += 0.2 if weight >= 1.0 else 0.08
+        bonus += 0.2 if weight >= 1.0 else 0.08
 
     return min(bonus, 0.3)
 
@@ -0,0 +1,168 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+# 数字が小さいほど優先。
+# ユーザーへの返信に必要な呼び出しを、先読み・ウォームアップより先に通す
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+_PRIORITY_LABELS = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background",
+}
+
+_current_priority: ContextVar[int] = ContextVar(
+    "upstream_priority",
+    default=PRIORITY_INTERACTIVE,
+)
+
+_limiters: list["TokenBucketLimiter"] = []
+
+
+@contextmanager
+def upstream_priority(priority: int) -> Iterator[None]:
+    """このブロック内（と、ここから作られるタスク）の上流呼び出しの優先度を変える。"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_upstream_priority() -> int:
+    return _current_priority.get()
+
+
+class _WaitStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_sec = 0.0
+        self.max_sec = 0.0
+        self.recent: deque[float] = deque(maxlen=500)
+
+    def record(self, wait_sec: float) -> None:
+        self.count += 1
+        self.total_sec += wait_sec
+        self.max_sec = max(self.max_sec, wait_sec)
+        self.recent.append(wait_sec)
+
+    def snapshot(self) -> dict[str, float | int]:
+        recent = sorted(self.recent)
+        return {
+            "count": self.count,
+            "avg_ms": (
+                round(self.total_sec / self.count * 1000, 1) if self.count else 0.0
+            ),
+            "max_ms": round(self.max_sec * 1000, 1),
+            "p50_ms": round(_percentile(recent, 0.50) * 1000, 1),
+            "p95_ms": round(_percentile(recent, 0.95) * 1000, 1),
+        }
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(len(sorted_values) * q))
+    return sorted_values[idx]
+
+
+class TokenBucketLimiter:
+    """
+    プロセス全体で共有するトークンバケット。
+    トークンが無いときは優先度順（同じ優先度なら到着順）に待たせる。
+    """
+
+    def __init__(self, name: str, rate_per_sec: float, burst: int):
+        self.name = name
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._drain_handle: asyncio.TimerHandle | None = None
+        self._stats: dict[int, _WaitStats] = {}
+        _limiters.append(self)
+
+    async def acquire(self) -> None:
+        priority = _current_priority.get()
+        started_at = time.monotonic()
+
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            self._record(priority, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._schedule_drain()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # トークンを受け取った直後にキャンセルされたら返却する
+                self._tokens = min(self.burst, self._tokens + 1)
+                self._schedule_drain()
+            raise
+
+        self._record(priority, time.monotonic() - started_at)
+
+    def queue_length(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def metrics(self) -> dict[str, object]:
+        return {
+            "rate_per_sec": self.rate_per_sec,
+            "burst": self.burst,
+            "queued": self.queue_length(),
+            "wait": {
+                _PRIORITY_LABELS.get(priority, str(priority)): stats.snapshot()
+                for priority, stats in sorted(self._stats.items())
+            },
+        }
+
+    def _record(self, priority: int, wait_sec: float) -> None:
+        self._stats.setdefault(priority, _WaitStats()).record(wait_sec)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate_per_sec)
+
+    def _schedule_drain(self) -> None:
+        if self._drain_handle is not None:
+            return
+
+        self._refill()
+        delay = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate_per_sec
+        self._drain_handle = asyncio.get_running_loop().call_later(delay, self._drain)
+
+    def _drain(self) -> None:
+        self._drain_handle = None
+        self._refill()
+
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+
+        if self._waiters:
+            self._schedule_drain()
+
+
+def rate_limiter_metrics() -> dict[str, dict[str, object]]:
+    return {limiter.name: limiter.metrics() for limiter in _limiters}
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+
+from app.config import REFRESH_AHEAD_ENABLED
+from app.services.background_tasks import run_in_background
+from app.services.places_cache import DETAILS_CACHE_TTL_SEC, place_ids_due_for_refresh
+from app.services.ramen_search import refresh_place
+from app.services.rate_limiter import PRIORITY_BACKGROUND, upstream_priority
+
+logger = logging.getLogger("uvicorn.error")
+
+_REFRESH_INTERVAL_SEC = 60
+# 期限まで TTL の 20% を切ったエントリが対象
+_REFRESH_WINDOW_SEC = DETAILS_CACHE_TTL_SEC * 0.2
+# これ以上読まれた（よく検索に出る）店だけ取り直す
+_MIN_HITS_FOR_REFRESH = 3
+_MAX_REFRESH_PER_RUN = 20
+
+_stats = {"runs": 0, "refreshed": 0, "failed": 0}
+
+
+def start_refresh_ahead() -> None:
+    if not REFRESH_AHEAD_ENABLED:
+        return
+    run_in_background(_refresh_loop(), name="refresh_ahead")
+
+
+async def _refresh_loop() -> None:
+    while True:
+        await asyncio.sleep(_REFRESH_INTERVAL_SEC)
+        try:
+            await refresh_due_entries()
+        except Exception:
+            logger.exception("refresh-ahead run failed")
+
+
+async def refresh_due_entries() -> int:
+    due = place_ids_due_for_refresh(_MIN_HITS_FOR_REFRESH, _REFRESH_WINDOW_SEC)
+    due = due[:_MAX_REFRESH_PER_RUN]
+    _stats["runs"] += 1
+    if not due:
+        return 0
+
+    with upstream_priority(PRIORITY_BACKGROUND):
+        results = await asyncio.gather(
+            *(
+                refresh_place(place_id, refresh_enrichment=refresh_enrichment)
+                for place_id, refresh_enrichment in due
+            ),
+            return_exceptions=True,
+        )
+
+    failed = sum(1 for result in results if result is not True)
+    _stats["refreshed"] += len(due) - failed
+    _stats["failed"] += failed
+    logger.info("refresh-ahead refreshed=%d failed=%d", len(due) - failed, failed)
+    return len(due) - failed
+
+
+def refresh_ahead_metrics() -> dict[str, object]:
+    return {"enabled": REFRESH_AHEAD_ENABLED, **_stats}
@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from app.db.shop_catalog_repo import (
+    get_catalog_cells,
+    get_catalog_shops,
+    upsert_catalog_cells,
+    upsert_catalog_shops,
+)
+from app.services.background_tasks import run_in_background
+from app.services.opening_hours import is_open_at
+from app.services.places import _flat_distance_m
+
+logger = logging.getLogger("uvicorn.error")
+
+# 1セルは緯度方向に約280m。検索円にまるごと入るセルだけを取得済みとして扱う
+CATALOG_CELL_DEG = 0.0025
+# Nearby Search で取得してからこの期間は、そのセルの店をカタログだけで返す
+CATALOG_CELL_TTL_SEC = 3 * 24 * 60 * 60
+# この期間 Nearby Search で見かけなかった店は読み込まない（閉店・移転など）
+CATALOG_SHOP_TTL_SEC = 30 * 24 * 60 * 60
+
+# DB への書き込みは、この秒数ぶんまとめてから行う
+_FLUSH_DELAY_SEC = 1.0
+_JST = ZoneInfo("Asia/Tokyo")
+
+_shops: dict[str, dict] = {}
+_cell_shops: dict[tuple[int, int], set[str]] = {}
+_cell_fetched_at: dict[tuple[int, int], float] = {}
+
+_pending_shops: dict[str, dict] = {}
+_pending_cells: set[tuple[int, int]] = set()
+_flush_scheduled = False
+
+
+def _cell_of(lat: float, lng: float) -> tuple[int, int]:
+    return math.floor(lat / CATALOG_CELL_DEG), math.floor(lng / CATALOG_CELL_DEG)
+
+
+def _cell_key(cell: tuple[int, int]) -> str:
+    return f"{cell[0]}:{cell[1]}"
+
+
+def _parse_cell_key(cell_key: str) -> tuple[int, int]:
+    i, j = cell_key.split(":")
+    return int(i), int(j)
+
+
+def _cells_touching_circle(
+    lat: float,
+    lng: float,
+    radius_m: int,
+) -> list[tuple[int, int]]:
+    """検索円の外接矩形にかかるセル（店の拾い出し用。円の外の店は呼び出し側で除く）。"""
+    dlat = radius_m / 111_000
+    dlng = radius_m / (111_000 * math.cos(math.radians(lat)))
+    min_i, min_j = _cell_of(lat - dlat, lng - dlng)
+    max_i, max_j = _cell_of(lat + dlat, lng + dlng)
+    return [
+        (i, j)
+        for i in range(min_i, max_i + 1)
+        for j in range(min_j, max_j + 1)
+    ]
+
+
+def _cells_in_circle(lat: float, lng: float, radius_m: int) -> list[tuple[int, int]]:
+    """
+    検索円にまるごと入る（いちばん遠い角まで半径内の）セル。
+    一部しか円に入らないセルは、円の外側を Nearby Search で見ていないので含めない。
+    """
+    cells = []
+    for i, j in _cells_touching_circle(lat, lng, radius_m):
+        corners = (
+            (i * CATALOG_CELL_DEG, j * CATALOG_CELL_DEG),
+            (i * CATALOG_CELL_DEG, (j + 1) * CATALOG_CELL_DEG),
+            ((i + 1) * CATALOG_CELL_DEG, j * CATALOG_CELL_DEG),
+            ((i + 1) * CATALOG_CELL_DEG, (j + 1) * CATALOG_CELL_DEG),
+        )
+        if all(
+            _flat_distance_m(lat, lng, corner_lat, corner_lng) <= radius_m
+            for corner_lat, corner_lng in corners
+        ):
+            cells.append((i, j))
+    return cells
+
+
+def _index_shop(shop: dict) -> None:
+    place_id = shop["place_id"]
+    previous = _shops.get(place_id)
+    if previous is not None:
+        previous_cell = _cell_of(previous["lat"], previous["lng"])
+        _cell_shops.get(previous_cell, set()).discard(place_id)
+
+    _shops[place_id] = shop
+    _cell_shops.setdefault(_cell_of(shop["lat"], shop["lng"]), set()).add(place_id)
+
+
+def load_shop_catalog() -> int:
+    """DBの店舗カタログとセルの取得時刻をメモリに読み込む（起動時に1回）。"""
+    for shop in get_catalog_shops(CATALOG_SHOP_TTL_SEC):
+        _index_shop(shop)
+    for cell_key, fetched_at in get_catalog_cells(CATALOG_CELL_TTL_SEC):
+        _cell_fetched_at[_parse_cell_key(cell_key)] = fetched_at
+    return len(_shops)
+
+
+def query_catalog(
+    lat: float,
+    lng: float,
+    radius_m: int,
+    limit: int = 30,
+) -> list[dict[str, object]] | None:
+    """
+    半径内の店をカタログだけで返す。
+    検索円にまるごと入るセルに鮮度切れが1つでもあれば None（Nearby Search で取り直す）。
+    円の縁にかかるセルの店は、カタログにあるぶんだけ足す。
+    返す項目は nearby_result_to_items と同じ形。
+    """
+    cells = _cells_in_circle(lat, lng, radius_m)
+    now = time.time()
+    if not cells or any(
+        now - _cell_fetched_at.get(cell, 0.0) > CATALOG_CELL_TTL_SEC for cell in cells
+    ):
+        return None
+
+    now_jst = datetime.now(_JST).replace(tzinfo=None)
+    items: list[dict[str, object]] = []
+    for cell in _cells_touching_circle(lat, lng, radius_m):
+        for place_id in _cell_shops.get(cell, ()):
+            shop = _shops[place_id]
+            distance_m = _flat_distance_m(lat, lng, shop["lat"], shop["lng"])
+            if distance_m > radius_m:
+                continue
+
+            open_bitmap = shop.get("open_bitmap")
+            items.append(
+                {
+                    "name": shop.get("name"),
+                    "vicinity": shop.get("vicinity"),
+                    "lat": shop["lat"],
+                    "lng": shop["lng"],
+                    "open_now": (
+                        is_open_at({"open_bitmap": open_bitmap}, now_jst)
+                        if open_bitmap
+                        else None
+                    ),
+                    "rating": shop.get("rating"),
+                    "rating_count": shop.get("rating_count"),
+                    "photo_reference": shop.get("photo_reference"),
+                    "place_id": place_id,
+                    "types": list(shop.get("types") or []),
+                    "distance_m": distance_m,
+                }
+            )
+
+    # Nearby Search（prominence 順）に寄せて、口コミ数の多い店から limit 件
+    items.sort(key=lambda item: (-(item.get("rating_count") or 0), item["distance_m"]))
+    return items[:limit]
+
+
+def record_nearby_items(
+    lat: float,
+    lng: float,
+    radius_m: int,
+    items: list[dict[str, object]],
+    mark_cells: bool = True,
+) -> None:
+    """
+    Nearby Search の結果をカタログに取り込み、検索円にまるごと入るセルを取得済みにする。
+    結果が取り切れていない（続きのページがある）ときは、
+    mark_cells=False で店だけ取り込む。
+    """
+    for item in items:
+        place_id = item.get("place_id")
+        if not isinstance(place_id, str) or not place_id:
+            continue
+        if item.get("lat") is None or item.get("lng") is None:
+            continue
+
+        previous = _shops.get(place_id) or {}
+        shop = {
+            "place_id": place_id,
+            "name": item.get("name"),
+            "vicinity": item.get("vicinity"),
+            "lat": item["lat"],
+            "lng": item["lng"],
+            "types": list(item.get("types") or []),
+            "rating": item.get("rating"),
+            "rating_count": item.get("rating_count"),
+            "photo_reference": item.get("photo_reference"),
+            "open_bitmap": previous.get("open_bitmap"),
+        }
+        _index_shop(shop)
+        _pending_shops[place_id] = shop
+
+    if mark_cells:
+        now = time.time()
+        for cell in _cells_in_circle(lat, lng, radius_m):
+            _cell_fetched_at[cell] = now
+            _pending_cells.add(cell)
+
+    _schedule_flush()
+
+
+def record_shop_hours(place_id: str, compiled_hours: dict[str, object]) -> None:
+    """
+    Place Details の営業時間をカタログの店に残す
+    （カタログから返すときの営業中判定用）。
+    """
+    shop = _shops.get(place_id)
+    open_bitmap = compiled_hours.get("open_bitmap")
+    if shop is None or not open_bitmap or shop.get("open_bitmap") == open_bitmap:
+        return
+
+    shop["open_bitmap"] = open_bitmap
+    _pending_shops[place_id] = shop
+    _schedule_flush()
+
+
+def _schedule_flush() -> None:
+    global _flush_scheduled
+
+    if _flush_scheduled:
+        return
+    _flush_scheduled = True
+    run_in_background(_flush_pending(), name="flush_shop_catalog")
+
+
+async def _flush_pending() -> None:
+    global _flush_scheduled
+
+    await asyncio.sleep(_FLUSH_DELAY_SEC)
+    _flush_scheduled = False
+
+    shops = list(_pending_shops.values())
+    cell_keys = [_cell_key(cell) for cell in _pending_cells]
+    _pending_shops.clear()
+    _pending_cells.clear()
+
+    try:
+        if shops:
+            await asyncio.to_thread(upsert_catalog_shops, shops)
+        if cell_keys:
+            await asyncio.to_thread(upsert_catalog_cells, cell_keys)
+    except Exception as e:
+        logger.warning(
+            "persist shop catalog failed shops=%d cells=%d: %s",
+            len(shops),
+            len(cell_keys),
+            e,
+        )
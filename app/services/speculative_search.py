@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from app.config import SPECULATIVE_SEARCH_ENABLED
+from app.db.user_location_repo import get_last_location, upsert_last_location
+from app.db.user_pref_repo import get_user_weights
+from app.services.background_tasks import run_in_background
+from app.services.deadline import Deadline
+from app.services.places import _flat_distance_m
+from app.services.ramen_search import (
+    collect_candidates,
+    rank_candidates,
+    with_distances_from,
+)
+from app.services.ranking import sort_items
+from app.services.rate_limiter import PRIORITY_BACKGROUND, upstream_priority
+
+logger = logging.getLogger("uvicorn.error")
+
+# 送られてきた地点がこの距離以内なら、先回りした検索結果をそのまま使う
+_REUSE_DISTANCE_M = 150
+# 「ラーメン」と送ってから位置情報が届くまでの猶予（これより古い先回り結果は捨てる）
+_SPECULATION_TTL_SEC = 5 * 60
+# 先回り検索の時間予算（ユーザーはまだ地点を選んでいるので返信の締め切りとは別）
+_SPECULATION_BUDGET_SEC = 30.0
+_DB_TIMEOUT_SEC = 1.0
+_MAX_SPECULATED_ITEMS = 100
+# メモリに持つユーザー数の上限（古く使ったものから捨てる。地点は DB にもある）
+_MAX_REMEMBERED_USERS = 10_000
+
+_last_locations: OrderedDict[str, tuple[float, float]] = OrderedDict()
+# ユーザー -> {"lat", "lng", "started_at", "task"}。古く始めたものほど先頭
+_speculations: OrderedDict[str, dict[str, object]] = OrderedDict()
+_stats = {"started": 0, "reused": 0, "too_far": 0, "not_ready": 0}
+
+
+def remember_search_location(user_id: str, lat: float, lng: float) -> None:
+    """検索地点を覚えておく（DB への書き込みはバックグラウンドで行う）。"""
+    _remember_location(user_id, (lat, lng))
+    run_in_background(
+        asyncio.to_thread(upsert_last_location, user_id, lat, lng),
+        name="persist_last_location",
+    )
+
+
+async def _load_last_location(user_id: str) -> tuple[float, float] | None:
+    location = _last_locations.get(user_id)
+    if location is not None:
+        return location
+
+    try:
+        location = await asyncio.wait_for(
+            asyncio.to_thread(get_last_location, user_id),
+            timeout=_DB_TIMEOUT_SEC,
+        )
+    except Exception as e:
+        logger.warning("get_last_location skipped user_id=%s: %s", user_id[:8], e)
+        return None
+
+    if location is not None:
+        _remember_location(user_id, location)
+    return location
+
+
+def _remember_location(user_id: str, location: tuple[float, float]) -> None:
+    _last_locations[user_id] = location
+    _last_locations.move_to_end(user_id)
+    while len(_last_locations) > _MAX_REMEMBERED_USERS:
+        _last_locations.popitem(last=False)
+
+
+def _prune_speculations(now: float) -> None:
+    # 使われないまま期限を過ぎた先回り結果を先頭から捨てる（走っているタスクは止めない）
+    while _speculations:
+        _, oldest = next(iter(_speculations.items()))
+        if (
+            len(_speculations) < _MAX_REMEMBERED_USERS
+            and now - float(oldest["started_at"]) <= _SPECULATION_TTL_SEC
+        ):
+            break
+        _speculations.popitem(last=False)
+
+
+async def start_speculative_search(user_id: str) -> None:
+    """
+    検索の意図（「今すぐ検索」「ラーメン」）を受けた時点で、
+    前回の検索地点で検索を始めておく。
+    位置情報が届くまでの間に Nearby / Details / OpenAI と好みの読み込みを済ませる。
+    """
+    if not SPECULATIVE_SEARCH_ENABLED:
+        return
+
+    location = await _load_last_location(user_id)
+    if location is None:
+        return
+
+    lat, lng = location
+    previous = _speculations.get(user_id)
+    if (
+        previous is not None
+        and time.time() - float(previous["started_at"]) < _SPECULATION_TTL_SEC
+        and _flat_distance_m(lat, lng, previous["lat"], previous["lng"])
+        <= _REUSE_DISTANCE_M
+    ):
+        return
+
+    _stats["started"] += 1
+    _prune_speculations(time.time())
+    _speculations.pop(user_id, None)
+    _speculations[user_id] = {
+        "lat": lat,
+        "lng": lng,
+        "started_at": time.time(),
+        "task": run_in_background(
+            _run_speculation(user_id, lat, lng),
+            name="speculative_search",
+        ),
+    }
+
+
+async def _run_speculation(user_id: str, lat: float, lng: float) -> dict[str, object]:
+    deadline = Deadline(_SPECULATION_BUDGET_SEC)
+    with upstream_priority(PRIORITY_BACKGROUND):
+        weights_task = asyncio.create_task(
+            asyncio.to_thread(get_user_weights, user_id)
+        )
+        candidates, had_error, used_radius = await collect_candidates(
+            lat, lng, deadline
+        )
+        items: list[dict[str, object]] = []
+        if candidates:
+            items, _has_more = await rank_candidates(
+                candidates,
+                page_size=_MAX_SPECULATED_ITEMS,
+                prioritize_open_now_status=True,
+                deadline=deadline,
+            )
+
+    try:
+        weights = await weights_task
+    except Exception as e:
+        logger.warning(
+            "speculative get_user_weights failed user_id=%s: %s", user_id[:8], e
+        )
+        weights = {}
+
+    return {
+        "items": items,
+        "weights": weights,
+        "had_error": had_error,
+        "used_radius": used_radius,
+    }
+
+
+async def take_speculative_result(
+    user_id: str,
+    lat: float,
+    lng: float,
+    deadline: Deadline,
+    reserve: float = 0.0,
+) -> tuple[list[dict[str, object]], bool, int | None] | None:
+    """
+    先回り検索が送られてきた地点の近くなら、その結果を好みで並べ直して返す（上流は呼ばない）。
+    戻り値は search_ramen_items と同じ並びの
+    (並べた候補, 上流エラーがあったか, 使った半径)。
+    使えないときは None（通常の検索を行う）。先回り検索が取得中の Details / LLM 付与は、
+    通常の検索が同じ店を取りに行くと待ち合わせるので、上流を二重には呼ばない。
+    """
+    speculation = _speculations.pop(user_id, None)
+    if speculation is None:
+        return None
+
+    if time.time() - float(speculation["started_at"]) > _SPECULATION_TTL_SEC:
+        return None
+
+    distance_m = _flat_distance_m(speculation["lat"], speculation["lng"], lat, lng)
+    if distance_m > _REUSE_DISTANCE_M:
+        _stats["too_far"] += 1
+        return None
+
+    # 途中なら締め切りの範囲で待つ。間に合わなくても止めない（キャッシュが温まる）
+    task: asyncio.Task = speculation["task"]
+    if not task.done():
+        await asyncio.wait({task}, timeout=deadline.remaining(reserve))
+    if not task.done() or task.cancelled() or task.exception() is not None:
+        _stats["not_ready"] += 1
+        return None
+
+    result = task.result()
+    items = with_distances_from(result["items"], lat, lng)
+    if not items:
+        return None
+
+    _stats["reused"] += 1
+    ranked_items = sort_items(
+        items,
+        weights=result["weights"],
+        prioritize_open_now_status=True,
+    )
+    return ranked_items, bool(result["had_error"]), result["used_radius"]
+
+
+def speculative_search_metrics() -> dict[str, object]:
+    return {
+        "enabled": SPECULATIVE_SEARCH_ENABLED,
+        "in_flight": sum(
+            1
+            for speculation in _speculations.values()
+            if not speculation["task"].done()
+        ),
+        **_stats,
+    }
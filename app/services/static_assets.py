@@ -0,0 +1,71 @@
+import gzip
+import hashlib
+import os
+
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "static"))
+ASSETS_URL_PREFIX = "/assets"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 事前に gzip しておく拡張子（画像は圧縮しても小さくならない）
+_PRECOMPRESSED_SUFFIXES = {".html"}
+
+
+def _build_manifest() -> dict[str, dict[str, object]]:
+    """
+    app/static 配下のファイルに内容ハッシュ付きのファイル名を割り当てる
+    （import 時に1回）。
+    例: gold.png -> gold.3f2a9c1d.png
+    """
+    manifest: dict[str, dict[str, object]] = {}
+    if not os.path.isdir(STATIC_DIR):
+        return manifest
+
+    for entry in sorted(os.scandir(STATIC_DIR), key=lambda e: e.name):
+        if not entry.is_file() or entry.name.startswith("."):
+            continue
+
+        with open(entry.path, "rb") as f:
+            content = f.read()
+
+        digest = hashlib.sha256(content).hexdigest()
+        stem, suffix = os.path.splitext(entry.name)
+        manifest[entry.name] = {
+            "path": entry.path,
+            "fingerprinted_name": f"{stem}.{digest[:8]}{suffix}",
+            "etag": f'"{digest[:32]}"',
+            "gzip": (
+                gzip.compress(content, compresslevel=9, mtime=0)
+                if suffix in _PRECOMPRESSED_SUFFIXES
+                else None
+            ),
+        }
+    return manifest
+
+
+_manifest = _build_manifest()
+_by_fingerprinted_name = {
+    str(asset["fingerprinted_name"]): name for name, asset in _manifest.items()
+}
+
+
+def get_static_asset(filename: str) -> dict[str, object] | None:
+    return _manifest.get(filename)
+
+
+def resolve_fingerprinted_asset(fingerprinted_name: str) -> dict[str, object] | None:
+    filename = _by_fingerprinted_name.get(fingerprinted_name)
+    if filename is None:
+        return None
+    return _manifest[filename]
+
+
+def static_url(filename: str) -> str | None:
+    """
+    LINE から参照させる静的ファイルの URL（内容ハッシュ付き・長期キャッシュ可）を返す。
+    PUBLIC_BASE_URL が未設定、またはファイルが無い場合は None。
+    """
+    base = (os.getenv("PUBLIC_BASE_URL") or "").rstrip("/")
+    asset = _manifest.get(filename)
+    if not base or asset is None:
+        return None
+    return f"{base}{ASSETS_URL_PREFIX}/{asset['fingerprinted_name']}"
@@ -0,0 +1,96 @@
+"""
+非ラーメン除外判定のマイクロベンチマーク。
+
+1検索ぶん（候補30件 × 口コミ5件）の _should_exclude_non_ramen_shop を、
+旧実装（呼び出し毎にキーワードを正規化して部分一致）と比較する。
+
+    python -m scripts.bench_keyword_matcher
+"""
+import os
+import re
+import timeit
+
+# ai_summary が import 時に OpenAI クライアントを作るため、ダミーのキーを入れておく
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from app.services import ramen_search  # noqa: E402
+from app.services.ramen_search import (  # noqa: E402
+    NON_RAMEN_KEYWORDS,
+    RAMEN_KEYWORDS,
+    _should_exclude_non_ramen_shop,
+)
+
+SHOPS_PER_SEARCH = 30
+REPEAT = 200
+
+_REVIEW = (
+    "駅から近くて便利。スープは濃厚で麺との相性も良い。"
+    "店内は清潔で接客も丁寧でした。また近くに来たら寄りたいと思います。"
+)
+
+
+def _legacy_normalize(text: str) -> str:
+    normalized = text.lower()
+    normalized = normalized.translate(str.maketrans(
+        "ァィゥェォャュョッヮー",
+        "ぁぃぅぇぉゃゅょっゎー",
+    ))
+    normalized = normalized.replace("メン", "めん")
+    normalized = normalized.replace("ソバ", "そば")
+    normalized = normalized.replace("ｰ", "ー")
+    normalized = re.sub(r"\s+", "", normalized)
+    return normalized
+
+
+def _legacy_contains_any(text: str, keywords: tuple[str, ...]) -> bool:
+    lowered = _legacy_normalize(text)
+    return any(_legacy_normalize(keyword) in lowered for keyword in keywords)
+
+
+def _build_search() -> list[tuple[dict, list[dict], str]]:
+    shops = []
+    for i in range(SHOPS_PER_SEARCH):
+        # 店名・口コミにラーメン関連語が出ない店（＝全テキストを走査する最悪ケース）を混ぜる
+        name = f"麺屋{i}" if i % 3 else f"ラーメン{i}"
+        reviews = [{"text": _REVIEW} for _ in range(5)]
+        shops.append(({"name": name, "types": ["restaurant"]}, reviews, "地元で人気の店"))
+    return shops
+
+
+def _run(shops: list[tuple[dict, list[dict], str]]) -> None:
+    for item, reviews, summary in shops:
+        _should_exclude_non_ramen_shop(item, reviews, summary)
+
+
+def main() -> None:
+    shops = _build_search()
+
+    new_sec = min(timeit.repeat(lambda: _run(shops), number=REPEAT, repeat=5)) / REPEAT
+
+    matchers = (ramen_search._RAMEN_MATCHER, ramen_search._NON_RAMEN_MATCHER)
+    ramen_search._RAMEN_MATCHER.contains_any = (
+        lambda text: _legacy_contains_any(text, RAMEN_KEYWORDS)
+    )
+    ramen_search._RAMEN_MATCHER.contains_any_normalized = (
+        lambda text: _legacy_contains_any(text, RAMEN_KEYWORDS)
+    )
+    ramen_search._NON_RAMEN_MATCHER.contains_any_normalized = (
+        lambda text: _legacy_contains_any(text, NON_RAMEN_KEYWORDS)
+    )
+    try:
+        legacy_sec = (
+            min(timeit.repeat(lambda: _run(shops), number=REPEAT, repeat=5)) / REPEAT
+        )
+    finally:
+        for matcher in matchers:
+            vars(matcher).pop("contains_any", None)
+            vars(matcher).pop("contains_any_normalized", None)
+
+    print(f"shops per search   : {SHOPS_PER_SEARCH}")
+    print(f"legacy per search  : {legacy_sec * 1000:.3f} ms")
+    print(f"matcher per search : {new_sec * 1000:.3f} ms")
+    print(f"saved per search   : {(legacy_sec - new_sec) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+import os
+
+# ai_summary は import 時に OpenAI クライアントを作るので、キーだけ入れておく
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,105 @@
+import asyncio
+import random
+
+import pytest
+
+from app.services import adaptive_concurrency
+from app.services.adaptive_concurrency import AdaptiveConcurrencyLimiter
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _FakeClock:
+    fake = _FakeClock()
+    monkeypatch.setattr(adaptive_concurrency, "time", fake)
+    return fake
+
+
+def _simulate_bursts(
+    limiter: AdaptiveConcurrencyLimiter,
+    clock: _FakeClock,
+    latency,
+    bursts: int = 50,
+) -> list[int]:
+    """30件ずつの付与をまとめて流し、各バースト後の上限を返す。"""
+    limits = []
+    for _burst in range(bursts):
+        for _call in range(30):
+            sample = latency()
+            # 上限の数だけ並行に流れるので、1件あたり latency / limit ずつ時間が進む
+            clock.now += sample / limiter.limit
+            limiter._on_sample(sample, overloaded=False)
+        limits.append(limiter.limit)
+        clock.now += 5.0
+    return limits
+
+
+def test_jitter_does_not_collapse_limit(clock):
+    rng = random.Random(0)
+    limiter = AdaptiveConcurrencyLimiter("test_jitter")
+
+    limits = _simulate_bursts(limiter, clock, lambda: rng.lognormvariate(-1.2, 0.4))
+
+    # 遅延の揺れだけでは、元の固定値（4）より絞らない
+    assert min(limits) >= 4
+    assert limits[-1] > 4
+
+
+def test_sustained_inflation_cuts_limit(clock):
+    rng = random.Random(0)
+    limiter = AdaptiveConcurrencyLimiter("test_inflation")
+    _simulate_bursts(limiter, clock, lambda: rng.lognormvariate(-1.2, 0.4))
+    before = limiter.limit
+
+    # 上流が詰まって遅延が続けて4倍になったら絞る
+    limits = _simulate_bursts(
+        limiter,
+        clock,
+        lambda: rng.lognormvariate(-1.2, 0.4) * 4,
+        bursts=1,
+    )
+
+    assert limits[-1] < before
+
+
+def test_cancellation_is_not_overload():
+    limiter = AdaptiveConcurrencyLimiter("test_cancel")
+    before = limiter._limit
+
+    async def cancelled_call() -> None:
+        async with limiter.slot():
+            await asyncio.sleep(10)
+
+    async def run() -> None:
+        task = asyncio.create_task(cancelled_call())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    assert limiter._limit == before
+    assert limiter.metrics()["overloads"] == 0
+    assert limiter.metrics()["in_flight"] == 0
+
+
+def test_timeout_is_overload():
+    limiter = AdaptiveConcurrencyLimiter("test_timeout")
+    before = limiter._limit
+
+    async def run() -> None:
+        with pytest.raises(TimeoutError):
+            async with limiter.slot():
+                raise TimeoutError
+
+    asyncio.run(run())
+
+    assert limiter._limit < before
@@ -0,0 +1,38 @@
+import importlib
+
+from app import config
+
+
+def test_blank_env_values_fall_back_to_defaults(monkeypatch):
+    for name in (
+        "PLACES_NEARBY_QPS",
+        "CELL_CRAWLER_BUDGET",
+        "CELL_CRAWLER_HOURS",
+        "PLACES_DETAILS_HEDGING",
+        "SPECULATIVE_SEARCH_ENABLED",
+        "PHOTO_CACHE_DIR",
+        "PHOTO_CACHE_MAX_BYTES",
+    ):
+        monkeypatch.setenv(name, "")
+
+    try:
+        reloaded = importlib.reload(config)
+        assert reloaded.PLACES_NEARBY_QPS == 5.0
+        assert reloaded.CELL_CRAWLER_BUDGET == 200
+        assert reloaded.CELL_CRAWLER_HOURS == {9, 10, 15, 16}
+        assert reloaded.PLACES_DETAILS_HEDGING is True
+        assert reloaded.SPECULATIVE_SEARCH_ENABLED is True
+        assert reloaded.PHOTO_CACHE_DIR
+        assert reloaded.PHOTO_CACHE_MAX_BYTES == 256 * 1024 * 1024
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
+
+
+def test_explicit_zero_still_turns_a_flag_off(monkeypatch):
+    monkeypatch.setenv("SPECULATIVE_SEARCH_ENABLED", "0")
+    try:
+        assert importlib.reload(config).SPECULATIVE_SEARCH_ENABLED is False
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime
+
+from app.services import ramen_search
+
+
+def _run(items, monkeypatch):
+    async def fake_prepare(item, target_dt=None, seen_shops=None):
+        return {"place_id": item["place_id"]}
+
+    enriched_ids = []
+
+    async def fake_enrich(item, detail, deadline=None, seen_shops=None):
+        enriched_ids.append(item["place_id"])
+        return True
+
+    monkeypatch.setattr(ramen_search, "_prepare_item", fake_prepare)
+    monkeypatch.setattr(ramen_search, "_enrich_item_with_llm", fake_enrich)
+    complete = asyncio.run(
+        ramen_search._enrich_items_hours_first(items, datetime(2025, 1, 1, 12))
+    )
+    return complete, enriched_ids
+
+
+def _items(prefix, count, open_at_search_time):
+    return [
+        {"place_id": f"{prefix}{i}", "open_at_search_time": open_at_search_time}
+        for i in range(count)
+    ]
+
+
+def test_closed_shops_are_not_enriched_when_enough_are_open(monkeypatch):
+    page = ramen_search._MIN_OPEN_ITEMS_BEFORE_CLOSED_ENRICH
+    items = _items("open", page, True) + _items("closed", 5, False)
+
+    complete, enriched_ids = _run(items, monkeypatch)
+
+    assert complete is True
+    assert sorted(enriched_ids) == sorted(f"open{i}" for i in range(page))
+
+
+def test_only_the_shortfall_of_closed_shops_is_enriched(monkeypatch):
+    page = ramen_search._MIN_OPEN_ITEMS_BEFORE_CLOSED_ENRICH
+    items = (
+        _items("closed", 20, False)
+        + _items("open", page - 3, True)
+        + _items("unknown", 2, None)
+    )
+
+    complete, enriched_ids = _run(items, monkeypatch)
+
+    assert complete is True
+    assert len(enriched_ids) == page
+    # 営業時間不明の店舗を時間外の店舗より先に埋める
+    assert {"unknown0", "unknown1", "closed0"} <= set(enriched_ids)
+    assert "closed1" not in enriched_ids
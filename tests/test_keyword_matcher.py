@@ -0,0 +1,83 @@
+import pytest
+
+from app.services import places, ranking
+from app.services.keyword_matcher import KeywordMatcher
+
+# 旧実装（キーワードごとの `in`）と突き合わせる店名
+_NAMES = (
+    "らーめん 塩そば 一番",
+    "塩ラーメン専門店",
+    "つけ麺 二郎系 豚骨",
+    "味噌ラーメン 激辛",
+    "煮干しそば 鶏白湯",
+    "家系ラーメン 醤油",
+    "まぜそば 油そば",
+    "寿司 すしざんまい",
+    "焼肉ライス",
+    "博物館前ラーメン",
+    "ラーメン屋",
+    "中華そば",
+)
+
+
+def test_overlapping_keywords_are_all_found():
+    matcher = KeywordMatcher(["豚骨", "骨魚介", "魚介"])
+
+    assert matcher.find_all("豚骨魚介") == {"豚骨", "骨魚介", "魚介"}
+
+
+def test_keywords_inside_a_longer_match_are_found():
+    matcher = KeywordMatcher(["塩", "塩ラーメン", "ラーメン"])
+
+    assert matcher.find_all("塩ラーメン") == {"塩", "塩ラーメン", "ラーメン"}
+    assert matcher.find_all("塩そば") == {"塩"}
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["PIZZA", "Pizza", "ＰＩＺＺＡ", "ｐｉｚｚａ", "ﾋﾟｻﾞ pizza", "PIZ ZA"],
+)
+def test_width_and_case_are_normalised(text):
+    assert KeywordMatcher(["pizza"]).find_all(text) == {"pizza"}
+
+
+def test_halfwidth_kana_matches_fullwidth_keyword():
+    matcher = KeywordMatcher(["ラーメン", "しょうゆ"])
+
+    assert matcher.find_all("ﾗｰﾒﾝ") == {"ラーメン"}
+    assert matcher.contains_any("ｼｮｳﾕ") is False
+    assert matcher.contains_any("しょうゆ") is True
+
+
+def test_empty_matcher_finds_nothing():
+    matcher = KeywordMatcher([])
+
+    assert matcher.find_all("ラーメン") == set()
+    assert matcher.contains_any("ラーメン") is False
+
+
+def _legacy_name_categories(name):
+    return {
+        category
+        for category, keywords in ranking.CATEGORY_NAME_KEYWORDS.items()
+        if any(keyword in name for keyword in keywords)
+    }
+
+
+@pytest.mark.parametrize("name", _NAMES)
+def test_name_match_bonus_agrees_with_legacy_keyword_loop(name):
+    weights = {category: 1.0 for category in ranking.CATEGORY_NAME_KEYWORDS}
+    categories = set(ranking.CATEGORY_NAME_KEYWORDS)
+    legacy_bonus = min(0.2 * len(_legacy_name_categories(name)), 0.3)
+
+    bonus = ranking._name_match_bonus({"name": name}, weights, categories)
+
+    assert bonus == pytest.approx(legacy_bonus)
+
+
+@pytest.mark.parametrize("name", _NAMES)
+def test_ramen_shop_candidate_agrees_with_legacy_keyword_loop(name):
+    place = {"name": name, "types": ["restaurant"]}
+    legacy = not any(keyword in name for keyword in places.NON_STORE_KEYWORDS)
+
+    assert places._is_ramen_shop_candidate(place) is legacy
@@ -0,0 +1,53 @@
+import asyncio
+
+from app.services import ramen_search
+from app.services.deadline import Deadline
+
+
+def test_slow_page_is_kept_for_the_next_tap():
+    fetched = []
+
+    async def pages():
+        fetched.append(1)
+        await asyncio.sleep(0.05)
+        yield [{"place_id": "p1"}]
+
+    async def run():
+        stream = ramen_search.MoreCandidates(pages())
+        try:
+            await stream.next_batch(timeout=0.01)
+        except asyncio.TimeoutError:
+            timed_out = True
+        first = await stream.next_batch(timeout=1.0)
+        rest = await stream.next_batch(timeout=1.0)
+        return timed_out, first, rest
+
+    timed_out, first, rest = asyncio.run(run())
+
+    assert timed_out
+    assert first == [{"place_id": "p1"}]
+    assert rest is None
+    assert fetched == [1]
+
+
+def test_second_tap_does_not_read_the_stream_concurrently(monkeypatch):
+    async def pages():
+        await asyncio.sleep(0.05)
+        yield [{"place_id": "p1"}]
+
+    async def rank_candidates(batch, **kwargs):
+        return batch, False
+
+    monkeypatch.setattr(ramen_search, "rank_candidates", rank_candidates)
+
+    async def run():
+        stream = ramen_search.MoreCandidates(pages())
+        return await asyncio.gather(
+            ramen_search.rank_more_candidates(stream, 10, deadline=Deadline(20.0)),
+            ramen_search.rank_more_candidates(stream, 10, deadline=Deadline(20.0)),
+        )
+
+    first, second = asyncio.run(run())
+
+    assert first == ([{"place_id": "p1"}], True)
+    assert second == ([], False)
@@ -0,0 +1,29 @@
+from app.services import non_ramen_verdicts, ramen_search
+
+
+def test_unclear_shop_without_text_is_excluded_but_not_remembered(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(
+        ramen_search, "record_non_ramen_verdicts", lambda ids: recorded.extend(ids)
+    )
+    item = {"place_id": "p1", "name": "まるや", "types": ["restaurant"]}
+
+    ramen_search._apply_detail(item, {"reviews": []}, None)
+    ramen_search._record_verdicts([item])
+
+    assert item["_exclude_as_non_ramen"] is True
+    assert recorded == []
+    assert not non_ramen_verdicts.is_known_non_ramen("p1")
+
+
+def test_unclear_shop_with_non_ramen_reviews_is_remembered(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(
+        ramen_search, "record_non_ramen_verdicts", lambda ids: recorded.extend(ids)
+    )
+    item = {"place_id": "p2", "name": "まるや", "types": ["restaurant"]}
+
+    ramen_search._apply_detail(item, {"reviews": [{"text": "パスタが美味しい"}]}, None)
+    ramen_search._record_verdicts([item])
+
+    assert recorded == ["p2"]
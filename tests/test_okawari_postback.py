@@ -0,0 +1,80 @@
+import asyncio
+
+from app.line import reply_channel, state
+from app.line.handlers import postback_handler
+from app.services.ramen_search import MoreCandidates
+
+
+def test_short_deadline_keeps_session_for_retry(monkeypatch):
+    sent = []
+    stream = object()
+
+    async def line_reply(reply_token, messages):
+        sent.append(messages)
+
+    async def line_loading(user_id):
+        return None
+
+    async def rank_more_candidates(stream, **kwargs):
+        # 締め切りが短く、続きのページを見る前に打ち切った
+        return [], False
+
+    monkeypatch.setattr(reply_channel, "line_reply", line_reply)
+    monkeypatch.setattr(postback_handler, "line_loading", line_loading)
+    monkeypatch.setattr(postback_handler, "rank_more_candidates", rank_more_candidates)
+    state.set_search_session(
+        "u1",
+        lat=35.0,
+        lng=139.0,
+        next_offset=20,
+        search_datetime=None,
+        prefetched_items=[],
+        has_more_after_prefetch=False,
+        more_candidates=stream,
+        results_exhausted=True,
+    )
+
+    asyncio.run(
+        postback_handler.handle_postback("u1", "token", {"data": "ramen:more:20"})
+    )
+
+    session = state.get_search_session("u1")
+    assert session is not None
+    assert session["next_offset"] == 20
+    assert session["more_candidates"] is stream
+    assert "もう一度おかわり" in sent[0][0]["text"]
+    state.clear_search_session("u1")
+
+
+def test_tap_while_the_stream_is_busy_keeps_the_session(monkeypatch):
+    sent = []
+
+    async def line_reply(reply_token, messages):
+        sent.append(messages)
+
+    async def pages():
+        yield []
+
+    async def rank_more_candidates(stream, **kwargs):
+        raise AssertionError("stream read while busy")
+
+    monkeypatch.setattr(postback_handler, "line_reply", line_reply)
+    monkeypatch.setattr(postback_handler, "rank_more_candidates", rank_more_candidates)
+    stream = MoreCandidates(pages())
+    stream.busy = True
+    state.set_search_session(
+        "u1",
+        lat=35.0,
+        lng=139.0,
+        next_offset=20,
+        more_candidates=stream,
+        results_exhausted=True,
+    )
+
+    asyncio.run(
+        postback_handler.handle_postback("u1", "token", {"data": "ramen:more:20"})
+    )
+
+    assert "探している" in sent[0][0]["text"]
+    assert state.get_search_session("u1")["more_candidates"] is stream
+    state.clear_search_session("u1")
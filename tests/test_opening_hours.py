@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from app.services.opening_hours import compile_opening_hours, is_open_at
+
+# Google の periods は日曜=0..土曜=6。2025-01-04 は土曜日
+SAT, SUN, MON = 6, 0, 1
+
+
+def _period(open_day, open_time, close_day=None, close_time=None):
+    period = {"open": {"day": open_day, "time": open_time}}
+    if close_day is not None:
+        period["close"] = {"day": close_day, "time": close_time}
+    return period
+
+
+def _is_open(periods, *dt_args):
+    compiled = compile_opening_hours({"periods": periods})
+    return is_open_at(compiled, datetime(*dt_args))
+
+
+def test_saturday_night_runs_into_sunday():
+    periods = [_period(SAT, "2200", SUN, "0200")]
+
+    assert _is_open(periods, 2025, 1, 4, 21, 59) is False
+    assert _is_open(periods, 2025, 1, 4, 22, 0) is True
+    assert _is_open(periods, 2025, 1, 4, 23, 59) is True
+    assert _is_open(periods, 2025, 1, 5, 0, 0) is True
+    assert _is_open(periods, 2025, 1, 5, 1, 59) is True
+    assert _is_open(periods, 2025, 1, 5, 2, 0) is False
+
+
+def test_sunday_night_wraps_to_the_start_of_the_week():
+    periods = [_period(SUN, "2200", MON, "0200")]
+
+    assert _is_open(periods, 2025, 1, 5, 23, 0) is True
+    assert _is_open(periods, 2025, 1, 6, 1, 59) is True
+    assert _is_open(periods, 2025, 1, 6, 2, 0) is False
+    assert _is_open(periods, 2025, 1, 5, 21, 59) is False
+
+
+def test_period_without_close_is_open_all_week():
+    periods = [_period(SUN, "0000")]
+
+    for day in range(4, 11):
+        assert _is_open(periods, 2025, 1, day, 0, 0) is True
+        assert _is_open(periods, 2025, 1, day, 12, 30) is True
+        assert _is_open(periods, 2025, 1, day, 23, 59) is True
+
+
+def test_close_time_earlier_than_open_time_is_overnight():
+    periods = [_period(MON, "1800", MON + 1, "0300")]
+
+    assert _is_open(periods, 2025, 1, 6, 17, 59) is False
+    assert _is_open(periods, 2025, 1, 6, 18, 0) is True
+    assert _is_open(periods, 2025, 1, 7, 2, 59) is True
+    assert _is_open(periods, 2025, 1, 7, 3, 0) is False
+    # 翌日の夕方は営業時間外
+    assert _is_open(periods, 2025, 1, 7, 18, 0) is False
+
+
+def test_the_closing_minute_itself_is_closed():
+    periods = [_period(MON, "1100", MON, "1500")]
+
+    assert _is_open(periods, 2025, 1, 6, 10, 59) is False
+    assert _is_open(periods, 2025, 1, 6, 11, 0) is True
+    assert _is_open(periods, 2025, 1, 6, 14, 59) is True
+    assert _is_open(periods, 2025, 1, 6, 15, 0) is False
+
+
+def test_missing_periods_is_unknown():
+    assert is_open_at(compile_opening_hours({}), datetime(2025, 1, 6, 12)) is None
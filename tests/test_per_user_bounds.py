@@ -0,0 +1,28 @@
+from collections import OrderedDict
+
+from app.line import state
+
+
+def test_last_results_are_capped_and_expired_on_write(monkeypatch):
+    monkeypatch.setattr(state, "_user_last_results", OrderedDict())
+    monkeypatch.setattr(state, "MAX_USERS_WITH_RESULTS", 3)
+
+    state.set_last_search_results("stale", [], None, True)
+    state._user_last_results["stale"]["saved_at"] -= state.LAST_RESULTS_TTL_SEC + 1
+    for index in range(4):
+        state.set_last_search_results(f"u{index}", [], None, True)
+
+    assert list(state._user_last_results) == ["u1", "u2", "u3"]
+
+
+def test_datetime_contexts_are_capped(monkeypatch):
+    monkeypatch.setattr(state, "_user_datetime_contexts", OrderedDict())
+    monkeypatch.setattr(state, "MAX_USERS_WITH_RESULTS", 2)
+
+    state.get_datetime_search_context("u0", "2026-01-01T12:00")
+    state.get_datetime_search_context("u1", "2026-01-01T12:00")
+    state.get_datetime_search_context("u0", "2026-01-01T12:00")
+    state.get_datetime_search_context("u2", "2026-01-01T12:00")
+
+    assert list(state._user_datetime_contexts) == ["u0", "u2"]
+
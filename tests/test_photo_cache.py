@@ -0,0 +1,17 @@
+from app.services import photo_cache, places
+
+
+def test_unusable_cache_dir_is_a_miss_not_an_error(monkeypatch, tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    monkeypatch.setattr(photo_cache, "PHOTO_CACHE_DIR", str(blocker / "photos"))
+    monkeypatch.setattr(photo_cache, "_index_loaded", False)
+    monkeypatch.setattr(photo_cache, "_index_failed_at", None)
+
+    assert photo_cache.get_cached_photo("ref", 600) is None
+    assert photo_cache.has_cached_photo("ref", 600) is False
+    assert photo_cache._index_failed_at is not None
+
+
+def test_photo_streams_do_not_share_the_search_connection_pool():
+    assert places._get_photo_http_client() is not places.get_http_client()
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.services import places_cache, ramen_search
+
+
+@pytest.fixture(autouse=True)
+def empty_ranked_cache():
+    places_cache._ranked_cache.clear()
+    places_cache._ranked_place_ids.clear()
+    places_cache._ranked_keys_by_place.clear()
+    yield
+    places_cache._ranked_cache.clear()
+    places_cache._ranked_place_ids.clear()
+    places_cache._ranked_keys_by_place.clear()
+
+
+def _ranked(*place_ids):
+    return {"items": [{"place_id": place_id} for place_id in place_ids]}
+
+
+def test_refreshing_one_place_keeps_unrelated_ranked_results():
+    places_cache.set_cached_ranked("shibuya", _ranked("a", "b"))
+    places_cache.set_cached_ranked("shinjuku", _ranked("c"))
+
+    places_cache.clear_cached_ranked_for("a")
+
+    assert places_cache.get_cached_ranked("shibuya") is None
+    assert places_cache.get_cached_ranked("shinjuku") is not None
+    assert "b" not in places_cache._ranked_keys_by_place
+
+
+def test_overwritten_ranked_result_is_reindexed():
+    places_cache.set_cached_ranked("shibuya", _ranked("a"))
+    places_cache.set_cached_ranked("shibuya", _ranked("b"))
+
+    places_cache.clear_cached_ranked_for("a")
+
+    assert places_cache.get_cached_ranked("shibuya") is not None
+
+
+def test_evicted_ranked_result_leaves_the_index(monkeypatch):
+    monkeypatch.setattr(places_cache, "MAX_RANKED_CACHE_ENTRIES", 1)
+    places_cache.set_cached_ranked("shibuya", _ranked("a"))
+    places_cache.set_cached_ranked("shinjuku", _ranked("b"))
+
+    assert "a" not in places_cache._ranked_keys_by_place
+    assert set(places_cache._ranked_place_ids) == {"shinjuku"}
+
+
+def test_ranked_cache_hit_measures_distance_from_the_caller():
+    key = ramen_search._ranked_result_key(35.0, 139.0, {}, None, False)
+    places_cache.set_cached_ranked(
+        key,
+        {
+            "items": [{"place_id": "a", "lat": 35.001, "lng": 139.0, "distance_m": 0}],
+            "used_radius": 1000,
+        },
+    )
+
+    items, _had_error, _has_more, _radius = asyncio.run(
+        ramen_search.search_ramen_items(35.0002, 139.0)
+    )
+
+    assert items[0]["distance_m"] == 89
+    assert places_cache.get_cached_ranked(key)["items"][0]["distance_m"] == 0
+
+
+def test_reading_does_not_sweep_other_entries():
+    places_cache.set_cached_ranked("shibuya", _ranked("a"))
+    places_cache.set_cached_ranked("shinjuku", _ranked("b"))
+    places_cache._ranked_cache["shinjuku"]["expires_at"] = 0
+
+    assert places_cache.get_cached_ranked("shibuya") is not None
+    assert "shinjuku" in places_cache._ranked_cache
+
+    assert places_cache.get_cached_ranked("shinjuku") is None
+    assert "shinjuku" not in places_cache._ranked_cache
+
+
+def test_expired_entries_are_swept_periodically_on_write(monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr(places_cache.time, "time", lambda: now)
+    monkeypatch.setattr(places_cache, "_last_pruned_at", {})
+    places_cache.set_cached_ranked("shibuya", _ranked("a"))
+    places_cache._ranked_cache["shibuya"]["expires_at"] = now - 1
+
+    places_cache.set_cached_ranked("shinjuku", _ranked("b"))
+    assert "shibuya" in places_cache._ranked_cache
+
+    now += places_cache.PRUNE_INTERVAL_SEC
+    places_cache.set_cached_ranked("ikebukuro", _ranked("c"))
+    assert "shibuya" not in places_cache._ranked_cache
+    assert "a" not in places_cache._ranked_keys_by_place
@@ -0,0 +1,134 @@
+import asyncio
+
+from app.services import places_cache, ramen_search
+from app.services.rate_limiter import PRIORITY_BACKGROUND, upstream_priority
+
+
+def test_concurrent_searches_share_one_details_and_llm_call(monkeypatch):
+    calls = {"details": 0, "categories": 0, "summary": 0}
+
+    async def get_place_reviews(place_id):
+        calls["details"] += 1
+        await asyncio.sleep(0.05)
+        return {"reviews": [{"text": "醤油ラーメン"}], "opening_hours": {}}
+
+    async def extract_ramen_category_mentions(editorial_summary, reviews):
+        calls["categories"] += 1
+        await asyncio.sleep(0.05)
+        return {"shoyu": 1}
+
+    async def summarize_reviews_30(reviews):
+        calls["summary"] += 1
+        await asyncio.sleep(0.05)
+        return "醤油が美味しい"
+
+    monkeypatch.setattr(ramen_search, "get_place_reviews", get_place_reviews)
+    monkeypatch.setattr(
+        ramen_search, "extract_ramen_category_mentions", extract_ramen_category_mentions
+    )
+    monkeypatch.setattr(ramen_search, "summarize_reviews_30", summarize_reviews_30)
+    monkeypatch.setattr(ramen_search, "record_shop_hours", lambda *args: None)
+    monkeypatch.setattr(places_cache, "_details_cache", {})
+    monkeypatch.setattr(places_cache, "_enrichment_cache", {})
+
+    async def search(item):
+        detail = await ramen_search._fetch_place_detail("p1")
+        await ramen_search._enrich_item_with_llm(item, detail)
+        return item
+
+    async def run():
+        return await asyncio.gather(
+            search({"place_id": "p1"}),
+            search({"place_id": "p1"}),
+        )
+
+    first, second = asyncio.run(run())
+
+    assert calls == {"details": 1, "categories": 1, "summary": 1}
+    assert first["review_summary"] == second["review_summary"] == "醤油が美味しい"
+    assert not ramen_search._details_in_flight
+    assert not ramen_search._enrichment_in_flight
+
+
+def test_last_waiter_leaving_cancels_the_shared_call():
+    cancelled = []
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        in_flight = {}
+        waiter = asyncio.ensure_future(
+            ramen_search._join_in_flight(in_flight, "p1", hang)
+        )
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.sleep(0)
+        return in_flight
+
+    in_flight = asyncio.run(run())
+
+    assert cancelled == [True]
+    assert in_flight == {}
+
+
+def test_interactive_search_does_not_join_background_or_reduced_calls():
+    started = []
+
+    async def fetch(label):
+        started.append(label)
+        await asyncio.sleep(0.01)
+        return label
+
+    async def run():
+        in_flight = {}
+        with upstream_priority(PRIORITY_BACKGROUND):
+            background = asyncio.ensure_future(
+                ramen_search._join_in_flight(
+                    in_flight, "p1", lambda: fetch("background"), want_summary=True
+                )
+            )
+        await asyncio.sleep(0)
+        reduced = asyncio.ensure_future(
+            ramen_search._join_in_flight(in_flight, "p2", lambda: fetch("reduced"))
+        )
+        await asyncio.sleep(0)
+        return await asyncio.gather(
+            background,
+            reduced,
+            ramen_search._join_in_flight(
+                in_flight, "p1", lambda: fetch("interactive"), want_summary=True
+            ),
+            ramen_search._join_in_flight(
+                in_flight, "p2", lambda: fetch("full"), want_summary=True
+            ),
+            ramen_search._join_in_flight(in_flight, "p2", lambda: fetch("joined")),
+        )
+
+    results = asyncio.run(run())
+
+    assert started == ["background", "reduced", "interactive", "full"]
+    assert results == ["background", "reduced", "interactive", "full", "full"]
+
+
+def test_hung_llm_call_times_out(monkeypatch):
+    async def hang(*args):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(ramen_search, "_LLM_TIMEOUT_SEC", 0.01)
+    monkeypatch.setattr(ramen_search, "extract_ramen_category_mentions", hang)
+    monkeypatch.setattr(ramen_search, "summarize_reviews_30", hang)
+    monkeypatch.setattr(places_cache, "_enrichment_cache", {})
+
+    item = {"place_id": "p1"}
+    complete = asyncio.run(
+        ramen_search._enrich_item_with_llm(item, {"reviews": []})
+    )
+
+    assert complete is False
+    assert "review_summary" not in item
@@ -0,0 +1,43 @@
+import pytest
+
+from app.services import shop_catalog
+from app.services.places import _flat_distance_m
+
+
+@pytest.fixture(autouse=True)
+def empty_catalog(monkeypatch):
+    monkeypatch.setattr(shop_catalog, "_shops", {})
+    monkeypatch.setattr(shop_catalog, "_cell_shops", {})
+    monkeypatch.setattr(shop_catalog, "_cell_fetched_at", {})
+    monkeypatch.setattr(shop_catalog, "_pending_shops", {})
+    monkeypatch.setattr(shop_catalog, "_pending_cells", set())
+    monkeypatch.setattr(shop_catalog, "_schedule_flush", lambda: None)
+
+
+def test_only_cells_fully_inside_the_circle_are_marked():
+    lat, lng, radius = 35.0, 139.0, 1000
+    shop_catalog.record_nearby_items(lat, lng, radius, [])
+
+    deg = shop_catalog.CATALOG_CELL_DEG
+    assert shop_catalog._cell_fetched_at
+    for i, j in shop_catalog._cell_fetched_at:
+        for corner_lat in (i * deg, (i + 1) * deg):
+            for corner_lng in (j * deg, (j + 1) * deg):
+                assert _flat_distance_m(lat, lng, corner_lat, corner_lng) <= radius
+
+
+def test_query_outside_the_fetched_circle_goes_upstream():
+    shop_catalog.record_nearby_items(35.0, 139.0, 1000, [])
+
+    assert shop_catalog.query_catalog(35.0, 139.0, 1000) == []
+    # 半径を広げると、まだ見ていない縁のセルが入るので取り直す
+    assert shop_catalog.query_catalog(35.0, 139.0, 1500) is None
+
+
+def test_query_returns_shops_near_the_edge():
+    shop = {"place_id": "edge", "name": "ラーメン", "lat": 35.0089, "lng": 139.0}
+    shop_catalog.record_nearby_items(35.0, 139.0, 1000, [shop])
+
+    items = shop_catalog.query_catalog(35.0, 139.0, 1000)
+
+    assert [item["place_id"] for item in items] == ["edge"]
@@ -0,0 +1,18 @@
+from collections import OrderedDict
+
+from app.services import speculative_search
+
+
+def test_unused_speculations_and_locations_are_pruned(monkeypatch):
+    monkeypatch.setattr(speculative_search, "_last_locations", OrderedDict())
+    monkeypatch.setattr(speculative_search, "_speculations", OrderedDict())
+    monkeypatch.setattr(speculative_search, "_MAX_REMEMBERED_USERS", 2)
+
+    for index in range(3):
+        speculative_search._remember_location(f"u{index}", (35.0, 139.0))
+    speculative_search._speculations["old"] = {"started_at": 0.0}
+    speculative_search._speculations["new"] = {"started_at": 1000.0}
+    speculative_search._prune_speculations(1000.0)
+
+    assert list(speculative_search._last_locations) == ["u1", "u2"]
+    assert list(speculative_search._speculations) == ["new"]
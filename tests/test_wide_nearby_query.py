@@ -0,0 +1,54 @@
+import asyncio
+
+from app.config import SEARCH_REPLY_SLO_SEC
+from app.services import ramen_search, shop_catalog
+from app.services.deadline import Deadline
+
+
+def _place(index: int, lat: float) -> dict:
+    return {
+        "place_id": f"p{index}",
+        "name": f"ラーメン{index}",
+        "geometry": {"location": {"lat": lat, "lng": 139.0}},
+        "types": ["restaurant"],
+    }
+
+
+def test_next_page_is_reachable_under_default_slo(monkeypatch):
+    calls = []
+
+    async def search_nearby(lat, lng, q, radius):
+        calls.append("first")
+        # 1ページ目は 1000m より外の店ばかり
+        far = [_place(i, 35.0 + 0.012 + i * 0.0005) for i in range(20)]
+        return {"status": "OK", "results": far, "next_page_token": "t1"}
+
+    async def search_nearby_next_page(page_token):
+        calls.append(page_token)
+        near = [_place(100 + i, 35.0 + i * 0.001) for i in range(3)]
+        return {"status": "OK", "results": near}
+
+    monkeypatch.setattr(ramen_search, "search_nearby", search_nearby)
+    monkeypatch.setattr(
+        ramen_search, "search_nearby_next_page", search_nearby_next_page
+    )
+    monkeypatch.setattr(shop_catalog, "_schedule_flush", lambda: None)
+
+    async def run():
+        items_by_place_id = {}
+        had_error, used_radius = await ramen_search._collect_from_wide_query(
+            35.0,
+            139.0,
+            "ラーメン",
+            Deadline(SEARCH_REPLY_SLO_SEC),
+            items_by_place_id,
+            from_radius=1000,
+        )
+        return items_by_place_id, had_error, used_radius
+
+    items_by_place_id, had_error, used_radius = asyncio.run(run())
+
+    assert calls == ["first", "t1"]
+    assert not had_error
+    assert used_radius == 1000
+    assert {"p100", "p101", "p102"} <= set(items_by_place_id)